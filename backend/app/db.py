@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from app.core.config import settings
@@ -15,3 +17,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async drivers for the sync URLs, used when ASYNC_DATABASE_URL is not set
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_url(url: str) -> str:
+    """The same database as `url` through its asyncio driver (asyncpg / aiosqlite)."""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return u.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_engine():
+    """Engine for the async session, created on first use so the driver is only needed when used."""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_engine(settings.ASYNC_DATABASE_URL or async_url(settings.DATABASE_URL),
+                                            pool_pre_ping=True)
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
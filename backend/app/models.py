@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, Index
+from app.core.config import settings
 from app.db import Base
 from datetime import datetime
 
@@ -16,12 +17,16 @@ class Asset(Base):
     website: Mapped[str | None] = mapped_column(String(256), nullable=True)
     is_active: Mapped[bool] = mapped_column(default=True, index=True)
 
+# Declarative partitioning of price_ohlcv on PostgreSQL, chosen by OHLCV_PARTITIONING
+_OHLCV_PARTITION_BY = {"time": "RANGE (ts)", "timeframe": "LIST (timeframe)"}
+
 class PriceOHLCV(Base):
     __tablename__ = "price_ohlcv"
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), index=True)
-    ts: Mapped[datetime] = mapped_column(DateTime, index=True)
-    timeframe: Mapped[str] = mapped_column(String(8), index=True)  # 1m,5m,1h,4h,1d,1w
+    # the natural key is the primary key and the only index: it serves upsert conflicts,
+    # per-asset range scans and partition pruning, with no surrogate id to maintain
+    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True)
+    timeframe: Mapped[str] = mapped_column(String(8), primary_key=True)  # 1m,5m,1h,4h,1d,1w
+    ts: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     open: Mapped[float] = mapped_column(Float)
     high: Mapped[float] = mapped_column(Float)
     low: Mapped[float] = mapped_column(Float)
@@ -30,8 +35,8 @@ class PriceOHLCV(Base):
     source: Mapped[str] = mapped_column(String(32), default="binance")
 
     __table_args__ = (
-        UniqueConstraint("asset_id", "ts", "timeframe", name="uix_asset_ts_tf"),
-        Index("idx_price_lookup", "asset_id", "timeframe", "ts"),
+        {"postgresql_partition_by": _OHLCV_PARTITION_BY[settings.OHLCV_PARTITIONING]}
+        if settings.OHLCV_PARTITIONING in _OHLCV_PARTITION_BY else {}
     )
 
 class Watchlist(Base):
@@ -41,15 +46,23 @@ class Watchlist(Base):
 
 class SignalRun(Base):
     __tablename__ = "signal_run"
-    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), index=True)
-    timeframe: Mapped[str] = mapped_column(String(8), index=True)
-    name: Mapped[str] = mapped_column(String(64), index=True)
-    ts: Mapped[datetime] = mapped_column(DateTime, index=True)
+    # one row per signal per candle: reruns on the same candle update it in place
+    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True)
+    timeframe: Mapped[str] = mapped_column(String(8), primary_key=True)
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     value: Mapped[float] = mapped_column(Float)
     trigger: Mapped[int] = mapped_column(Integer, default=0)  # -1 sell, 0 neutral, 1 buy
 
-    __table_args__ = (Index("idx_signal_lookup", "asset_id", "timeframe", "name", "ts"),)
+class SignalLatest(Base):
+    __tablename__ = "signal_latest"
+    # newest SignalRun per signal, so current state for every asset is one indexed read
+    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id", ondelete="CASCADE"), primary_key=True)
+    timeframe: Mapped[str] = mapped_column(String(8), primary_key=True)
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime)
+    value: Mapped[float] = mapped_column(Float)
+    trigger: Mapped[int] = mapped_column(Integer, default=0)
 
 
 class PortfolioHolding(Base):
@@ -57,3 +70,16 @@ class PortfolioHolding(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     symbol: Mapped[str] = mapped_column(String(32), index=True)
     amount: Mapped[float] = mapped_column(Float, default=0.0)
+
+class Alert(Base):
+    __tablename__ = "alerts"
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(32))
+    timeframe: Mapped[str] = mapped_column(String(8))
+    rule: Mapped[str] = mapped_column(String(512))
+    webhook: Mapped[str] = mapped_column(String(512))
+    is_active: Mapped[bool] = mapped_column(default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_fired_ts: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # candle that last fired
+
+    __table_args__ = (Index("idx_alert_topic", "symbol", "timeframe", "is_active"),)
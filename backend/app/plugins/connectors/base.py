@@ -8,3 +8,7 @@ class BaseConnector(abc.ABC):
     async def backfill(self, symbol: str, timeframe: str, days: int) -> List[Dict]:
         """Return list of dict with keys: ts, open, high, low, close, volume"""
         raise NotImplementedError
+
+    async def fetch_range(self, symbol: str, timeframe: str, start_ms: int, end_ms: int) -> List[Dict]:
+        """Return candles whose open time falls in [start_ms, end_ms). Optional capability."""
+        raise NotImplementedError(f"{self.name} connector cannot fetch arbitrary ranges")
@@ -1,20 +1,29 @@
+import asyncio
 import httpx
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import List, Dict, Callable, Optional
+from app.core.config import settings
 from app.plugins.connectors.base import BaseConnector
-from app.utils.timeframes import BINANCE_INTERVALS
+from app.utils.timeframes import BINANCE_INTERVALS, TIMEFRAME_MS
+from app.utils.rate_limit import WeightBudget
 from tenacity import retry, stop_after_attempt, wait_fixed
 
-BASE = "https://api.binance.com/api/v3"
+BASE = settings.BINANCE_BASE_URL
+KLINES_WEIGHT = 2  # REQUEST_WEIGHT of GET /klines
+PAGE_LIMIT = 1000  # max klines per request
 
 def _to_ms(dt: datetime) -> int:
     return int(dt.timestamp() * 1000)
 
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-async def _fetch_klines(session, symbol, interval, limit=1000, startTime=None):
+async def _fetch_klines(session, symbol, interval, limit=1000, startTime=None, endTime=None, budget=None):
+    if budget is not None:
+        await budget.acquire(KLINES_WEIGHT)
     params = {"symbol": symbol, "interval": interval, "limit": limit}
     if startTime is not None:
         params["startTime"] = startTime
+    if endTime is not None:
+        params["endTime"] = endTime
     r = await session.get(f"{BASE}/klines", params=params, timeout=30.0)
     r.raise_for_status()
     return r.json()
@@ -22,38 +31,60 @@ async def _fetch_klines(session, symbol, interval, limit=1000, startTime=None):
 class BinanceConnector(BaseConnector):
     name = "binance"
 
-    async def backfill(self, symbol: str, timeframe: str, days: int) -> List[Dict]:
+    async def backfill(self, symbol: str, timeframe: str, days: int, **opts) -> List[Dict]:
+        now_ms = _to_ms(datetime.now(timezone.utc))
+        total_ms = days * 86_400_000
+        return await self.fetch_range(symbol, timeframe, now_ms - total_ms, now_ms, **opts)
+
+    async def fetch_range(self, symbol: str, timeframe: str, start_ms: int, end_ms: int,
+                          session: Optional[httpx.AsyncClient] = None,
+                          budget: Optional[WeightBudget] = None,
+                          on_page: Optional[Callable[[int], None]] = None) -> List[Dict]:
+        """Candles opening in [start_ms, end_ms).
+
+        Pass a shared `session` to reuse pooled connections across calls, a `budget` to
+        spend request weight against, and `on_page` to observe the size of each page.
+        """
         interval = BINANCE_INTERVALS.get(timeframe)
         if not interval:
             raise ValueError(f"Unsupported timeframe for Binance: {timeframe}")
-        now_ms = _to_ms(datetime.now(timezone.utc))
-        total_ms = days * 86_400_000
-        start_ms = now_ms - total_ms
-        out: List[Dict] = []
-        async with httpx.AsyncClient() as session:
-            cur = start_ms
-            while cur < now_ms:
-                chunk = await _fetch_klines(session, symbol, interval, limit=1000, startTime=cur)
-                if not chunk:
-                    break
-                for c in chunk:
-                    # c: [ open time, open, high, low, close, volume, close time, ... ]
-                    out.append({
-                        "ts": datetime.fromtimestamp(c[0]/1000, tz=timezone.utc).replace(tzinfo=None),
-                        "open": float(c[1]),
-                        "high": float(c[2]),
-                        "low": float(c[3]),
-                        "close": float(c[4]),
-                        "volume": float(c[5]),
-                    })
-                # paginate by last open time + 1 ms
-                last_open = chunk[-1][0]
-                if len(chunk) < 1000:
-                    break
-                cur = last_open + 1
-        # dedupe by timestamp
-        seen = set(); dedup = []
-        for r in out:
-            if r["ts"] not in seen:
-                dedup.append(r); seen.add(r["ts"])
-        return dedup
+        if session is None:
+            async with httpx.AsyncClient() as own:
+                return await self.fetch_range(symbol, timeframe, start_ms, end_ms, own, budget, on_page)
+        step = TIMEFRAME_MS[timeframe]
+        # every page boundary is known up front, so pages are independent requests
+        page_span = PAGE_LIMIT * step
+        pages = [(s, min(s + page_span, end_ms)) for s in range(start_ms, end_ms, page_span)]
+        sem = asyncio.Semaphore(settings.BINANCE_PAGE_CONCURRENCY)
+
+        async def fetch_page(page_start: int, page_end: int):
+            async with sem:
+                chunk = await _fetch_klines(session, symbol, interval, limit=PAGE_LIMIT, startTime=page_start,
+                                            endTime=page_end - 1, budget=budget)
+            if on_page is not None:
+                on_page(len(chunk))
+            return chunk
+
+        chunks = await asyncio.gather(*[fetch_page(a, b) for a, b in pages])
+        # parsing a large backfill takes long enough to stall other requests; do it off the loop
+        return await asyncio.to_thread(_merge_pages, chunks)
+
+def _merge_pages(chunks: List[List]) -> List[Dict]:
+    # pages are disjoint and each is ordered, so a single pass over sorted open times merges them
+    out: List[Dict] = []
+    last_open = None
+    for chunk in chunks:
+        for c in chunk:
+            # c: [ open time, open, high, low, close, volume, close time, ... ]
+            if last_open is not None and c[0] <= last_open:
+                continue
+            last_open = c[0]
+            out.append({
+                "ts": datetime.fromtimestamp(c[0]/1000, tz=timezone.utc).replace(tzinfo=None),
+                "open": float(c[1]),
+                "high": float(c[2]),
+                "low": float(c[3]),
+                "close": float(c[4]),
+                "volume": float(c[5]),
+            })
+    return out
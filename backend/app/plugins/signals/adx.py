@@ -1,56 +1,81 @@
 import pandas as pd
 import numpy as np
 from .base import BaseSignal
+from .streaming import NAN, RollingWindow, SignalStream, div
+
+def _rolling_mean(a: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(a).rolling(window=window).mean().to_numpy()
 
 class ADX(BaseSignal):
     """Average Directional Index (ADX) signal"""
-    
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
-        period = params.get('period', 14)
-        adx_threshold = params.get('adx_threshold', 25)
-        
-        # Calculate True Range (TR)
-        high_low = df['high'] - df['low']
-        high_close_prev = np.abs(df['high'] - df['close'].shift(1))
-        low_close_prev = np.abs(df['low'] - df['close'].shift(1))
-        tr = np.maximum(high_low, np.maximum(high_close_prev, low_close_prev))
-        
-        # Calculate Directional Movement
-        plus_dm = np.where((df['high'] - df['high'].shift(1)) > (df['low'].shift(1) - df['low']),
-                          np.maximum(df['high'] - df['high'].shift(1), 0), 0)
-        minus_dm = np.where((df['low'].shift(1) - df['low']) > (df['high'] - df['high'].shift(1)),
-                           np.maximum(df['low'].shift(1) - df['low'], 0), 0)
-        
-        # Smooth the values
-        tr_smooth = pd.Series(tr).rolling(window=period).mean()
-        plus_dm_smooth = pd.Series(plus_dm).rolling(window=period).mean()
-        minus_dm_smooth = pd.Series(minus_dm).rolling(window=period).mean()
-        
-        # Calculate Directional Indicators
-        plus_di = 100 * (plus_dm_smooth / tr_smooth)
-        minus_di = 100 * (minus_dm_smooth / tr_smooth)
-        
-        # Calculate ADX
-        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
-        adx = dx.rolling(window=period).mean()
-        
-        # Generate signals based on trend strength and direction
-        signals = []
-        for i in range(len(df)):
-            if pd.isna(adx.iloc[i]) or pd.isna(plus_di.iloc[i]) or pd.isna(minus_di.iloc[i]):
-                signals.append(0)
-            elif adx.iloc[i] > adx_threshold:
-                if plus_di.iloc[i] > minus_di.iloc[i]:
-                    signals.append(1)  # Strong uptrend
-                else:
-                    signals.append(-1)  # Strong downtrend
-            else:
-                signals.append(0)  # Weak trend
-        
-        result = df.copy()
-        result['adx'] = adx
-        result['plus_di'] = plus_di
-        result['minus_di'] = minus_di
-        result['adx_signal'] = signals
-        
-        return result
+    name = "adx"
+
+    def evaluate(self, graph, **params):
+        period = int(params.get('period', 14))
+        adx_threshold = float(params.get('adx_threshold', 25))
+
+        high = graph('high').to_numpy(dtype=np.float64)
+        low = graph('low').to_numpy(dtype=np.float64)
+        close = graph('close').to_numpy(dtype=np.float64)
+        prev_high = np.concatenate(([np.nan], high[:-1]))
+        prev_low = np.concatenate(([np.nan], low[:-1]))
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Calculate True Range (TR)
+            tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+            # Calculate Directional Movement
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = np.where(up_move > down_move, np.maximum(up_move, 0), 0)
+            minus_dm = np.where(down_move > up_move, np.maximum(down_move, 0), 0)
+
+            # Smooth the values
+            tr_smooth = _rolling_mean(tr, period)
+            plus_di = 100 * (_rolling_mean(plus_dm, period) / tr_smooth)
+            minus_di = 100 * (_rolling_mean(minus_dm, period) / tr_smooth)
+
+            # Calculate ADX
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            adx = _rolling_mean(dx, period)
+
+            # Strong trend in the direction of the dominant DI; weak or undefined trend -> 0
+            strong = ~np.isnan(plus_di) & ~np.isnan(minus_di) & (adx > adx_threshold)
+            trigger = np.select([strong & (plus_di > minus_di), strong], [1, -1], 0)
+
+        return {'value': adx, 'trigger': trigger, 'adx': adx, 'plus_di': plus_di, 'minus_di': minus_di}
+
+    def stream(self, **params):
+        return ADXStream(int(params.get('period', 14)), float(params.get('adx_threshold', 25)))
+
+    def warmup(self, **params):
+        # ADX averages `period` DX values, each over `period` moves that need the candle before
+        return 2 * int(params.get('period', 14))
+
+class ADXStream(SignalStream):
+    def __init__(self, period: int, adx_threshold: float):
+        self.tr, self.plus, self.minus, self.dx = (RollingWindow(period) for _ in range(4))
+        self.adx_threshold = adx_threshold
+        self.prev = None
+
+    def update(self, candle):
+        high, low, close = candle['high'], candle['low'], candle['close']
+        if self.prev is None:
+            tr, plus_dm, minus_dm = NAN, 0.0, 0.0
+        else:
+            ph, pl, pc = self.prev
+            tr = max(high - low, abs(high - pc), abs(low - pc))
+            up, down = high - ph, pl - low
+            plus_dm = max(up, 0.0) if up > down else 0.0
+            minus_dm = max(down, 0.0) if down > up else 0.0
+        self.prev = (high, low, close)
+        self.tr.update(tr); self.plus.update(plus_dm); self.minus.update(minus_dm)
+        tr_smooth = self.tr.mean()
+        plus_di = 100 * div(self.plus.mean(), tr_smooth)
+        minus_di = 100 * div(self.minus.mean(), tr_smooth)
+        self.dx.update(100 * div(abs(plus_di - minus_di), plus_di + minus_di))
+        adx = self.dx.mean()
+        if plus_di == plus_di and minus_di == minus_di and adx > self.adx_threshold:
+            return adx, 1 if plus_di > minus_di else -1
+        return adx, 0
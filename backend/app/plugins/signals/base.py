@@ -1,10 +1,47 @@
 import abc
+from typing import Dict, Optional
 import pandas as pd
+from app.plugins.signals.graph import SeriesGraph
+from app.plugins.signals.streaming import SignalStream
 
 class BaseSignal(abc.ABC):
     name: str = "base"
 
     @abc.abstractmethod
+    def evaluate(self, graph: SeriesGraph, **params) -> Dict[str, pd.Series]:
+        """Return columns aligned with graph.df: 'value', 'trigger' in {-1,0,1}, and optional extras.
+
+        Shared intermediates (EMAs, rolling stats, diffs) should be resolved through
+        `graph` so other signals evaluated on the same graph can reuse them.
+        """
+        raise NotImplementedError
+
     def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
         """Return df with a 'value' column and an optional 'trigger' in {-1,0,1}"""
-        raise NotImplementedError
+        out = df.copy()
+        for col, series in self.evaluate(SeriesGraph(df), **params).items():
+            out[col] = series
+        return out
+
+    def stream(self, **params) -> SignalStream:
+        """Incremental counterpart of `compute`: fresh state to be fed one candle at a time."""
+        raise NotImplementedError(f"{self.name} has no streaming implementation")
+
+    def warmup(self, **params) -> Optional[int]:
+        """Candles a fresh stream must consume to reach the state of one fed the whole
+        history, or None when that state depends on every candle."""
+        return None
+
+    def seed(self, df: pd.DataFrame, **params) -> SignalStream:
+        """A stream that has consumed every candle of `df`.
+
+        The default replays the last `warmup` candles, or all of them when there is no
+        bound; recursive indicators override it to start from their batch values.
+        """
+        stream = self.stream(**params)
+        n = self.warmup(**params)
+        tail = df if n is None else df.iloc[-n:]
+        cols = [tail[c].to_numpy() for c in ("open", "high", "low", "close", "volume")]
+        for o, h, l, c, v in zip(*cols):
+            stream.update({"open": o, "high": h, "low": l, "close": c, "volume": v})
+        return stream
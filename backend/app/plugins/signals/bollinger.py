@@ -1,19 +1,39 @@
-import pandas as pd
+import numpy as np
 from app.plugins.signals.base import BaseSignal
+from app.plugins.signals.graph import sma, rstd
+from app.plugins.signals.streaming import RollingWindow, SignalStream
 
 class Bollinger(BaseSignal):
     name = "bollinger"
 
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
+    def evaluate(self, graph, **params):
         period = int(params.get("period", 20))
         mult = float(params.get("mult", 2.0))
-        ma = df["close"].rolling(window=period, min_periods=period).mean()
-        std = df["close"].rolling(window=period, min_periods=period).std()
+        close = graph("close")
+        ma = graph(sma("close", period))
+        std = graph(rstd("close", period))
         upper = ma + mult * std
         lower = ma - mult * std
-        out = df.copy()
-        out["value"] = (df["close"] - ma) / (std.replace(0, 1e-9))
-        out["trigger"] = 0
-        out.loc[df["close"] < lower, "trigger"] = 1
-        out.loc[df["close"] > upper, "trigger"] = -1
-        return out
+        value = (close - ma) / (std.replace(0, 1e-9))
+        # sell takes precedence when both bands match, as in the original assignment order
+        return {"value": value, "trigger": np.select([close > upper, close < lower], [-1, 1], 0)}
+
+    def stream(self, **params):
+        return BollingerStream(int(params.get("period", 20)), float(params.get("mult", 2.0)))
+
+    def warmup(self, **params):
+        return int(params.get("period", 20))
+
+class BollingerStream(SignalStream):
+    def __init__(self, period: int, mult: float):
+        self.window = RollingWindow(period)
+        self.mult = mult
+
+    def update(self, candle):
+        close = candle["close"]
+        self.window.update(close)
+        ma, std = self.window.mean(), self.window.std()
+        value = (close - ma) / (1e-9 if std == 0 else std)
+        if close > ma + self.mult * std:
+            return value, -1
+        return value, 1 if close < ma - self.mult * std else 0
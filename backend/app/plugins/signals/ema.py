@@ -1,19 +1,41 @@
-import pandas as pd
+import numpy as np
 from app.plugins.signals.base import BaseSignal
+from app.plugins.signals.graph import SeriesGraph, ema, sub, shift
+from app.plugins.signals.streaming import NAN, EmaState, SignalStream
 
 class EMA(BaseSignal):
     name = "ema"
 
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
+    def evaluate(self, graph, **params):
         period = int(params.get("period", 20))
-        ema = df["close"].ewm(span=period, adjust=False).mean()
-        out = df.copy()
-        out["value"] = ema
-        out["trigger"] = 0
-        prev = df["close"].shift(1) - ema.shift(1)
-        cur = df["close"] - ema
+        line = ema("close", period)
+        dist = sub("close", line)
+        prev = graph(shift(dist, 1))
+        cur = graph(dist)
         buy = (prev <= 0) & (cur > 0)
         sell = (prev >= 0) & (cur < 0)
-        out.loc[buy, "trigger"] = 1
-        out.loc[sell, "trigger"] = -1
-        return out
+        return {"value": graph(line), "trigger": np.select([buy, sell], [1, -1], 0)}
+
+    def stream(self, **params):
+        return EMAStream(int(params.get("period", 20)))
+
+    def seed(self, df, **params):
+        stream = self.stream(**params)
+        if len(df):
+            period = int(params.get("period", 20))
+            graph = SeriesGraph(df)
+            stream.ema.value = float(graph(ema("close", period)).iloc[-1])
+            stream.prev_dist = float(graph(sub("close", ema("close", period))).iloc[-1])
+        return stream
+
+class EMAStream(SignalStream):
+    def __init__(self, period: int):
+        self.ema = EmaState(period)
+        self.prev_dist = NAN
+
+    def update(self, candle):
+        close = candle["close"]
+        value = self.ema.update(close)
+        dist, prev = close - value, self.prev_dist
+        self.prev_dist = dist
+        return value, 1 if prev <= 0 and dist > 0 else -1 if prev >= 0 and dist < 0 else 0
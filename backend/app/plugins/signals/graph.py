@@ -0,0 +1,81 @@
+from typing import Callable, Dict, Hashable, Tuple, Union
+import pandas as pd
+
+# A reference to a series: an OHLCV column name ("close") or a node key built below.
+Ref = Union[str, Tuple]
+
+def ema(src: Ref, span: int) -> Tuple:
+    return ("ema", src, int(span))
+
+def sma(src: Ref, window: int) -> Tuple:
+    return ("sma", src, int(window))
+
+def rstd(src: Ref, window: int) -> Tuple:
+    return ("rstd", src, int(window))
+
+def rmin(src: Ref, window: int) -> Tuple:
+    return ("rmin", src, int(window))
+
+def rmax(src: Ref, window: int) -> Tuple:
+    return ("rmax", src, int(window))
+
+def diff(src: Ref) -> Tuple:
+    return ("diff", src)
+
+def shift(src: Ref, n: int = 1) -> Tuple:
+    return ("shift", src, int(n))
+
+def sub(a: Ref, b: Ref) -> Tuple:
+    return ("sub", a, b)
+
+def gains(src: Ref) -> Tuple:
+    return ("gains", src)
+
+def losses(src: Ref) -> Tuple:
+    return ("losses", src)
+
+_OPS: Dict[str, Callable[..., pd.Series]] = {
+    "ema": lambda s, n: s.ewm(span=n, adjust=False).mean(),
+    "sma": lambda s, n: s.rolling(window=n, min_periods=n).mean(),
+    "rstd": lambda s, n: s.rolling(window=n, min_periods=n).std(),
+    "rmin": lambda s, n: s.rolling(window=n).min(),
+    "rmax": lambda s, n: s.rolling(window=n).max(),
+    "diff": lambda s: s.diff(),
+    "shift": lambda s, n: s.shift(n),
+    "sub": lambda a, b: a - b,
+    "gains": lambda s: s.clip(lower=0),
+    "losses": lambda s: -1 * s.clip(upper=0),
+}
+
+class SeriesGraph:
+    """DAG of primitive series over one OHLCV frame, each node computed at most once.
+
+    Plugins describe what they need with node keys (e.g. ``ema("close", 12)``) and
+    resolve them with ``graph(key)``; nodes may depend on other nodes, so a MACD signal
+    line is ``ema(sub(ema("close", 12), ema("close", 26)), 9)``. Evaluating several
+    signals against the same graph shares every common intermediate and never copies
+    the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._nodes: Dict[Hashable, pd.Series] = {}
+        self.computed = 0
+        self.reused = 0
+
+    def __call__(self, ref: Ref) -> pd.Series:
+        if isinstance(ref, str):
+            return self.df[ref]
+        node = self._nodes.get(ref)
+        if node is not None:
+            self.reused += 1
+            return node
+        op, *args = ref
+        inputs = [self(a) if isinstance(a, (str, tuple)) else a for a in args]
+        node = _OPS[op](*inputs)
+        self._nodes[ref] = node
+        self.computed += 1
+        return node
+
+    def __len__(self) -> int:
+        return len(self._nodes)
@@ -1,23 +1,50 @@
-import pandas as pd
+import numpy as np
 from app.plugins.signals.base import BaseSignal
+from app.plugins.signals.graph import SeriesGraph, ema, sub, shift
+from app.plugins.signals.streaming import NAN, EmaState, SignalStream
 
 class MACD(BaseSignal):
     name = "macd"
 
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
+    def evaluate(self, graph, **params):
         fast = int(params.get("fast", 12))
         slow = int(params.get("slow", 26))
         signal_p = int(params.get("signal", 9))
-        ema_fast = df["close"].ewm(span=fast, adjust=False).mean()
-        ema_slow = df["close"].ewm(span=slow, adjust=False).mean()
-        macd = ema_fast - ema_slow
-        signal = macd.ewm(span=signal_p, adjust=False).mean()
-        hist = macd - signal
-        out = df.copy()
-        out["value"] = macd
-        out["trigger"] = 0
-        cross_up = (macd > signal) & (macd.shift(1) <= signal.shift(1))
-        cross_down = (macd < signal) & (macd.shift(1) >= signal.shift(1))
-        out.loc[cross_up, "trigger"] = 1
-        out.loc[cross_down, "trigger"] = -1
-        return out
+        line = sub(ema("close", fast), ema("close", slow))
+        signal_line = ema(line, signal_p)
+        macd, signal = graph(line), graph(signal_line)
+        prev_macd, prev_signal = graph(shift(line, 1)), graph(shift(signal_line, 1))
+        cross_up = (macd > signal) & (prev_macd <= prev_signal)
+        cross_down = (macd < signal) & (prev_macd >= prev_signal)
+        return {"value": macd, "trigger": np.select([cross_up, cross_down], [1, -1], 0)}
+
+    def stream(self, **params):
+        return MACDStream(int(params.get("fast", 12)), int(params.get("slow", 26)), int(params.get("signal", 9)))
+
+    def seed(self, df, **params):
+        stream = self.stream(**params)
+        if len(df):
+            fast, slow = ema("close", int(params.get("fast", 12))), ema("close", int(params.get("slow", 26)))
+            line = sub(fast, slow)
+            graph = SeriesGraph(df)
+            stream.fast.value, stream.slow.value = float(graph(fast).iloc[-1]), float(graph(slow).iloc[-1])
+            stream.prev_macd = float(graph(line).iloc[-1])
+            stream.prev_signal = stream.signal.value = float(graph(ema(line, int(params.get("signal", 9)))).iloc[-1])
+        return stream
+
+class MACDStream(SignalStream):
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast, self.slow, self.signal = EmaState(fast), EmaState(slow), EmaState(signal)
+        self.prev_macd = self.prev_signal = NAN
+
+    def update(self, candle):
+        close = candle["close"]
+        macd = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(macd)
+        pm, ps = self.prev_macd, self.prev_signal
+        self.prev_macd, self.prev_signal = macd, signal
+        if macd > signal and pm <= ps:
+            return macd, 1
+        if macd < signal and pm >= ps:
+            return macd, -1
+        return macd, 0
@@ -1,21 +1,42 @@
-import pandas as pd
+import numpy as np
 from app.plugins.signals.base import BaseSignal
+from app.plugins.signals.graph import diff, gains, losses, sma
+from app.plugins.signals.streaming import NAN, RollingWindow, SignalStream
 
 class RSI(BaseSignal):
     name = "rsi"
 
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
+    def evaluate(self, graph, **params):
         period = int(params.get("period", 14))
-        delta = df["close"].diff()
-        up = delta.clip(lower=0)
-        down = -1 * delta.clip(upper=0)
-        gain = up.rolling(window=period, min_periods=period).mean()
-        loss = down.rolling(window=period, min_periods=period).mean()
+        delta = diff("close")
+        gain = graph(sma(gains(delta), period))
+        loss = graph(sma(losses(delta), period))
         rs = gain / (loss.replace(0, 1e-9))
         rsi = 100 - (100 / (1 + rs))
-        out = df.copy()
-        out["value"] = rsi
-        out["trigger"] = 0
-        out.loc[out["value"] < params.get("oversold", 30), "trigger"] = 1
-        out.loc[out["value"] > params.get("overbought", 70), "trigger"] = -1
-        return out
+        # sell takes precedence when both thresholds match, as in the original assignment order
+        trigger = np.select([rsi > params.get("overbought", 70), rsi < params.get("oversold", 30)], [-1, 1], 0)
+        return {"value": rsi, "trigger": trigger}
+
+    def stream(self, **params):
+        return RSIStream(int(params.get("period", 14)), params.get("overbought", 70), params.get("oversold", 30))
+
+    def warmup(self, **params):
+        # one more close than the window, for the first difference
+        return int(params.get("period", 14)) + 1
+
+class RSIStream(SignalStream):
+    def __init__(self, period: int, overbought: float, oversold: float):
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.overbought, self.oversold = overbought, oversold
+        self.prev_close = NAN
+
+    def update(self, candle):
+        close = candle["close"]
+        delta, self.prev_close = close - self.prev_close, close
+        self.gains.update(max(delta, 0.0) if delta == delta else NAN)
+        self.losses.update(max(-delta, 0.0) if delta == delta else NAN)
+        loss = self.losses.mean()
+        rs = self.gains.mean() / (1e-9 if loss == 0 else loss)
+        rsi = 100 - (100 / (1 + rs))
+        return rsi, -1 if rsi > self.overbought else 1 if rsi < self.oversold else 0
@@ -1,39 +1,56 @@
 import pandas as pd
 import numpy as np
 from .base import BaseSignal
+from .graph import rmin, rmax
+from .streaming import RollingExtreme, RollingWindow, SignalStream, div
 
 class Stochastic(BaseSignal):
     """Stochastic Oscillator signal"""
-    
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
-        k_period = params.get('k_period', 14)
-        d_period = params.get('d_period', 3)
-        overbought = params.get('overbought', 80)
-        oversold = params.get('oversold', 20)
-        
+    name = "stochastic"
+
+    def evaluate(self, graph, **params):
+        k_period = int(params.get('k_period', 14))
+        d_period = int(params.get('d_period', 3))
+        overbought = float(params.get('overbought', 80))
+        oversold = float(params.get('oversold', 20))
+
         # Calculate %K
-        lowest_low = df['low'].rolling(window=k_period).min()
-        highest_high = df['high'].rolling(window=k_period).max()
-        k_percent = 100 * ((df['close'] - lowest_low) / (highest_high - lowest_low))
-        
+        lowest_low = graph(rmin('low', k_period))
+        highest_high = graph(rmax('high', k_period))
+        k_percent = 100 * ((graph('close') - lowest_low) / (highest_high - lowest_low))
+
         # Calculate %D (moving average of %K)
         d_percent = k_percent.rolling(window=d_period).mean()
-        
-        # Generate signals
-        signals = []
-        for i in range(len(df)):
-            if pd.isna(k_percent.iloc[i]) or pd.isna(d_percent.iloc[i]):
-                signals.append(0)
-            elif k_percent.iloc[i] < oversold and d_percent.iloc[i] < oversold:
-                signals.append(1)  # Buy signal
-            elif k_percent.iloc[i] > overbought and d_percent.iloc[i] > overbought:
-                signals.append(-1)  # Sell signal
-            else:
-                signals.append(0)  # Neutral
-        
-        result = df.copy()
-        result['stoch_k'] = k_percent
-        result['stoch_d'] = d_percent
-        result['stoch_signal'] = signals
-        
-        return result
+
+        # Buy when both lines are oversold, sell when both are overbought; NaN compares False -> 0
+        k = k_percent.to_numpy()
+        d = d_percent.to_numpy()
+        with np.errstate(invalid='ignore'):
+            trigger = np.select(
+                [(k < oversold) & (d < oversold), (k > overbought) & (d > overbought)], [1, -1], 0)
+
+        return {'value': k_percent, 'trigger': trigger, 'stoch_k': k_percent, 'stoch_d': d_percent}
+
+    def stream(self, **params):
+        return StochasticStream(int(params.get('k_period', 14)), int(params.get('d_period', 3)),
+                                float(params.get('overbought', 80)), float(params.get('oversold', 20)))
+
+    def warmup(self, **params):
+        # %D averages the last d_period values of %K, each over k_period candles
+        return int(params.get('k_period', 14)) + int(params.get('d_period', 3)) - 1
+
+class StochasticStream(SignalStream):
+    def __init__(self, k_period: int, d_period: int, overbought: float, oversold: float):
+        self.low = RollingExtreme(k_period, 'min')
+        self.high = RollingExtreme(k_period, 'max')
+        self.d = RollingWindow(d_period)
+        self.overbought, self.oversold = overbought, oversold
+
+    def update(self, candle):
+        ll, hh = self.low.update(candle['low']), self.high.update(candle['high'])
+        k = 100 * div(candle['close'] - ll, hh - ll)
+        self.d.update(k)
+        d = self.d.mean()
+        if k < self.oversold and d < self.oversold:
+            return k, 1
+        return k, -1 if k > self.overbought and d > self.overbought else 0
@@ -0,0 +1,110 @@
+import math
+from collections import deque
+from typing import Mapping, Tuple
+
+NAN = float("nan")
+
+def _isnan(x: float) -> bool:
+    return x != x
+
+def div(a: float, b: float) -> float:
+    """a / b with NumPy semantics: x/0 is +-inf, 0/0 and NaN operands are NaN."""
+    if b == 0:
+        if a == 0 or _isnan(a):
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+class EmaState:
+    """Recursive EMA matching ``Series.ewm(span=n, adjust=False).mean()``."""
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if _isnan(self.value):
+            self.value = x
+        elif not _isnan(x):
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+class RollingWindow:
+    """Ring buffer with running sums: mean/std over the last n values, O(1) per update.
+
+    Like ``rolling(n, min_periods=n)``, results are NaN until the window is full and
+    while it contains a NaN. Sums are rebuilt from the buffer every n updates so
+    floating point drift stays bounded.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.buf = deque(maxlen=n)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nans = 0
+        self._since_rebuild = 0
+
+    def update(self, x: float):
+        if len(self.buf) == self.n:
+            old = self.buf[0]
+            if _isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+                self.total_sq -= old * old
+        self.buf.append(x)
+        if _isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+            self.total_sq += x * x
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.n:
+            vals = [v for v in self.buf if not _isnan(v)]
+            self.total = math.fsum(vals)
+            self.total_sq = math.fsum(v * v for v in vals)
+            self._since_rebuild = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.buf) == self.n and self.nans == 0
+
+    def mean(self) -> float:
+        return self.total / self.n if self.ready else NAN
+
+    def std(self) -> float:
+        if not self.ready or self.n < 2:
+            return NAN
+        var = (self.total_sq - self.total * self.total / self.n) / (self.n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+class RollingExtreme:
+    """Rolling min or max over the last n values via a monotonic deque (amortized O(1))."""
+
+    def __init__(self, n: int, mode: str = "max"):
+        self.n = n
+        self.sign = 1.0 if mode == "max" else -1.0
+        self.q = deque()  # (index, signed value), decreasing
+        self.i = -1
+
+    def update(self, x: float) -> float:
+        self.i += 1
+        v = self.sign * x
+        while self.q and self.q[-1][1] <= v:
+            self.q.pop()
+        self.q.append((self.i, v))
+        if self.q[0][0] <= self.i - self.n:
+            self.q.popleft()
+        return self.sign * self.q[0][1] if self.i >= self.n - 1 else NAN
+
+class SignalStream:
+    """Per-(asset, timeframe, config) indicator state fed one candle at a time.
+
+    ``update`` takes a candle mapping with open/high/low/close/volume and returns
+    ``(value, trigger)`` for that candle, matching the last row of ``compute`` over the
+    same history.
+    """
+
+    def update(self, candle: Mapping[str, float]) -> Tuple[float, int]:
+        raise NotImplementedError
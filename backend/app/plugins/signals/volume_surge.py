@@ -1,15 +1,32 @@
-import pandas as pd
+import numpy as np
 from app.plugins.signals.base import BaseSignal
+from app.plugins.signals.graph import sma
+from app.plugins.signals.streaming import RollingWindow, SignalStream
 
 class VolumeSurge(BaseSignal):
     name = "volume_surge"
 
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
+    def evaluate(self, graph, **params):
         lookback = int(params.get("lookback", 20))
         mult = float(params.get("mult", 2.0))
-        vma = df["volume"].rolling(window=lookback, min_periods=lookback).mean()
-        out = df.copy()
-        out["value"] = df["volume"] / (vma.replace(0, 1e-9))
-        out["trigger"] = 0
-        out.loc[out["value"] > mult, "trigger"] = 1
-        return out
+        vma = graph(sma("volume", lookback))
+        value = graph("volume") / (vma.replace(0, 1e-9))
+        return {"value": value, "trigger": np.where(value > mult, 1, 0)}
+
+    def stream(self, **params):
+        return VolumeSurgeStream(int(params.get("lookback", 20)), float(params.get("mult", 2.0)))
+
+    def warmup(self, **params):
+        return int(params.get("lookback", 20))
+
+class VolumeSurgeStream(SignalStream):
+    def __init__(self, lookback: int, mult: float):
+        self.window = RollingWindow(lookback)
+        self.mult = mult
+
+    def update(self, candle):
+        volume = candle["volume"]
+        self.window.update(volume)
+        vma = self.window.mean()
+        value = volume / (1e-9 if vma == 0 else vma)
+        return value, 1 if value > self.mult else 0
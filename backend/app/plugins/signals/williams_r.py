@@ -1,34 +1,44 @@
 import pandas as pd
 import numpy as np
 from .base import BaseSignal
+from .graph import rmin, rmax
+from .streaming import RollingExtreme, SignalStream, div
 
 class WilliamsR(BaseSignal):
     """Williams %R signal"""
-    
-    def compute(self, df: pd.DataFrame, **params) -> pd.DataFrame:
-        period = params.get('period', 14)
-        overbought = params.get('overbought', -20)
-        oversold = params.get('oversold', -80)
-        
+    name = "williams_r"
+
+    def evaluate(self, graph, **params):
+        period = int(params.get('period', 14))
+        overbought = float(params.get('overbought', -20))
+        oversold = float(params.get('oversold', -80))
+
         # Calculate Williams %R
-        highest_high = df['high'].rolling(window=period).max()
-        lowest_low = df['low'].rolling(window=period).min()
-        williams_r = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
-        
-        # Generate signals
-        signals = []
-        for i in range(len(df)):
-            if pd.isna(williams_r.iloc[i]):
-                signals.append(0)
-            elif williams_r.iloc[i] < oversold:
-                signals.append(1)  # Buy signal (oversold)
-            elif williams_r.iloc[i] > overbought:
-                signals.append(-1)  # Sell signal (overbought)
-            else:
-                signals.append(0)  # Neutral
-        
-        result = df.copy()
-        result['williams_r'] = williams_r
-        result['williams_r_signal'] = signals
-        
-        return result
+        highest_high = graph(rmax('high', period))
+        lowest_low = graph(rmin('low', period))
+        williams_r = -100 * ((highest_high - graph('close')) / (highest_high - lowest_low))
+
+        # Buy when oversold, sell when overbought; NaN compares False -> 0
+        w = williams_r.to_numpy()
+        with np.errstate(invalid='ignore'):
+            trigger = np.select([w < oversold, w > overbought], [1, -1], 0)
+
+        return {'value': williams_r, 'trigger': trigger, 'williams_r': williams_r}
+
+    def stream(self, **params):
+        return WilliamsRStream(int(params.get('period', 14)), float(params.get('overbought', -20)),
+                               float(params.get('oversold', -80)))
+
+    def warmup(self, **params):
+        return int(params.get('period', 14))
+
+class WilliamsRStream(SignalStream):
+    def __init__(self, period: int, overbought: float, oversold: float):
+        self.low = RollingExtreme(period, 'min')
+        self.high = RollingExtreme(period, 'max')
+        self.overbought, self.oversold = overbought, oversold
+
+    def update(self, candle):
+        ll, hh = self.low.update(candle['low']), self.high.update(candle['high'])
+        w = -100 * div(hh - candle['close'], hh - ll)
+        return w, 1 if w < self.oversold else -1 if w > self.overbought else 0
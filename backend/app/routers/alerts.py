@@ -2,30 +2,48 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.db import get_db
-from typing import List, Dict
+from app.models import Alert
+from app.services.alert_rules import RuleError, compile_rule
+from app.services.alerts import alert_engine
 import uuid
 
 router = APIRouter()
 
-ALERTS: Dict[str, Dict] = {}
-
 class AlertCreate(BaseModel):
     symbol: str
     timeframe: str = "1h"
-    rule: str  # e.g., "rsi<30 and ema_cross_up"
+    rule: str  # e.g., "rsi<30 and ema_cross_up", "rsi(period=7) < 25 or macd_cross_up"
     webhook: str  # URL to POST when triggered
 
 @router.post("/")
 def create_alert(a: AlertCreate, db: Session = Depends(get_db)):
-    aid = str(uuid.uuid4())
-    ALERTS[aid] = a.model_dump()
-    return {"id": aid, "status": "created"}
+    try:
+        compile_rule(a.rule)
+    except RuleError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule: {e}")
+    row = Alert(id=str(uuid.uuid4()), symbol=a.symbol.upper(), timeframe=a.timeframe, rule=a.rule, webhook=a.webhook)
+    db.add(row); db.commit()
+    alert_engine.add(row)
+    return {"id": row.id, "status": "created"}
 
 @router.get("/")
-def list_alerts():
-    return ALERTS
+def list_alerts(db: Session = Depends(get_db)):
+    return {a.id: {"symbol": a.symbol, "timeframe": a.timeframe, "rule": a.rule, "webhook": a.webhook,
+                   "last_fired_ts": a.last_fired_ts.isoformat() if a.last_fired_ts else None}
+            for a in db.query(Alert).filter(Alert.is_active == True).all()}
+
+@router.get("/stats")
+def alert_stats():
+    return alert_engine.stats()
+
+@router.post("/evaluate")
+async def evaluate(symbol: str, timeframe: str = "1h"):
+    """Evaluate a topic now instead of waiting for the next ingested candle."""
+    fired = await alert_engine.process(symbol.upper(), timeframe, force=True)
+    return {"fired": fired}
 
 @router.delete("/{aid}")
-def delete_alert(aid: str):
-    ALERTS.pop(aid, None)
+def delete_alert(aid: str, db: Session = Depends(get_db)):
+    db.query(Alert).filter(Alert.id == aid).delete(); db.commit()
+    alert_engine.remove(aid)
     return {"status": "ok"}
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.db import Base, engine, get_db
 from app.models import Asset
 from app.schemas import AssetCreate, AssetResp
+from app.services.asset_registry import asset_registry
 from app.services.data_loader import ensure_assets
 
 router = APIRouter()
@@ -12,6 +13,7 @@ Base.metadata.create_all(bind=engine)
 def create_asset(payload: AssetCreate, db: Session = Depends(get_db)):
     a = Asset(**payload.model_dump())
     db.add(a); db.commit(); db.refresh(a)
+    asset_registry.invalidate()
     return AssetResp(
         id=a.id, 
         symbol=a.symbol, 
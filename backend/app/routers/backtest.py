@@ -1,15 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db import get_db
-from app.schemas import BacktestRequest
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas import BacktestRequest, SweepRequest
 from app.services.backtest import backtest
+from app.services.signal_engine import get_dataframe
+from app.services.sweep import SWEEPS, cancel_sweep, create_sweep, start_sweep
+from app.utils.workers import run_cpu_db
 
 router = APIRouter()
 
+# sweep routes are declared before /{symbol} so "sweeps" is not taken for a symbol
+@router.post("/sweeps")
+async def run_sweep(req: SweepRequest):
+    try:
+        start = datetime.fromisoformat(req.start) if req.start else None
+        end = datetime.fromisoformat(req.end) if req.end else None
+        df = await run_cpu_db(get_dataframe, req.symbol.upper(), req.timeframe, start=start, end=end)
+        if df.empty:
+            raise ValueError("No data to backtest")
+        job = create_sweep(req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals],
+                           mode=req.mode, samples=req.samples, seed=req.seed, rank_by=req.rank_by,
+                           initial_cash=req.initial_cash, fee_bps=req.fee_bps, workers=req.workers)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start_sweep(job, df)
+    return {"status": "started", "job_id": job.id, "combinations": len(job.combos)}
+
+@router.get("/sweeps")
+def list_sweeps():
+    return [{"id": j.id, "status": j.status, "symbol": j.symbol, "created_at": j.created_at.isoformat(),
+             "total": len(j.combos), "completed": j.completed} for j in SWEEPS.values()]
+
+@router.get("/sweeps/{job_id}")
+def sweep_status(job_id: str, top: int = Query(50, ge=1, le=10000)):
+    job = SWEEPS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Unknown sweep: {job_id}")
+    return job.snapshot(top)
+
+@router.delete("/sweeps/{job_id}")
+def stop_sweep(job_id: str):
+    if job_id not in SWEEPS:
+        raise HTTPException(status_code=404, detail=f"Unknown sweep: {job_id}")
+    return {"cancelled": cancel_sweep(job_id)}
+
 @router.post("/{symbol}")
-def run_backtest(req: BacktestRequest, db: Session = Depends(get_db)):
+async def run_backtest(req: BacktestRequest):
     try:
-        res = backtest(db, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals], initial_cash=req.initial_cash, fee_bps=req.fee_bps)
+        start = datetime.fromisoformat(req.start) if req.start else None
+        end = datetime.fromisoformat(req.end) if req.end else None
+        res = await run_cpu_db(backtest, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals], initial_cash=req.initial_cash, fee_bps=req.fee_bps, start=start, end=end)
         return res
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,31 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-import math, statistics
+from typing import List, Optional
 from app.db import get_db
-from app.models import Asset, PriceOHLCV
+from app.services.compare import compare_assets
+from app.services.screener import resolve_assets
 
 router = APIRouter()
 
-def _series(db, asset_id, timeframe, limit):
-    rows = (db.query(PriceOHLCV)
-        .filter(PriceOHLCV.asset_id==asset_id, PriceOHLCV.timeframe==timeframe)
-        .order_by(PriceOHLCV.ts.desc())
-        .limit(limit).all())
-    rows = list(reversed(rows))
-    if not rows: return []
-    return [r.close for r in rows]
+def _requested(symbols: Optional[List[str]]) -> List[str]:
+    return [s.strip().upper() for part in symbols or [] for s in part.split(",") if s.strip()]
+
+def _analyze(db: Session, symbols: Optional[List[str]], watchlist: bool, category: Optional[str],
+             timeframe: str, limit: int, benchmark: Optional[str], window: Optional[int] = None):
+    # the benchmark is loaded for beta even when it was not asked for
+    requested = _requested(symbols)
+    wanted = list(requested)
+    if wanted and benchmark and benchmark.upper() not in wanted:
+        wanted.append(benchmark.upper())
+    assets = resolve_assets(db, wanted or None, watchlist, category)
+    unknown = sorted(set(wanted) - {a.symbol for a in assets})
+    if unknown:
+        raise HTTPException(404, f"Unknown asset: {', '.join(unknown)}")
+    # keep the requested order for explicit symbols
+    if wanted:
+        assets.sort(key=lambda a: wanted.index(a.symbol))
+    try:
+        res = compare_assets(db, assets, timeframe, limit, benchmark.upper() if benchmark else None, window)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # an unrequested benchmark without data falls back to the default one
+    short = [s for s in res["missing"] if s in requested]
+    if short:
+        raise HTTPException(400, f"Not enough data for {short[0]}")
+    return res
 
 @router.get("")
-def compare(symbols: List[str] = Query(...), timeframe: str = "1h", limit: int = 500, db: Session = Depends(get_db)):
-    out = []
-    for s in symbols:
-        asset = db.query(Asset).filter(Asset.symbol==s.upper()).first()
-        if not asset: raise HTTPException(404, f"Unknown asset: {s}")
-        prices = _series(db, asset.id, timeframe, limit)
-        if len(prices) < 2: raise HTTPException(400, f"Not enough data for {s}")
-        rets = [(prices[i]/prices[i-1]-1.0) for i in range(1,len(prices))]
-        vol = statistics.pstdev(rets) if len(rets)>1 else 0.0
-        perf = prices[-1]/prices[0]-1.0
-        out.append({"symbol": s.upper(), "return": perf, "volatility": vol, "last": prices[-1]})
-    return out
+def compare(symbols: Optional[List[str]] = Query(None, description="Symbols, repeated or comma-separated; all active assets if omitted"),
+            timeframe: str = "1h", limit: int = Query(500, ge=2, le=20000), benchmark: Optional[str] = None,
+            watchlist: bool = False, category: Optional[str] = None, db: Session = Depends(get_db)):
+    rows = _analyze(db, symbols, watchlist, category, timeframe, limit, benchmark)["assets"]
+    requested = _requested(symbols)
+    return [r for r in rows if r["symbol"] in requested] if requested else rows
+
+@router.get("/correlation")
+def correlation(symbols: Optional[List[str]] = Query(None, description="Symbols, repeated or comma-separated; all active assets if omitted"),
+                timeframe: str = "1h", limit: int = Query(500, ge=2, le=20000), benchmark: Optional[str] = None,
+                window: Optional[int] = Query(None, ge=2, description="Rolling correlation window against the benchmark"),
+                watchlist: bool = False, category: Optional[str] = None, db: Session = Depends(get_db)):
+    return _analyze(db, symbols, watchlist, category, timeframe, limit, benchmark, window)
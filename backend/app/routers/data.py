@@ -1,38 +1,160 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db import get_db
-from app.schemas import BackfillRequest
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db, AsyncSessionLocal
+from app.schemas import BackfillRequest, BatchBackfillRequest
 from app.services.data_loader import backfill_prices, ensure_assets
-from app.models import Asset, PriceOHLCV
+from app.services.asset_registry import AssetRef, asset_registry
+from app.services.coverage import coverage_report
+from app.services.backfill_jobs import JOBS, create_job, start_job
+from app.services.portfolio import portfolio_cache
+from app.services.result_cache import result_cache
+from app.services.series_cache import series_cache
+from app.services.stream_state import stream_registry
+from app.services.ohlcv_format import (MEDIA_TYPES, columns_digest, encode_columns, etag, etag_matches,
+                                       frame_to_columns, negotiate, rows_to_columns)
+from app.services.ohlcv_archive import ohlcv_archive, stitch_tail
+from app.services.ohlcv_repo import ohlcv_fingerprint_select, ohlcv_select
+from app.services.ohlcv_storage import maintain_ohlcv
+from app.services.signal_store import maintain_signal_runs, signal_writer
+from app.services.rollup import load_rollup
 
 router = APIRouter()
 
+async def _asset(db: AsyncSession, symbol: str) -> AssetRef:
+    asset = await asset_registry.aget(db, symbol)
+    if not asset:
+        raise HTTPException(status_code=404, detail=f"Unknown asset: {symbol}")
+    return asset
+
 @router.post("/backfill")
-async def backfill(req: BackfillRequest, db: Session = Depends(get_db)):
-    ensure_assets(db)
+async def backfill(req: BackfillRequest, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(ensure_assets)
     try:
-        res = await backfill_prices(db, req.symbol.upper(), req.timeframe, req.days)
+        res = await backfill_prices(db, req.symbol.upper(), req.timeframe, req.days, incremental=req.incremental)
         return {"status": "ok", **res}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/backfill/batch")
+async def backfill_batch(req: BatchBackfillRequest, db: AsyncSession = Depends(get_async_db)):
+    await db.run_sync(ensure_assets)
+    if req.symbols:
+        symbols = [s.upper() for s in req.symbols]
+    else:
+        symbols = [a.symbol for a in asset_registry.active(await asset_registry.aall(db)) if a.binance_symbol]
+    job = create_job(symbols, req.timeframes, req.days, req.incremental, req.concurrency)
+    start_job(job, AsyncSessionLocal)
+    return {"status": "started", "job_id": job.id, "tasks": len(job.tasks)}
+
+@router.get("/backfill/jobs")
+def list_backfill_jobs():
+    return [{"id": j.id, "status": j.status, "created_at": j.created_at.isoformat(), "tasks": len(j.tasks)}
+            for j in JOBS.values()]
+
+@router.get("/backfill/jobs/{job_id}")
+def backfill_job_status(job_id: str):
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.snapshot()
+
+@router.get("/coverage")
+async def coverage(
+    symbol: str = Query(..., description="Asset symbol, e.g., BTC"),
+    timeframe: str = Query("1h"),
+    days: int = Query(90, ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    asset = await _asset(db, symbol)
+    try:
+        return {"symbol": asset.symbol, **await db.run_sync(coverage_report, asset.id, timeframe, days)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _ohlcv_response(content, fmt: str, tag: Optional[str]) -> Response:
+    headers = {"Vary": "Accept"}
+    if tag is not None:
+        headers["ETag"] = tag
+    if fmt == "json":
+        return JSONResponse(content, headers=headers)
+    return Response(content, media_type=MEDIA_TYPES[fmt], headers=headers)
+
 @router.get("/ohlcv")
-def get_ohlcv(
+async def get_ohlcv(
+    request: Request,
     symbol: str = Query(..., description="Asset symbol, e.g., BTC"),
     timeframe: str = Query("1h"),
     limit: int = Query(500, ge=1, le=5000),
-    db: Session = Depends(get_db)
+    rollup: bool = Query(False, description="Aggregate from a finer stored timeframe even if candles are stored"),
+    fmt: Optional[str] = Query(None, alias="format", description="json (rows), columns, arrow or binary; default from Accept"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    asset = db.query(Asset).filter(Asset.symbol==symbol.upper()).first()
-    if not asset:
-        raise HTTPException(status_code=404, detail=f"Unknown asset: {symbol}")
-    q = db.query(PriceOHLCV).filter(PriceOHLCV.asset_id==asset.id, PriceOHLCV.timeframe==timeframe)        .order_by(PriceOHLCV.ts.desc()).limit(limit)
-    rows = list(reversed(q.all()))
-    return [{
-        "ts": r.ts.isoformat(),
-        "open": r.open, "high": r.high, "low": r.low, "close": r.close,
-        "volume": r.volume, "source": r.source
-    } for r in rows]
+    try:
+        fmt = negotiate(fmt, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    asset = await _asset(db, symbol)
+    if_none_match = request.headers.get("if-none-match")
+    columns = ("ts", "open", "high", "low", "close", "volume", "source")
+    rows, cols, tag = [], None, None
+    if not rollup:
+        # version the stored window with one aggregate, so a matching If-None-Match skips loading it
+        fingerprint = (await db.execute(ohlcv_fingerprint_select(asset.id, timeframe, limit))).one()
+        archived = ohlcv_archive.version(asset.id, timeframe)
+        if fingerprint[0] or archived:
+            tag = etag(asset.id, timeframe, limit, fmt, *fingerprint, *archived)
+            if etag_matches(if_none_match, tag):
+                return Response(status_code=304, headers={"ETag": tag, "Vary": "Accept"})
+            rows = (await db.execute(ohlcv_select(asset.id, timeframe, columns, limit=limit))).all()
+            rows.reverse()
+            if archived:
+                rows = await asyncio.to_thread(stitch_tail, asset.id, timeframe, [tuple(r) for r in rows], limit)
+            if fmt != "json":
+                cols = rows_to_columns(rows)
+    if tag is None:
+        try:
+            df = await db.run_sync(load_rollup, asset.id, timeframe, limit)
+        except ValueError as e:
+            if rollup:
+                raise HTTPException(status_code=400, detail=str(e))
+            df = None
+        if df is not None:
+            cols = frame_to_columns(df)
+            tag = etag(asset.id, timeframe, limit, fmt, "rollup", columns_digest(cols))
+            if etag_matches(if_none_match, tag):
+                return Response(status_code=304, headers={"ETag": tag, "Vary": "Accept"})
+            rows = [(ts, o, h, l, c, v, "rollup") for ts, o, h, l, c, v in
+                    zip(df["ts"].tolist(), df["open"], df["high"], df["low"], df["close"], df["volume"])]
+        elif fmt != "json":
+            cols = rows_to_columns([])
+    if fmt != "json":
+        try:
+            return _ohlcv_response(encode_columns(cols, fmt, asset.symbol, timeframe), fmt, tag)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return _ohlcv_response([{
+        "ts": ts.isoformat(),
+        "open": o, "high": h, "low": l, "close": c,
+        "volume": v, "source": src
+    } for ts, o, h, l, c, v, src in rows], fmt, tag)
+
+@router.get("/cache")
+def cache_stats():
+    return {**series_cache.stats(), "signal_state": stream_registry.stats(), "portfolio": portfolio_cache.stats(),
+            "assets": asset_registry.stats(), "archive": ohlcv_archive.stats(),
+            "signal_writer": signal_writer.stats(), "results": result_cache.stats()}
+
+@router.post("/maintenance")
+async def storage_maintenance(db: AsyncSession = Depends(get_async_db)):
+    try:
+        report = await db.run_sync(maintain_ohlcv)
+        report["signal_runs"] = await db.run_sync(maintain_signal_runs)
+        return report
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/timeframes")
 def list_timeframes():
@@ -1,16 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db import get_db
+from fastapi import APIRouter, HTTPException
 from app.schemas import DecisionRequest
 from app.services.decision_engine import decide
+from app.utils.workers import run_cpu_db
 
 router = APIRouter()
 
 @router.post("/{symbol}")
-def decision(req: DecisionRequest, db: Session = Depends(get_db)):
+async def decision(req: DecisionRequest):
     try:
         weights = req.weights.model_dump() if req.weights else None
-        res = decide(db, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals], weights=weights)
+        res = await run_cpu_db(decide, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals], weights=weights)
         return res
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,23 +1,50 @@
-from fastapi import APIRouter, Depends, Response, HTTPException
-from sqlalchemy.orm import Session
-from io import StringIO
-import csv
-from app.db import get_db
-from app.models import Asset, PriceOHLCV
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import get_async_db, AsyncSessionLocal
+from app.services.asset_registry import asset_registry
+from app.services.export import (ROW_COLUMNS, ExportError, check_export, encode_export, export_batches,
+                                 filename, media_type)
 
 router = APIRouter()
 
+async def _assets(db: AsyncSession, symbols: List[str]):
+    wanted = list(dict.fromkeys(s.strip().upper() for part in symbols for s in part.split(",") if s.strip()))
+    found = {s: await asset_registry.aget(db, s) for s in wanted}
+    missing = [s for s, a in found.items() if a is None]
+    if missing:
+        raise HTTPException(404, f"Unknown asset: {', '.join(missing)}")
+    return [(found[s].id, s) for s in wanted]
+
+def _stream(batches, columns, fmt: str, compression: str, stem: str) -> StreamingResponse:
+    # the generator opens its own session: the request's session is closed before the body is sent
+    return StreamingResponse(encode_export(batches, columns, fmt, compression), media_type=media_type(fmt, compression),
+                             headers={"Content-Disposition": f'attachment; filename="{filename(stem, fmt, compression)}"'})
+
 @router.get("/ohlcv.csv")
-def ohlcv_csv(symbol: str, timeframe: str = "1h", limit: int = 1000, db: Session = Depends(get_db)):
-    asset = db.query(Asset).filter(Asset.symbol==symbol.upper()).first()
-    if not asset: raise HTTPException(404, f"Unknown asset: {symbol}")
-    rows = (db.query(PriceOHLCV)
-        .filter(PriceOHLCV.asset_id==asset.id, PriceOHLCV.timeframe==timeframe)
-        .order_by(PriceOHLCV.ts.desc()).limit(limit).all())
-    rows = list(reversed(rows))
-    sio = StringIO()
-    w = csv.writer(sio)
-    w.writerow(["ts","open","high","low","close","volume","source"])
-    for r in rows:
-        w.writerow([r.ts.isoformat(), r.open, r.high, r.low, r.close, r.volume, r.source])
-    return Response(content=sio.getvalue(), media_type="text/csv")
+async def ohlcv_csv(symbol: str, timeframe: str = "1h", limit: int = 1000, db: AsyncSession = Depends(get_async_db)):
+    assets = await _assets(db, [symbol])
+    batches = export_batches(AsyncSessionLocal, assets, timeframe, limit=limit, with_symbol=False)
+    return _stream(batches, ROW_COLUMNS, "csv", "none", f"{assets[0][1]}_{timeframe}")
+
+@router.get("/ohlcv")
+async def ohlcv_export(
+    symbols: List[str] = Query(..., description="Symbols, repeated or comma-separated"),
+    timeframe: str = "1h",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Newest candles per symbol within the range"),
+    fmt: str = Query("csv", alias="format"),
+    compression: str = "none",
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        check_export(fmt, compression)
+    except ExportError as e:
+        raise HTTPException(400, str(e))
+    assets = await _assets(db, symbols)
+    batches = export_batches(AsyncSessionLocal, assets, timeframe, start, end, limit)
+    stem = f"ohlcv_{'_'.join(s for _, s in assets) if len(assets) <= 5 else f'{len(assets)}_symbols'}_{timeframe}"
+    return _stream(batches, ("symbol", *ROW_COLUMNS), fmt, compression, stem)
@@ -1,15 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db import get_db
-from app.schemas import SignalRequest
-from app.services.signal_engine import run_signals
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.schemas import ScreenerRequest, SignalRequest
+from app.services.asset_registry import asset_registry
+from app.services.screener import resolve_assets, screen
+from app.services.signal_engine import SIGNAL_IMPLS, run_signals
+from app.services.signal_store import latest_states, signal_writer
+from app.utils.workers import run_cpu_db
 
 router = APIRouter()
 
+# declared before /{symbol} so "screener" is not taken for a symbol
+def _screen(db, req: ScreenerRequest):
+    assets = resolve_assets(db, req.symbols, req.watchlist, req.category)
+    return screen(db, assets, req.timeframe, [s.model_dump() for s in req.signals], req.lookback)
+
+@router.post("/screener")
+async def screener(req: ScreenerRequest):
+    unknown = [s.name for s in req.signals if s.name not in SIGNAL_IMPLS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown signals: {unknown}")
+    try:
+        return await run_cpu_db(_screen, req)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _latest(db, timeframe: Optional[str], names: List[str]):
+    # results submitted just before this request are still in the writer's buffer
+    signal_writer.flush()
+    symbols = {a.id: a.symbol for a in asset_registry.all(db).values()}
+    return [{"symbol": symbols.get(r.asset_id), "timeframe": r.timeframe, "name": r.name,
+             "ts": r.ts, "value": r.value, "trigger": r.trigger}
+            for r in latest_states(db, timeframe, names)]
+
+@router.get("/latest")
+async def latest(timeframe: Optional[str] = None,
+                 names: Optional[List[str]] = Query(None, description="Signal names, repeated or comma-separated")):
+    wanted = [n.strip() for part in names or [] for n in part.split(",") if n.strip()]
+    return await run_cpu_db(_latest, timeframe, wanted)
+
 @router.post("/{symbol}")
-def run(req: SignalRequest, db: Session = Depends(get_db)):
+async def run(req: SignalRequest):
     try:
-        res = run_signals(db, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals])
+        res = await run_cpu_db(run_signals, req.symbol.upper(), req.timeframe, [s.model_dump() for s in req.signals])
         return res
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
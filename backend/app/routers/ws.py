@@ -1,26 +1,67 @@
+from typing import List, Optional
 from fastapi import APIRouter, WebSocket
-from sqlalchemy.orm import Session
-from app.db import SessionLocal
-from app.models import Asset, PriceOHLCV
+from app.core.config import settings
+from app.services.price_hub import Subscriber, price_hub
 import asyncio
 
 router = APIRouter()
 
+def _topics(symbols, timeframe: str):
+    return [(s.strip().upper(), timeframe) for s in symbols if s and s.strip()]
+
+def _valid(msg) -> bool:
+    # a subscription message is an object with a list of symbol strings
+    return (isinstance(msg, dict) and isinstance(msg.get("symbols") or [], list)
+            and all(isinstance(s, str) for s in msg.get("symbols") or [])
+            and isinstance(msg.get("timeframe", ""), str))
+
+async def _sender(ws: WebSocket, sub: Subscriber):
+    while True:
+        for msg in await sub.next_batch():
+            # a client that stops reading entirely is dropped instead of stalling the hub
+            await asyncio.wait_for(ws.send_json(msg), settings.WS_SEND_TIMEOUT)
+
 @router.websocket("/ws/last_price")
-async def last_price(ws: WebSocket, symbol: str, timeframe: str = "1h"):
+async def last_price(ws: WebSocket, symbol: Optional[str] = None, symbols: Optional[str] = None,
+                     timeframe: str = "1h"):
+    """Push the last close of each subscribed symbol whenever it changes.
+
+    Subscribe with ?symbol=BTC or ?symbols=BTC,ETH, and later with
+    {"action": "subscribe" | "unsubscribe", "symbols": [...], "timeframe": "1h"} messages;
+    any other message is answered with an {"error": ...} frame.
+    """
     await ws.accept()
-    db: Session = SessionLocal()
+    sub = Subscriber()
+    sender = receiver = None
     try:
+        initial: List[str] = [symbol] if symbol else []
+        initial += symbols.split(",") if symbols else []
+        await price_hub.subscribe(sub, _topics(initial, timeframe))
+        sender = asyncio.create_task(_sender(ws, sub))
+        receiver = asyncio.create_task(ws.receive_json())
         while True:
-            asset = db.query(Asset).filter(Asset.symbol==symbol.upper()).first()
-            last = None
-            if asset:
-                last = db.query(PriceOHLCV).filter(PriceOHLCV.asset_id==asset.id, PriceOHLCV.timeframe==timeframe).order_by(PriceOHLCV.ts.desc()).first()
-            price = last.close if last else 0.0
-            await ws.send_json({"symbol": symbol.upper(), "timeframe": timeframe, "price": price})
-            await asyncio.sleep(2.0)
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if sender in done:
+                break
+            msg = receiver.result()
+            receiver = asyncio.create_task(ws.receive_json())
+            if not _valid(msg):
+                await ws.send_json({"error": 'expected {"action": "subscribe" | "unsubscribe", '
+                                             '"symbols": [...], "timeframe": "1h"}'})
+                continue
+            topics = _topics(msg.get("symbols") or [], msg.get("timeframe", timeframe))
+            if msg.get("action") == "unsubscribe":
+                price_hub.unsubscribe(sub, topics)
+            else:
+                await price_hub.subscribe(sub, topics)
     except Exception:
         pass
     finally:
-        await ws.close()
-        db.close()
+        price_hub.unsubscribe(sub)
+        for task in (sender, receiver):
+            if task is not None:
+                task.cancel()
+        try:
+            await ws.close()
+        except Exception:
+            pass
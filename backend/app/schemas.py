@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+import os
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Literal
+from app.core.config import settings
 
 class AssetCreate(BaseModel):
     symbol: str
@@ -19,6 +21,14 @@ class BackfillRequest(BaseModel):
     symbol: str
     timeframe: str = "1h"
     days: int = 90
+    incremental: bool = False  # only fetch candles missing from price_ohlcv
+
+class BatchBackfillRequest(BaseModel):
+    symbols: Optional[List[str]] = None  # defaults to every active asset with a Binance symbol
+    timeframes: List[str] = ["1h"]
+    days: int = Field(90, ge=1)
+    incremental: bool = False
+    concurrency: Optional[int] = Field(None, ge=1)
 
 class SignalConfig(BaseModel):
     name: str
@@ -29,6 +39,15 @@ class SignalRequest(BaseModel):
     timeframe: str = "1h"
     signals: List[SignalConfig]
 
+class ScreenerRequest(BaseModel):
+    # explicit symbols, the watchlist, or a category; all active assets when none is given
+    symbols: Optional[List[str]] = None
+    watchlist: bool = False
+    category: Optional[str] = None
+    timeframe: str = "1h"
+    signals: List[SignalConfig]
+    lookback: int = Field(500, ge=2, le=20000)  # newest candles loaded per asset
+
 class DecisionWeights(BaseModel):
     technical: float = 0.6
     onchain: float = 0.2
@@ -48,3 +67,22 @@ class BacktestRequest(BaseModel):
     end: Optional[str] = None
     initial_cash: float = 10000.0
     fee_bps: float = 10.0
+
+class SweepSignal(BaseModel):
+    name: str
+    # candidate values per param; single-element lists pin a param
+    params: Dict[str, List[float]] = {}
+
+class SweepRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    signals: List[SweepSignal]
+    mode: Literal["grid", "random"] = "grid"
+    samples: int = Field(100, ge=1, le=settings.SWEEP_MAX_COMBINATIONS)  # combinations drawn in random mode
+    seed: Optional[int] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    initial_cash: float = 10000.0
+    fee_bps: float = 10.0
+    rank_by: Literal["sharpe", "return", "final_equity", "max_drawdown"] = "sharpe"
+    workers: Optional[int] = Field(None, ge=1, le=os.cpu_count() or 1)
@@ -0,0 +1,177 @@
+import json
+import operator
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Tuple
+from app.services.signal_engine import SIGNAL_IMPLS
+
+# A signal instance a rule depends on: (name, canonical params json)
+SignalKey = Tuple[str, str]
+# Evaluated inputs: candle fields by name, signals by key -> (value, trigger)
+Env = Dict
+
+CANDLE_FIELDS = {"open", "high", "low", "close", "volume"}
+# flag suffix -> trigger value it tests for
+FLAGS = {"buy": 1, "cross_up": 1, "sell": -1, "cross_down": -1}
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+       "==": operator.eq, "!=": operator.ne}
+
+_TOKEN = re.compile(r"\s*(?:(?P<num>-?\d+(?:\.\d+)?)|(?P<op><=|>=|==|!=|<|>|=)|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+                    r"|(?P<punct>[(),.]))")
+
+class RuleError(ValueError):
+    pass
+
+def signal_key(name: str, params: Dict) -> SignalKey:
+    return (name, json.dumps(params, sort_keys=True))
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A parsed rule: `predicate(env)` plus the signal instances it reads."""
+    source: str
+    signals: FrozenSet[SignalKey]
+    predicate: Callable[[Env], bool]
+
+    def __call__(self, env: Env) -> bool:
+        return self.predicate(env)
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise RuleError(f"Unexpected input at {pos}: {text[pos:pos + 10]!r}")
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+    return tokens
+
+class _Parser:
+    """Recursive descent over:
+
+        expr    := and ("or" and)*
+        and     := not ("and" not)*
+        not     := "not" not | "(" expr ")" | compare | flag
+        compare := operand OP operand
+        operand := number | candle field | signal ["(" k=v, ... ")"] ["." ("value" | "trigger")]
+        flag    := signal_("buy" | "sell" | "cross_up" | "cross_down") ["(" k=v, ... ")"]
+    """
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.i = 0
+        self.signals = set()
+
+    def peek(self, ahead: int = 0):
+        j = self.i + ahead
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        tok = self.peek()
+        if tok[0] is None or (value is not None and tok[1] != value):
+            raise RuleError(f"Expected {value or 'more input'}, got {tok[1]!r}")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        node = self.expr()
+        if self.peek()[0] is not None:
+            raise RuleError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def expr(self):
+        terms = [self.conj()]
+        while self.peek() == ("name", "or"):
+            self.take()
+            terms.append(self.conj())
+        return terms[0] if len(terms) == 1 else (lambda env: any(t(env) for t in terms))
+
+    def conj(self):
+        terms = [self.neg()]
+        while self.peek() == ("name", "and"):
+            self.take()
+            terms.append(self.neg())
+        return terms[0] if len(terms) == 1 else (lambda env: all(t(env) for t in terms))
+
+    def neg(self):
+        if self.peek() == ("name", "not"):
+            self.take()
+            inner = self.neg()
+            return lambda env: not inner(env)
+        if self.peek() == ("punct", "("):
+            self.take()
+            node = self.expr()
+            self.take(")")
+            return node
+        flag = self.flag()
+        if flag is not None:
+            return flag
+        left = self.operand()
+        kind, op = self.take()
+        if kind != "op":
+            raise RuleError(f"Expected a comparison after operand, got {op!r}")
+        fn = OPS["==" if op == "=" else op]
+        right = self.operand()
+        # NaN (indicator still warming up) compares false, so such rules simply don't fire
+        return lambda env: fn(left(env), right(env))
+
+    def params(self) -> Dict:
+        params = {}
+        if self.peek() != ("punct", "("):
+            return params
+        self.take()
+        while self.peek() != ("punct", ")"):
+            kind, key = self.take()
+            if kind != "name":
+                raise RuleError(f"Expected a parameter name, got {key!r}")
+            self.take("=")
+            kind, num = self.take()
+            if kind != "num":
+                raise RuleError(f"Parameter {key} needs a number, got {num!r}")
+            params[key] = float(num)
+            if self.peek() == ("punct", ","):
+                self.take()
+        self.take(")")
+        return params
+
+    def flag(self):
+        kind, name = self.peek()
+        if kind != "name":
+            return None
+        for suffix, want in FLAGS.items():
+            base = name[:-len(suffix) - 1]
+            if name.endswith("_" + suffix) and base in SIGNAL_IMPLS:
+                self.take()
+                key = signal_key(base, self.params())
+                self.signals.add(key)
+                return lambda env: env[key][1] == want
+        return None
+
+    def operand(self):
+        kind, tok = self.take()
+        if kind == "num":
+            num = float(tok)
+            return lambda env: num
+        if kind != "name":
+            raise RuleError(f"Expected an operand, got {tok!r}")
+        if tok in CANDLE_FIELDS:
+            return lambda env: env[tok]
+        if tok not in SIGNAL_IMPLS:
+            raise RuleError(f"Unknown signal or field: {tok}")
+        key = signal_key(tok, self.params())
+        self.signals.add(key)
+        idx = 0
+        if self.peek() == ("punct", "."):
+            self.take()
+            _, attr = self.take()
+            if attr not in ("value", "trigger"):
+                raise RuleError(f"Unknown attribute {attr!r}; use value or trigger")
+            idx = 0 if attr == "value" else 1
+        return lambda env: env[key][idx]
+
+def compile_rule(text: str) -> CompiledRule:
+    """Parse a rule such as ``rsi(period=7) < 30 and ema_cross_up`` once into a predicate."""
+    parser = _Parser(text)
+    predicate = parser.parse()
+    return CompiledRule(text, frozenset(parser.signals), predicate)
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from tenacity import AsyncRetrying, RetryError, stop_after_attempt, wait_exponential
+from app.core.config import settings
+from app.db import AsyncSessionLocal, SessionLocal
+from app.models import Alert
+from app.services.asset_registry import asset_registry
+from app.services.alert_rules import CANDLE_FIELDS, CompiledRule, compile_rule
+from app.services.series_cache import cached_ohlcv
+from app.services.signal_engine import latest_signals
+from app.utils.workers import run_cpu
+
+log = logging.getLogger(__name__)
+
+Topic = Tuple[str, str]  # (symbol, timeframe)
+
+@dataclass
+class ActiveAlert:
+    id: str
+    symbol: str
+    timeframe: str
+    webhook: str
+    rule: CompiledRule
+    last_fired_ts: Optional[datetime] = None
+
+@dataclass
+class Firing:
+    alert: ActiveAlert
+    ts: datetime
+    payload: Dict
+
+class WebhookDispatcher:
+    """POSTs alert payloads through one pooled client, retrying with exponential backoff.
+
+    Every delivery carries an Idempotency-Key of alert id and candle ts, so a receiver
+    can drop the duplicates that at-least-once retries may produce.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 attempts: int = 3, backoff: float = 0.5):
+        self.transport = transport
+        self.attempts = attempts
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sem = asyncio.Semaphore(settings.ALERT_WEBHOOK_CONCURRENCY)
+        self.delivered = 0
+        self.failed = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport, timeout=settings.ALERT_WEBHOOK_TIMEOUT,
+                limits=httpx.Limits(max_connections=settings.ALERT_WEBHOOK_CONCURRENCY))
+        return self._client
+
+    async def deliver(self, url: str, payload: Dict, key: str) -> bool:
+        async with self._sem:
+            try:
+                async for attempt in AsyncRetrying(stop=stop_after_attempt(self.attempts),
+                                                   wait=wait_exponential(multiplier=self.backoff)):
+                    with attempt:
+                        r = await self.client.post(url, json=payload, headers={"Idempotency-Key": key})
+                        r.raise_for_status()
+            except RetryError as e:
+                self.failed += 1
+                log.warning("Alert webhook %s failed after %d attempts: %s", url, self.attempts,
+                            e.last_attempt.exception())
+                return False
+        self.delivered += 1
+        return True
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class AlertEngine:
+    """Active alerts grouped by (symbol, timeframe), evaluated when that series changes.
+
+    Rules are compiled once when loaded or created. An evaluation loads the cached
+    series once and computes every signal instance referenced by any alert on the
+    topic once, advancing the incremental indicator state. It then runs each
+    alert's predicate over the shared values. An alert fires at most once per
+    candle: the candle ts is recorded after a successful delivery.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 async_session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+                 dispatcher: Optional[WebhookDispatcher] = None):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.dispatcher = dispatcher or WebhookDispatcher(attempts=settings.ALERT_WEBHOOK_RETRIES)
+        self._topics: Dict[Topic, Dict[str, ActiveAlert]] = defaultdict(dict)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._seen: Dict[Topic, Tuple[datetime, float]] = {}
+        self._inflight: Set[Tuple[str, datetime]] = set()
+        self._tasks: Dict[Topic, asyncio.Task] = {}
+        self._dirty: Set[Topic] = set()
+        self.evaluations = 0
+        self.signal_evaluations = 0
+        self.fired = 0
+
+    def _ensure_loaded(self, db: Session):
+        with self._lock:
+            if self._loaded:
+                return
+            for row in db.scalars(select(Alert).where(Alert.is_active == True)):
+                try:
+                    self._put(row)
+                except ValueError as e:
+                    log.warning("Skipping alert %s with invalid rule %r: %s", row.id, row.rule, e)
+            self._loaded = True
+
+    def _put(self, row: Alert):
+        alert = ActiveAlert(row.id, row.symbol, row.timeframe, row.webhook, compile_rule(row.rule), row.last_fired_ts)
+        self._topics[(row.symbol, row.timeframe)][row.id] = alert
+
+    def add(self, row: Alert):
+        with self._lock:
+            self._put(row)
+            self._seen.pop((row.symbol, row.timeframe), None)
+
+    def remove(self, alert_id: str):
+        with self._lock:
+            for topic, alerts in list(self._topics.items()):
+                if alerts.pop(alert_id, None) is not None and not alerts:
+                    del self._topics[topic]
+
+    def evaluate(self, db: Session, symbol: str, timeframe: str, force: bool = False) -> List[Firing]:
+        """Alerts on the topic whose rule holds on the newest candle and have not fired for it."""
+        self._ensure_loaded(db)
+        topic = (symbol, timeframe)
+        with self._lock:
+            alerts = list(self._topics.get(topic, {}).values())
+        if not alerts:
+            return []
+        asset = asset_registry.get(db, symbol)
+        if asset is None:
+            return []
+        df = cached_ohlcv(db, asset.id, timeframe)
+        if df.empty:
+            return []
+        last = df.iloc[-1]
+        ts = last["ts"].to_pydatetime()
+        if not force and self._seen.get(topic) == (ts, last["close"]):
+            return []
+        self._seen[topic] = (ts, last["close"])
+
+        keys = sorted(set().union(*(a.rule.signals for a in alerts)))
+        configs = [{"name": name, "params": json.loads(params)} for name, params in keys]
+        env = {f: float(last[f]) for f in CANDLE_FIELDS}
+        for key, (_, value, trigger) in zip(keys, latest_signals(asset.id, timeframe, df, configs)):
+            env[key] = (value, trigger)
+        self.evaluations += 1
+        self.signal_evaluations += len(keys)
+
+        firings = []
+        for alert in alerts:
+            if (alert.last_fired_ts is not None and alert.last_fired_ts >= ts) or (alert.id, ts) in self._inflight:
+                continue
+            if alert.rule(env):
+                self._inflight.add((alert.id, ts))
+                firings.append(Firing(alert, ts, {
+                    "alert_id": alert.id, "symbol": symbol, "timeframe": timeframe, "rule": alert.rule.source,
+                    "ts": ts.isoformat(), "close": env["close"],
+                    "signals": {f"{name}{params if params != '{}' else ''}": {"value": v, "trigger": t}
+                                for (name, params), (v, t) in ((k, env[k]) for k in keys)},
+                }))
+        return firings
+
+    async def _fire(self, firing: Firing) -> bool:
+        alert = firing.alert
+        ok = await self.dispatcher.deliver(alert.webhook, firing.payload, f"{alert.id}:{firing.ts.isoformat()}")
+        if ok:
+            alert.last_fired_ts = firing.ts
+        return ok
+
+    def _evaluate_in_session(self, symbol: str, timeframe: str, force: bool) -> List[Firing]:
+        db = self.session_factory()
+        try:
+            return self.evaluate(db, symbol, timeframe, force)
+        finally:
+            db.close()
+
+    async def process(self, symbol: str, timeframe: str, force: bool = False) -> int:
+        """Evaluate one topic off the event loop and deliver its firings; returns how many were delivered."""
+        firings = await run_cpu(self._evaluate_in_session, symbol, timeframe, force)
+        if not firings:
+            return 0
+        try:
+            results = await asyncio.gather(*[self._fire(f) for f in firings])
+            done = [f for f, ok in zip(firings, results) if ok]
+            if done:
+                # one bulk UPDATE by primary key for the whole topic
+                async with self.async_session_factory() as db:
+                    await db.execute(update(Alert), [{"id": f.alert.id, "last_fired_ts": f.ts} for f in done])
+                    await db.commit()
+            self.fired += len(done)
+            return len(done)
+        finally:
+            for f in firings:
+                self._inflight.discard((f.alert.id, f.ts))
+
+    def notify(self, symbol: str, timeframe: str):
+        """New candles landed for the topic. Runs at most one evaluation per topic at a time;
+        a notification during a run schedules exactly one follow-up."""
+        topic = (symbol, timeframe)
+        if topic in self._tasks:
+            self._dirty.add(topic)
+            return
+
+        async def run():
+            try:
+                while True:
+                    self._dirty.discard(topic)
+                    try:
+                        await self.process(symbol, timeframe)
+                    except Exception:
+                        log.exception("Alert evaluation failed for %s %s", symbol, timeframe)
+                    if topic not in self._dirty:
+                        break
+            finally:
+                self._tasks.pop(topic, None)
+
+        self._tasks[topic] = asyncio.create_task(run())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = sum(len(a) for a in self._topics.values())
+            topics = len(self._topics)
+        return {"active": active, "topics": topics, "evaluations": self.evaluations,
+                "signal_evaluations": self.signal_evaluations, "fired": self.fired,
+                "delivered": self.dispatcher.delivered, "failed": self.dispatcher.failed}
+
+alert_engine = AlertEngine()
@@ -0,0 +1,123 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Asset
+
+@dataclass(frozen=True)
+class AssetRef:
+    """The identifying fields of an asset, safe to share across sessions and threads."""
+    id: int
+    symbol: str
+    binance_symbol: Optional[str]
+    coingecko_id: Optional[str]
+    category: Optional[str]
+    market_cap_rank: Optional[int]
+    is_active: bool
+
+_COLUMNS = (Asset.id, Asset.symbol, Asset.binance_symbol, Asset.coingecko_id, Asset.category,
+            Asset.market_cap_rank, Asset.is_active)
+
+class AssetRegistry:
+    """Process-wide symbol -> AssetRef index, loaded with one query and shared by every request.
+
+    Asset writes in this process call `invalidate`; the index is also reloaded after
+    `ttl` seconds to pick up writes from other processes. A symbol missing from the
+    index is looked up once in the database, so an asset created elsewhere is found
+    immediately; unknown symbols are not cached. An index handed out is never
+    mutated, so it can be iterated while other threads add to the registry.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._by_symbol: Optional[Dict[str, AssetRef]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def _stale(self) -> bool:
+        return self._by_symbol is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _fill(self, rows, gen: int):
+        index = {r[1]: AssetRef(*r) for r in rows}
+        with self._lock:
+            self.loads += 1
+            # an invalidation while we were reading means the rows may be stale; use them once, don't keep them
+            if gen == self._generation:
+                self._by_symbol, self._loaded_at = index, time.monotonic()
+        return index
+
+    def _add(self, row) -> Optional[AssetRef]:
+        if row is None:
+            return None
+        ref = AssetRef(*row)
+        with self._lock:
+            # copy on write: callers may be iterating an index returned by `all`
+            if self._by_symbol is not None:
+                self._by_symbol = {**self._by_symbol, ref.symbol: ref}
+        return ref
+
+    def _lookup(self, index: Dict[str, AssetRef], symbol: str) -> Optional[AssetRef]:
+        ref = index.get(symbol)
+        with self._lock:
+            if ref is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return ref
+
+    def all(self, db: Session) -> Dict[str, AssetRef]:
+        if not self._stale():
+            return self._by_symbol
+        gen = self._generation
+        return self._fill(db.execute(select(*_COLUMNS)).all(), gen)
+
+    async def aall(self, db: AsyncSession) -> Dict[str, AssetRef]:
+        if not self._stale():
+            return self._by_symbol
+        gen = self._generation
+        return self._fill((await db.execute(select(*_COLUMNS))).all(), gen)
+
+    def get(self, db: Session, symbol: str) -> Optional[AssetRef]:
+        symbol = symbol.upper()
+        ref = self._lookup(self.all(db), symbol)
+        if ref is None:
+            ref = self._add(db.execute(select(*_COLUMNS).where(Asset.symbol == symbol)).first())
+        return ref
+
+    async def aget(self, db: AsyncSession, symbol: str) -> Optional[AssetRef]:
+        symbol = symbol.upper()
+        ref = self._lookup(await self.aall(db), symbol)
+        if ref is None:
+            ref = self._add((await db.execute(select(*_COLUMNS).where(Asset.symbol == symbol))).first())
+        return ref
+
+    def require(self, db: Session, symbol: str) -> AssetRef:
+        ref = self.get(db, symbol)
+        if ref is None:
+            raise ValueError(f"Unknown asset: {symbol}")
+        return ref
+
+    def active(self, index: Dict[str, AssetRef]) -> List[AssetRef]:
+        """Active assets by market cap rank (unranked last), like the asset listing endpoints."""
+        refs = [r for r in index.values() if r.is_active]
+        return sorted(refs, key=lambda r: (r.market_cap_rank is None, r.market_cap_rank or 0, r.symbol))
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._by_symbol = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"assets": len(self._by_symbol or {}), "hits": self.hits, "misses": self.misses,
+                    "loads": self.loads}
+
+asset_registry = AssetRegistry(settings.ASSET_REGISTRY_TTL)
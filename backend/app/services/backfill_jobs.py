@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.services.data_loader import backfill_prices
+from app.utils.rate_limit import WeightBudget
+
+@dataclass
+class TaskProgress:
+    symbol: str
+    timeframe: str
+    status: str = "pending"  # pending, running, done, error
+    pages: int = 0
+    fetched: int = 0
+    inserted: int = 0
+    source: Optional[str] = None
+    error: Optional[str] = None
+
+@dataclass
+class BackfillJob:
+    days: int
+    incremental: bool
+    concurrency: int
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"  # pending, running, done
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    weight_spent: int = 0
+    tasks: Dict[str, TaskProgress] = field(default_factory=dict)
+
+    def add(self, symbol: str, timeframe: str):
+        self.tasks[f"{symbol}:{timeframe}"] = TaskProgress(symbol, timeframe)
+
+    def snapshot(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for t in self.tasks.values():
+            counts[t.status] = counts.get(t.status, 0) + 1
+        return {
+            "id": self.id, "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "days": self.days, "incremental": self.incremental, "concurrency": self.concurrency,
+            "weight_spent": self.weight_spent, "counts": counts,
+            "tasks": [asdict(t) for t in self.tasks.values()],
+        }
+
+# Process-local registry so progress can be polled while a job runs
+JOBS: Dict[str, BackfillJob] = {}
+_RUNNING: Dict[str, asyncio.Task] = {}
+
+def create_job(symbols: List[str], timeframes: List[str], days: int, incremental: bool,
+               concurrency: Optional[int] = None) -> BackfillJob:
+    job = BackfillJob(days=days, incremental=incremental,
+                      concurrency=concurrency or settings.BACKFILL_CONCURRENCY)
+    for s in symbols:
+        for tf in timeframes:
+            job.add(s, tf)
+    JOBS[job.id] = job
+    return job
+
+async def _run_task(job: BackfillJob, task: TaskProgress, session_factory: Callable[[], AsyncSession],
+                    client: httpx.AsyncClient, budget: WeightBudget, sem: asyncio.Semaphore):
+    def on_page(n: int):
+        task.pages += 1
+        task.fetched += n
+
+    async with sem:
+        task.status = "running"
+        try:
+            async with session_factory() as db:
+                res = await backfill_prices(db, task.symbol, task.timeframe, job.days, incremental=job.incremental,
+                                            session=client, budget=budget, on_page=on_page)
+            task.inserted = res["inserted"]
+            task.source = res["source"]
+            task.status = "done"
+        except Exception as e:
+            task.status = "error"
+            task.error = str(e)
+        finally:
+            job.weight_spent = budget.spent
+
+async def run_job(job: BackfillJob, session_factory: Callable[[], AsyncSession],
+                  client: Optional[httpx.AsyncClient] = None, budget: Optional[WeightBudget] = None):
+    """Fan out every symbol/timeframe of the job over one shared HTTP client.
+
+    At most `job.concurrency` tasks run at once and all of them draw from the same
+    request-weight budget, so the job as a whole stays under the exchange limit.
+    """
+    budget = budget or WeightBudget(settings.BINANCE_WEIGHT_PER_MINUTE)
+    sem = asyncio.Semaphore(job.concurrency)
+    job.status = "running"
+    own_client = client is None
+    if own_client:
+        max_conn = job.concurrency * settings.BINANCE_PAGE_CONCURRENCY
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=max_conn))
+    try:
+        await asyncio.gather(*[
+            _run_task(job, t, session_factory, client, budget, sem) for t in job.tasks.values()
+        ])
+    finally:
+        if own_client:
+            await client.aclose()
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+    return job
+
+def start_job(job: BackfillJob, session_factory: Callable[[], AsyncSession]) -> asyncio.Task:
+    """Schedule the job on the running event loop and return immediately."""
+    task = asyncio.create_task(run_job(job, session_factory))
+    _RUNNING[job.id] = task
+    task.add_done_callback(lambda _: _RUNNING.pop(job.id, None))
+    return task
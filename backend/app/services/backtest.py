@@ -1,32 +1,60 @@
-from app.services.signal_engine import get_dataframe, _load_class, SIGNAL_IMPLS
+from typing import Dict, Optional
+import numpy as np
+from app.services.signal_engine import get_dataframe, evaluate_signals
+from app.utils.timeframes import TIMEFRAME_MS
 
-def backtest(db, symbol: str, timeframe: str, configs, initial_cash=10000.0, fee_bps=10.0):
-    df = get_dataframe(db, symbol, timeframe)
+YEAR_MS = 365 * 24 * 3600 * 1000
+
+def simulate(close: np.ndarray, agg: np.ndarray, initial_cash: float = 10000.0, fee_bps: float = 10.0,
+             periods_per_year: Optional[float] = None) -> Dict:
+    """Long/flat simulation over aligned close and aggregated-trigger arrays.
+
+    The position is 1 while agg > 0. Entries and exits fill at that candle's close
+    and pay fee_bps each. Between candles, equity grows by close[t] / close[t-1]
+    while the previous candle was long. Each candle multiplies equity by a factor,
+    so the curve is a single cumulative product.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    pos = (np.asarray(agg) > 0).astype(np.int8)
+    pos_prev = np.concatenate(([0], pos[:-1]))
+    trade = pos - pos_prev
+    fee = fee_bps / 10000.0
+    growth = np.ones_like(close)
+    np.divide(close[1:], close[:-1], out=growth[1:], where=(pos_prev[1:] == 1) & (close[:-1] != 0))
+    growth *= np.where(trade != 0, 1.0 - fee, 1.0)
+    equity = initial_cash * np.cumprod(growth)
+
+    peak = np.maximum.accumulate(equity)
+    max_drawdown = float(np.max(1.0 - equity / peak)) if len(equity) else 0.0
+    sharpe = 0.0
+    if len(equity) > 2:
+        rets = growth[1:] - 1.0
+        std = rets.std(ddof=1)
+        if std > 0:
+            sharpe = float(rets.mean() / std * np.sqrt(periods_per_year or 1.0))
+    final = float(equity[-1]) if len(equity) else float(initial_cash)
+    return {
+        "final_equity": final,
+        "return": final / initial_cash - 1.0,
+        "trades": int(np.abs(trade).sum()),
+        "max_drawdown": max_drawdown,
+        "sharpe": sharpe,
+        "equity": equity,
+    }
+
+def backtest(db, symbol: str, timeframe: str, configs, initial_cash=10000.0, fee_bps=10.0, start=None, end=None):
+    df = get_dataframe(db, symbol, timeframe, start=start, end=end)
     if df.empty:
         raise ValueError("No data to backtest")
-    full = df.copy()
-    sets = []
-    for cfg in configs:
-        impl = _load_class(SIGNAL_IMPLS[cfg["name"]])
-        out = impl.compute(df.copy(), **(cfg.get("params") or {}))
-        out = out[["ts","trigger"]].rename(columns={"trigger": f"t_{cfg['name']}"})
-        sets.append(out)
-    for t in sets:
-        full = full.merge(t, on="ts", how="left")
-    trig_cols = [c for c in full.columns if c.startswith("t_")]
-    for c in trig_cols:
-        full[c] = full[c].fillna(0)
-    full["agg"] = full[trig_cols].sum(axis=1)
-    full["pos"] = (full["agg"] > 0).astype(int)
-    full["pos_prev"] = full["pos"].shift(1).fillna(0)
-    full["trade"] = full["pos"] - full["pos_prev"]
-    cash = initial_cash; coin = 0.0; fee = fee_bps/10000.0
-    for _, row in full.iterrows():
-        price = row["close"]
-        if row["trade"] == 1:
-            amt = cash * (1 - fee) / price; coin += amt; cash = 0.0
-        elif row["trade"] == -1 and coin > 0:
-            proceeds = coin * price * (1 - fee); cash += proceeds; coin = 0.0
-    equity = cash + coin * full.iloc[-1]["close"]
-    ret = (equity / initial_cash) - 1.0
-    return {"final_equity": equity, "return": ret, "trades": int(full["trade"].abs().sum())}
+    # triggers come back aligned with df rows, so they are summed by position instead of merged on ts
+    triggers = [t for _, _, t in evaluate_signals(df, configs)]
+    agg = np.sum(triggers, axis=0) if triggers else np.zeros(len(df), dtype=np.int64)
+    step_ms = TIMEFRAME_MS.get(timeframe)
+    res = simulate(df["close"].to_numpy(), agg, initial_cash, fee_bps,
+                   periods_per_year=YEAR_MS / step_ms if step_ms else None)
+    equity = res.pop("equity")
+    res["equity_curve"] = {
+        "ts": df["ts"].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist(),
+        "equity": equity.tolist(),
+    }
+    return res
@@ -0,0 +1,127 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.services.asset_registry import AssetRef
+from app.services.backtest import YEAR_MS
+from app.services.ohlcv_archive import load_close_matrix
+from app.utils.timeframes import timeframe_ms
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _iso(ms: np.ndarray) -> List[str]:
+    return [(_EPOCH + timedelta(milliseconds=t)).isoformat() for t in ms.tolist()]
+
+def _clean(a: np.ndarray):
+    """NaN -> None for JSON, on arrays of any rank."""
+    if a.ndim == 0:
+        v = float(a)
+        return None if math.isnan(v) else v
+    return [_clean(x) for x in a] if a.ndim > 1 else [None if v != v else v for v in a.tolist()]
+
+def forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Carry each column's last close over timestamps it has no candle for (leading NaN stays)."""
+    valid = ~np.isnan(prices)
+    idx = np.where(valid, np.arange(len(prices))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return prices[idx, np.arange(prices.shape[1])]
+
+def pairwise_cov_corr(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Covariance and correlation of every column pair over the rows where both are present.
+
+    Each statistic is a matrix product over the validity mask, so N assets cost a few
+    T x N x N BLAS calls instead of N^2 pandas alignments. Returns (cov, corr, var)
+    where var[i, j] is the variance of column i over the rows shared with column j.
+    """
+    valid = ~np.isnan(returns)
+    mask = valid.astype(np.float64)
+    # centering first keeps the sums small, so the one-pass formulas stay accurate
+    x = np.where(valid, returns - np.nanmean(returns, axis=0), 0.0)
+    n = mask.T @ mask
+    sx = x.T @ mask
+    sxx = (x * x).T @ mask
+    sxy = x.T @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+        var = (sxx - sx * sx / n) / (n - 1)
+        corr = cov / np.sqrt(var * var.T)
+    few = n < 2
+    cov[few] = corr[few] = var[few] = np.nan
+    return cov, np.clip(corr, -1.0, 1.0), var
+
+def rolling_correlation(returns: np.ndarray, target: np.ndarray, window: int) -> np.ndarray:
+    """Correlation of each column with `target` over trailing windows, via cumulative sums.
+
+    Row k covers returns[k : k + window]; windows where fewer than half the rows
+    have both values are NaN.
+    """
+    valid = ~np.isnan(returns) & ~np.isnan(target)[:, None]
+    x = np.where(valid, returns - np.nanmean(returns, axis=0), 0.0)
+    y = np.where(valid, (target - np.nanmean(target))[:, None], 0.0)
+
+    def window_sum(a):
+        c = np.concatenate([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+        return c[window:] - c[:-window]
+
+    n = window_sum(valid.astype(np.float64))
+    sx, sy = window_sum(x), window_sum(y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = window_sum(x * y) - sx * sy / n
+        corr = cov / np.sqrt((window_sum(x * x) - sx * sx / n) * (window_sum(y * y) - sy * sy / n))
+    corr[n < max(2, window // 2)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+def compare_assets(db: Session, assets: List[AssetRef], timeframe: str, limit: int = 500,
+                   benchmark: Optional[str] = None, window: Optional[int] = None) -> Dict:
+    """Returns, volatility, beta and correlation/covariance of many assets from one bulk load.
+
+    The newest `limit` closes of every asset are aligned on their shared timestamp index
+    and forward-filled over gaps; per-period simple returns feed every statistic. Beta
+    is against `benchmark` (BTC, else the first asset, by default). `window` adds a
+    rolling correlation of every asset against the benchmark. Assets with fewer
+    than two candles are reported under `missing`.
+    """
+    ts, prices = load_close_matrix(db, [a.id for a in assets], timeframe, limit)
+    counts = (~np.isnan(prices)).sum(axis=0) if len(ts) else np.zeros(len(assets), dtype=int)
+    keep = np.flatnonzero(counts >= 2)
+    ready = [assets[i] for i in keep]
+    symbols = [a.symbol for a in ready]
+    out = {"timeframe": timeframe, "symbols": symbols, "missing": [a.symbol for a in assets if a not in ready]}
+    if not ready:
+        return {**out, "benchmark": None, "candles": 0, "assets": [], "correlation": [], "covariance": []}
+    prices, counts = prices[:, keep], counts[keep]
+    # drop timestamps only the excluded assets had
+    rows = ~np.all(np.isnan(prices), axis=1)
+    ts, prices = ts[rows], prices[rows]
+
+    filled = forward_fill(prices)
+    returns = filled[1:] / filled[:-1] - 1.0
+    cov, corr, var = pairwise_cov_corr(returns)
+    b = symbols.index(benchmark) if benchmark in symbols else symbols.index("BTC") if "BTC" in symbols else 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = cov[:, b] / var[b, :]
+
+    valid = ~np.isnan(prices)
+    first = valid.argmax(axis=0)
+    last = len(prices) - 1 - valid[::-1].argmax(axis=0)
+    cols = np.arange(len(ready))
+    first_close, last_close = prices[first, cols], prices[last, cols]
+    vol = np.nanstd(returns, axis=0)
+    per_year = math.sqrt(YEAR_MS / timeframe_ms(timeframe))
+    out.update({
+        "benchmark": symbols[b],
+        "candles": len(ts),
+        "start": _iso(ts[:1])[0],
+        "end": _iso(ts[-1:])[0],
+        "assets": [{"symbol": s, "last": float(lc), "return": float(lc / fc - 1.0), "volatility": float(v),
+                    "volatility_annual": float(v * per_year), "beta": _clean(be), "candles": int(n)}
+                   for s, fc, lc, v, be, n in zip(symbols, first_close, last_close, vol, beta, counts)],
+        "correlation": _clean(corr),
+        "covariance": _clean(cov),
+    })
+    if window:
+        rolling = rolling_correlation(returns, returns[:, b], window)
+        out["rolling_correlation"] = {"window": window, "ts": _iso(ts[window:]),
+                                      "values": dict(zip(symbols, _clean(rolling.T)))}
+    return out
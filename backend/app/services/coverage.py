@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.services.ohlcv_archive import ohlcv_archive
+from app.services.ohlcv_repo import ohlcv_select
+from app.services.ohlcv_storage import retention_cutoff
+from app.utils.timeframes import TIMEFRAME_MS
+
+def _ms(dt: datetime) -> int:
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def _dt(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+def stored_open_times(db: Session, asset_id: int, timeframe: str, start_ms: int, end_ms: int) -> np.ndarray:
+    """Sorted open times (epoch ms) already stored for the window, in the database or the archive."""
+    ts = db.execute(ohlcv_select(asset_id, timeframe, ("ts",), _dt(start_ms), _dt(end_ms))).scalars().all()
+    stored = np.array([_ms(t) for t in ts if _ms(t) < end_ms], dtype=np.int64)
+    if not ohlcv_archive.enabled:
+        return stored
+    archived = ohlcv_archive.read(asset_id, timeframe, start_ms, end_ms)[0].astype(np.int64)
+    return np.union1d(archived, stored)
+
+def find_gaps(open_ms: np.ndarray, start_ms: int, end_ms: int, step_ms: int) -> List[Tuple[int, int]]:
+    """Missing [start, end) ranges given sorted candle open times.
+
+    The trailing range always starts at the last stored candle so a candle that was
+    still forming when it was stored gets refreshed.
+    """
+    if open_ms.size == 0:
+        return [(start_ms, end_ms)]
+    gaps = []
+    if open_ms[0] - start_ms >= step_ms:
+        gaps.append((start_ms, int(open_ms[0])))
+    holes = np.flatnonzero(np.diff(open_ms) > step_ms)
+    gaps.extend((int(open_ms[i]) + step_ms, int(open_ms[i + 1])) for i in holes)
+    gaps.append((int(open_ms[-1]), end_ms))
+    return gaps
+
+def missing_ranges(db: Session, asset_id: int, timeframe: str, days: int) -> Tuple[np.ndarray, List[Tuple[int, int]], int, int]:
+    step = TIMEFRAME_MS.get(timeframe)
+    if not step:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    now = datetime.utcnow()
+    end_ms = _ms(now)
+    start_ms = end_ms - days * 86_400_000
+    # candles past retention are pruned on purpose; they are not gaps to backfill
+    cutoff = retention_cutoff(timeframe, now)
+    if cutoff is not None:
+        start_ms = min(max(start_ms, _ms(cutoff)), end_ms)
+    open_ms = stored_open_times(db, asset_id, timeframe, start_ms, end_ms)
+    return open_ms, find_gaps(open_ms, start_ms, end_ms, step), start_ms, end_ms
+
+def coverage_report(db: Session, asset_id: int, timeframe: str, days: int) -> Dict:
+    open_ms, gaps, start_ms, end_ms = missing_ranges(db, asset_id, timeframe, days)
+    step = TIMEFRAME_MS[timeframe]
+    return {
+        "timeframe": timeframe,
+        "start": _dt(start_ms).isoformat(),
+        "end": _dt(end_ms).isoformat(),
+        "first": _dt(int(open_ms[0])).isoformat() if open_ms.size else None,
+        "last": _dt(int(open_ms[-1])).isoformat() if open_ms.size else None,
+        "candles": int(open_ms.size),
+        "expected": (end_ms - start_ms) // step,
+        "gaps": [{
+            "start": _dt(a).isoformat(), "end": _dt(b).isoformat(),
+            "candles": max(1, -(-(b - a) // step)),
+        } for a, b in gaps],
+    }
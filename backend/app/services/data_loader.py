@@ -1,7 +1,21 @@
+import asyncio
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import Asset, PriceOHLCV
+from app.models import Asset
 from app.plugins.connectors.binance import BinanceConnector
 from app.plugins.connectors.coingecko import CoinGeckoConnector
+from app.services.asset_registry import AssetRef, asset_registry
+from app.services.ohlcv_archive import archive_rows
+from app.services.ingest import dialect_insert, upsert_ohlcv
+from app.services.coverage import missing_ranges
+from app.services.alerts import alert_engine
+from app.services.portfolio import portfolio_cache
+from app.services.price_hub import price_hub
+from app.services.result_cache import result_cache
+from app.services.rollup import bucket_open, rollup_targets, update_rollups
+from app.services.series_cache import series_cache
+from app.services.stream_state import stream_registry
 
 CONNECTORS = {
     "binance": BinanceConnector(),
@@ -98,29 +112,60 @@ DEFAULT_ASSETS = [
 
 COINGECKO_OK_TIMEFRAMES = {"1d", "1w"}  # daily-based fallback only
 
-def ensure_assets(db: Session):
-    for a in DEFAULT_ASSETS:
-        existing = db.query(Asset).filter(Asset.symbol==a["symbol"]).first()
-        if not existing:
-            db.add(Asset(**a))
-        else:
-            # Update existing assets with new fields
-            for key, value in a.items():
-                if hasattr(existing, key):
-                    setattr(existing, key, value)
+ASYNC_BATCH_SIZE = 1000
+
+def ensure_assets(db: Session) -> int:
+    """Insert or refresh DEFAULT_ASSETS in one INSERT ... ON CONFLICT (symbol) DO UPDATE.
+
+    Rows whose seeded fields already match are left untouched (the update is
+    filtered on IS DISTINCT FROM), so re-seeding an up-to-date table writes nothing.
+    Returns the number of rows inserted or changed.
+    """
+    insert = dialect_insert(db)
+    table = Asset.__table__
+    fields = [k for k in DEFAULT_ASSETS[0] if k != "symbol"]
+    stmt = insert(table).values(DEFAULT_ASSETS)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["symbol"],
+        set_={f: stmt.excluded[f] for f in fields},
+        where=or_(*(table.c[f].is_distinct_from(stmt.excluded[f]) for f in fields)),
+    )
+    changed = db.execute(stmt).rowcount
     db.commit()
+    if changed:
+        asset_registry.invalidate()
+    return changed
+
+async def _fetch_missing(db: AsyncSession, connector, asset: AssetRef, timeframe: str, days: int, **fetch_opts):
+    """Fetch only the ranges not yet stored for the window (holes included)."""
+    _, gaps, _, _ = await db.run_sync(missing_ranges, asset.id, timeframe, days)
+    rows = []
+    for start_ms, end_ms in gaps:
+        rows.extend(await connector.fetch_range(asset.binance_symbol, timeframe, start_ms, end_ms, **fetch_opts))
+    return rows, len(gaps)
+
+async def backfill_prices(db: AsyncSession, symbol: str, timeframe: str, days: int, incremental: bool = False,
+                          **fetch_opts):
+    """Fetch and store candles for one symbol/timeframe.
 
-async def backfill_prices(db: Session, symbol: str, timeframe: str, days: int):
-    asset = db.query(Asset).filter(Asset.symbol==symbol).first()
+    All database I/O goes through the async session, so a long backfill never blocks
+    the event loop. `fetch_opts` (session, budget, on_page) are forwarded to the
+    Binance connector.
+    """
+    asset = await asset_registry.aget(db, symbol)
     if not asset:
         raise ValueError(f"Unknown asset: {symbol}. Seed assets or create via /assets.")
 
     rows = []
     source = None
+    gaps = None
     # Try Binance first if we have a mapping
     if asset.binance_symbol:
         try:
-            rows = await CONNECTORS["binance"].backfill(asset.binance_symbol, timeframe, days)
+            if incremental:
+                rows, gaps = await _fetch_missing(db, CONNECTORS["binance"], asset, timeframe, days, **fetch_opts)
+            else:
+                rows = await CONNECTORS["binance"].backfill(asset.binance_symbol, timeframe, days, **fetch_opts)
             source = "binance"
         except Exception as e:
             # fall back to coingecko for daily/weekly if possible
@@ -140,13 +185,34 @@ async def backfill_prices(db: Session, symbol: str, timeframe: str, days: int):
                                f"Provide binance_symbol or use timeframe in {sorted(COINGECKO_OK_TIMEFRAMES)}.")
 
     if not rows:
+        if gaps is not None:
+            return {"inserted": 0, "source": source, "gaps": gaps, "seconds": 0.0, "rows_per_sec": 0.0}
         raise RuntimeError(f"No rows returned from {source or 'connector'}.")
 
-    for r in rows:
-        db.merge(PriceOHLCV(
-            asset_id=asset.id, ts=r["ts"], timeframe=timeframe,
-            open=r["open"], high=r["high"], low=r["low"], close=r["close"],
-            volume=r.get("volume", 0.0), source=source
-        ))
-    db.commit()
-    return {"inserted": len(rows), "source": source}
+    # run_sync drives the sync bulk upsert over the async connection, awaiting each batch;
+    # batches are smaller than usual because building their parameters runs on the loop
+    stats = await db.run_sync(upsert_ohlcv, asset.id, timeframe, rows, source, batch_size=ASYNC_BATCH_SIZE)
+    updated = [timeframe]
+    first = min(r["ts"] for r in rows)
+    if rollup_targets(timeframe):
+        updated += await db.run_sync(update_rollups, asset.id, timeframe, first, max(r["ts"] for r in rows))
+    archived = await asyncio.to_thread(archive_rows, asset.id, timeframe, rows)
+    for tf in updated:
+        series_cache.invalidate(asset.id, tf)
+        # streams committed before the first rewritten candle just advance over the new ones
+        stream_registry.invalidate(asset.id, tf, since=first if tf == timeframe else bucket_open(first, tf))
+        # off the loop: with the redis backend this is a round trip
+        await asyncio.to_thread(result_cache.invalidate, asset.id, tf)
+    portfolio_cache.invalidate()
+    price_hub.publish(symbol, timeframe, rows[-1]["close"], rows[-1]["ts"])
+    for tf in updated:
+        alert_engine.notify(symbol, tf)
+    res = {"inserted": stats["rows"], "source": source,
+           "seconds": stats["seconds"], "rows_per_sec": stats["rows_per_sec"]}
+    if gaps is not None:
+        res["gaps"] = gaps
+    if len(updated) > 1:
+        res["rollups"] = updated[1:]
+    if archived:
+        res["archived"] = archived
+    return res
@@ -0,0 +1,219 @@
+import csv
+import importlib
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.ohlcv_archive import ColdMerger, ohlcv_archive
+from app.services.ohlcv_repo import ohlcv_select
+from app.utils.timeframes import datetime_to_ms, datetimes_to_ms
+
+ROW_COLUMNS = ("ts", "open", "high", "low", "close", "volume", "source")
+
+# format -> (media type, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+# compression -> (media type, extension suffix)
+COMPRESSIONS = {"none": None, "gzip": ("application/gzip", "gz"), "zstd": ("application/zstd", "zst")}
+
+class ExportError(ValueError):
+    pass
+
+def _optional(module: str, feature: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ExportError(f"{feature} needs the optional {module.split('.')[0]} package")
+
+class _CsvEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf)
+        self._writer.writerow(columns)
+
+    def write(self, rows: List[tuple]) -> bytes:
+        ts = self.columns.index("ts")
+        self._writer.writerows(r[:ts] + (r[ts].isoformat(),) + r[ts + 1:] for r in rows)
+        out = self._buf.getvalue().encode()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return out
+
+    def close(self) -> bytes:
+        return self.write([])
+
+class _NdjsonEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+
+    def write(self, rows: List[tuple]) -> bytes:
+        return "".join(json.dumps(dict(zip(self.columns, r)), default=datetime.isoformat) + "\n"
+                       for r in rows).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+class _ArrowEncoder:
+    """Arrow IPC stream or Parquet, one record batch / row group per DB batch."""
+
+    def __init__(self, columns: Sequence[str], parquet: bool):
+        self.pa = _optional("pyarrow", "Arrow/Parquet export")
+        self.schema = self.pa.schema([(c, self.pa.string() if c in ("symbol", "source")
+                                       else self.pa.timestamp("ms") if c == "ts" else self.pa.float64())
+                                      for c in columns])
+        self._sink = _Sink()
+        if parquet:
+            pq = _optional("pyarrow.parquet", "Parquet export")
+            self._writer = pq.ParquetWriter(self._sink, self.schema, compression="snappy")
+        else:
+            self._writer = self.pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, rows: List[tuple]) -> bytes:
+        if rows:
+            arrays = [self.pa.array(col, type=f.type) for col, f in zip(zip(*rows), self.schema)]
+            self._writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+def _encoder(fmt: str, columns: Sequence[str]):
+    if fmt == "csv":
+        return _CsvEncoder(columns)
+    if fmt == "ndjson":
+        return _NdjsonEncoder(columns)
+    return _ArrowEncoder(columns, parquet=fmt == "parquet")
+
+def _compressor(compression: str):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return _optional("zstandard", "zstd compression").ZstdCompressor(level=3).compressobj()
+    return None
+
+def check_export(fmt: str, compression: str):
+    """Reject unknown formats or missing optional packages before the response starts."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}; use one of {sorted(FORMATS)}")
+    if compression not in COMPRESSIONS:
+        raise ExportError(f"Unknown compression {compression!r}; use one of {sorted(COMPRESSIONS)}")
+    if fmt in ("arrow", "parquet"):
+        _optional("pyarrow.parquet" if fmt == "parquet" else "pyarrow", f"{fmt} export")
+    if compression == "zstd":
+        _optional("zstandard", "zstd compression")
+
+def media_type(fmt: str, compression: str) -> str:
+    return COMPRESSIONS[compression][0] if COMPRESSIONS[compression] else FORMATS[fmt][0]
+
+def filename(stem: str, fmt: str, compression: str) -> str:
+    suffix = f".{COMPRESSIONS[compression][1]}" if COMPRESSIONS[compression] else ""
+    return f"{stem}.{FORMATS[fmt][1]}{suffix}"
+
+async def _tail_start(db: AsyncSession, asset_id: int, timeframe: str, end: Optional[datetime], limit: int):
+    """ts of the `limit`-th newest candle up to `end`: one index probe instead of a descending fetch."""
+    t = PriceOHLCV.__table__
+    stmt = select(t.c.ts).where(t.c.asset_id == asset_id, t.c.timeframe == timeframe)
+    if end is not None:
+        stmt = stmt.where(t.c.ts <= end)
+    return await db.scalar(stmt.order_by(t.c.ts.desc()).offset(limit - 1).limit(1))
+
+async def _stitched_tail_start(db: AsyncSession, asset_id: int, timeframe: str, end: Optional[datetime],
+                               limit: int, db_tail: Optional[datetime]) -> Optional[datetime]:
+    """ts of the `limit`-th newest candle up to `end` across the database and the archive.
+
+    The newest `limit` of the union are among the database's newest `limit` (from db_tail
+    on, or all of them when it has fewer) and the archive's, so only those are compared.
+    """
+    t = PriceOHLCV.__table__
+    stmt = select(t.c.ts).where(t.c.asset_id == asset_id, t.c.timeframe == timeframe)
+    if db_tail is not None:
+        stmt = stmt.where(t.c.ts >= db_tail)
+    if end is not None:
+        stmt = stmt.where(t.c.ts <= end)
+    hot = (await db.scalars(stmt)).all()
+    cold = ohlcv_archive.tail(asset_id, timeframe, limit, datetime_to_ms(end))[0].astype(np.int64)
+    ts = np.union1d(datetimes_to_ms(hot, len(hot)), cold)
+    if not len(ts):
+        return None
+    return pd.Timestamp(int(ts[-limit] if len(ts) >= limit else ts[0]), unit="ms").to_pydatetime()
+
+async def export_batches(session_factory: Callable[[], AsyncSession], assets: Sequence[Tuple[int, str]],
+                         timeframe: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         limit: Optional[int] = None, with_symbol: bool = True,
+                         batch_size: Optional[int] = None) -> AsyncIterator[List[tuple]]:
+    """Candles of each (asset_id, symbol) in turn, oldest first, as lists of row tuples.
+
+    Rows come off a server-side cursor `batch_size` at a time, so at most one batch
+    is held in memory however many rows are exported. `limit` keeps the newest
+    `limit` candles per asset within the date range. With the archive enabled its
+    candles are merged in by ts, the database's copy winning, and labelled "archive".
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    async with session_factory() as db:
+        for asset_id, symbol in assets:
+            lo = start
+            if limit is not None:
+                tail = await _tail_start(db, asset_id, timeframe, end, limit)
+                if ohlcv_archive.enabled:
+                    tail = await _stitched_tail_start(db, asset_id, timeframe, end, limit, tail)
+                lo = tail if lo is None or (tail is not None and tail > lo) else lo
+            merger = None
+            if ohlcv_archive.enabled:
+                hi = datetime_to_ms(end)
+                cold = ohlcv_archive.read(asset_id, timeframe, datetime_to_ms(lo), None if hi is None else hi + 1)
+                merger = ColdMerger(cold) if cold.shape[1] else None
+            stmt = ohlcv_select(asset_id, timeframe, ROW_COLUMNS, lo, end).execution_options(yield_per=batch_size)
+            result = await db.stream(stmt)
+            async for part in result.partitions(batch_size):
+                rows = [tuple(r) for r in part]
+                for chunk in merger.merge(rows, batch_size) if merger else [rows]:
+                    yield [(symbol, *r) for r in chunk] if with_symbol else chunk
+            for chunk in merger.rest(batch_size) if merger else []:
+                yield [(symbol, *r) for r in chunk] if with_symbol else chunk
+
+async def encode_export(batches: AsyncIterator[List[tuple]], columns: Sequence[str], fmt: str,
+                        compression: str = "none") -> AsyncIterator[bytes]:
+    """Encode row batches to `fmt`, optionally compressed, one chunk per batch."""
+    encoder = _encoder(fmt, columns)
+    compressor = _compressor(compression)
+    async for rows in batches:
+        chunk = encoder.write(rows)
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    tail = encoder.close()
+    if compressor is not None:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,77 @@
+import time
+from itertools import islice
+from typing import Dict, Iterable
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.ohlcv_partitions import ensure_partitions
+
+BATCH_SIZE = 5000
+
+# Natural key of a candle, the price_ohlcv primary key
+OHLCV_KEY = ["asset_id", "ts", "timeframe"]
+OHLCV_FIELDS = ["open", "high", "low", "close", "volume", "source"]
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def _insert_for(dialect: str):
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Bulk upsert not supported for dialect: {dialect}")
+    return insert
+
+def dialect_insert(db: Session):
+    """The session dialect's insert(), which supports ON CONFLICT ... DO UPDATE.
+
+    Raises ValueError on dialects without it.
+    """
+    return _insert_for(db.get_bind().dialect.name)
+
+def _upsert_stmt(dialect: str):
+    stmt = _insert_for(dialect)(PriceOHLCV.__table__)
+    # INSERT ... ON CONFLICT (asset_id, ts, timeframe) DO UPDATE, same syntax on both dialects
+    return stmt.on_conflict_do_update(
+        index_elements=OHLCV_KEY,
+        set_={f: stmt.excluded[f] for f in OHLCV_FIELDS},
+    )
+
+def _batches(rows: Iterable[Dict], size: int):
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def upsert_ohlcv(db: Session, asset_id: int, timeframe: str, rows: Iterable[Dict],
+                 source: str, batch_size: int = BATCH_SIZE) -> Dict:
+    """Write candles in batches with one INSERT ... ON CONFLICT per batch.
+
+    `rows` may be any iterable of dicts with keys ts, open, high, low, close, volume;
+    it is consumed lazily so large backfills never sit in memory as ORM objects.
+    """
+    stmt = _upsert_stmt(db.get_bind().dialect.name)
+    started = time.perf_counter()
+    written = 0
+    partitioned = settings.OHLCV_PARTITIONING != "none"
+    for batch in _batches(rows, batch_size):
+        if partitioned:
+            stamps = [r["ts"] for r in batch]
+            ensure_partitions(db, timeframe, min(stamps), max(stamps))
+        db.execute(stmt, [{
+            "asset_id": asset_id, "ts": r["ts"], "timeframe": timeframe,
+            "open": r["open"], "high": r["high"], "low": r["low"], "close": r["close"],
+            "volume": r.get("volume", 0.0), "source": source,
+        } for r in batch])
+        written += len(batch)
+    db.commit()
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": written,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(written / elapsed, 1) if elapsed > 0 else float(written),
+    }
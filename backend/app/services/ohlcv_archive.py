@@ -0,0 +1,336 @@
+import heapq
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services import ohlcv_repo
+from app.services.ohlcv_repo import OHLCV_COLUMNS
+from app.utils.timeframes import datetime_to_ms, datetimes_to_ms
+
+_ROW_CHUNK = 4096  # archived candles converted to row tuples at a time
+
+def _month(ms: np.ndarray) -> np.ndarray:
+    return ms.astype("datetime64[ms]").astype("datetime64[M]")
+
+class OHLCVArchive:
+    """Cold candles as memory-mapped columnar files, one per (asset, timeframe, month).
+
+    A month is a (6, n) float64 .npy at <root>/<asset_id>/<timeframe>/<YYYY-MM>.npy
+    whose rows are ts (epoch ms, exact in float64), open, high, low, close and volume,
+    sorted by ts. Each row is contiguous, so a column slice of one month is a view of
+    the mapped file; reads spanning months concatenate their slices. Appends rewrite
+    the touched months to a temp file and rename it into place, so readers never see a
+    partial month and mappings already open stay valid. Writers of one month file are
+    serialized per process, so concurrent appends (a backfill alongside maintenance)
+    cannot drop each other's candles.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root) if root else None
+        self._maps: Dict[Path, Tuple[int, np.ndarray]] = {}
+        self._path_locks: Dict[Path, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.root is not None
+
+    def _dir(self, asset_id: int, timeframe: str) -> Path:
+        return self.root / str(asset_id) / timeframe
+
+    def months(self, asset_id: int, timeframe: str) -> List[str]:
+        d = self._dir(asset_id, timeframe)
+        return sorted(p.stem for p in d.glob("*.npy")) if d.is_dir() else []
+
+    def _path_lock(self, path: Path) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def version(self, asset_id: int, timeframe: str) -> Tuple:
+        """(month, mtime) of every month file of the series; changes with any append or drop."""
+        if not self.enabled:
+            return ()
+        d = self._dir(asset_id, timeframe)
+        out = []
+        for m in self.months(asset_id, timeframe):
+            try:
+                out.append((m, (d / f"{m}.npy").stat().st_mtime_ns))
+            except FileNotFoundError:
+                continue
+        return tuple(out)
+
+    def _load(self, path: Path) -> np.ndarray:
+        mtime = path.stat().st_mtime_ns
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        arr = np.load(path, mmap_mode="r")
+        with self._lock:
+            self._maps[path] = (mtime, arr)
+        return arr
+
+    def read(self, asset_id: int, timeframe: str, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None) -> np.ndarray:
+        """(6, n) candles with start_ms <= ts < end_ms; a view of the file when one month is read."""
+        lo = str(_month(np.int64(start_ms))) if start_ms is not None else None
+        hi = str(_month(np.int64(end_ms))) if end_ms is not None else None
+        parts = []
+        for m in self.months(asset_id, timeframe):
+            if (lo and m < lo) or (hi and m > hi):
+                continue
+            arr = self._load(self._dir(asset_id, timeframe) / f"{m}.npy")
+            i = np.searchsorted(arr[0], start_ms) if start_ms is not None else 0
+            j = np.searchsorted(arr[0], end_ms) if end_ms is not None else arr.shape[1]
+            if j > i:
+                parts.append(arr[:, i:j])
+        with self._lock:
+            self.reads += 1
+        if not parts:
+            return np.empty((6, 0))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+    def tail(self, asset_id: int, timeframe: str, n: int, end_ms: Optional[int] = None) -> np.ndarray:
+        """(6, <=n) newest candles with ts <= end_ms, reading months newest first until n are found."""
+        parts, found = [], 0
+        for m in reversed(self.months(asset_id, timeframe)):
+            if found >= n:
+                break
+            arr = self._load(self._dir(asset_id, timeframe) / f"{m}.npy")
+            j = np.searchsorted(arr[0], end_ms, side="right") if end_ms is not None else arr.shape[1]
+            if j:
+                parts.append(arr[:, max(0, j - (n - found)):j])
+                found += parts[-1].shape[1]
+        with self._lock:
+            self.reads += 1
+        if not parts:
+            return np.empty((6, 0))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts[::-1], axis=1)
+
+    def append(self, asset_id: int, timeframe: str, candles: np.ndarray) -> int:
+        """Merge (6, n) candles into their months; a candle already archived is replaced."""
+        if not candles.shape[1]:
+            return 0
+        d = self._dir(asset_id, timeframe)
+        d.mkdir(parents=True, exist_ok=True)
+        months = _month(candles[0].astype(np.int64))
+        for m in np.unique(months):
+            path = d / f"{m}.npy"
+            new = candles[:, months == m]
+            with self._path_lock(path):
+                merged = np.concatenate([np.load(path), new], axis=1) if path.exists() else new
+                # stable sort keeps archived candles ahead of new ones with the same ts; keep the last
+                merged = merged[:, np.argsort(merged[0], kind="stable")]
+                keep = np.append(merged[0, 1:] != merged[0, :-1], True)
+                fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, np.ascontiguousarray(merged[:, keep]))
+                os.replace(tmp, path)
+        with self._lock:
+            self.appended += candles.shape[1]
+        return candles.shape[1]
+
+    def timeframes(self, asset_id: Optional[int] = None) -> List[str]:
+        """Archived timeframes, of one asset or of any."""
+        if not self.enabled or not self.root.is_dir():
+            return []
+        pattern = "*/*" if asset_id is None else f"{asset_id}/*"
+        return sorted({d.name for d in self.root.glob(pattern) if d.is_dir()})
+
+    def drop_before(self, timeframe: str, cutoff: datetime) -> int:
+        """Delete every asset's month files of `timeframe` that end at or before cutoff."""
+        if not self.enabled or not self.root.is_dir():
+            return 0
+        last = str(np.datetime64(cutoff, "M") - np.timedelta64(1, "M"))
+        dropped = 0
+        for d in self.root.glob(f"*/{timeframe}"):
+            for path in d.glob("*.npy"):
+                if path.stem <= last:
+                    with self._path_lock(path):
+                        path.unlink(missing_ok=True)
+                    dropped += 1
+        return dropped
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"enabled": self.enabled, "mapped_months": len(self._maps),
+                    "appended_rows": self.appended, "reads": self.reads}
+
+ohlcv_archive = OHLCVArchive(settings.OHLCV_ARCHIVE_DIR)
+
+def hot_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Candles older than this belong in the archive; the database keeps the rest."""
+    return (now or datetime.utcnow()) - timedelta(days=settings.OHLCV_ARCHIVE_HOT_DAYS)
+
+def rows_to_candles(rows: Iterable) -> np.ndarray:
+    """(ts, open, high, low, close, volume) tuples or candle dicts -> a (6, n) archive block."""
+    rows = [tuple(r[c] for c in OHLCV_COLUMNS) if isinstance(r, dict) else r for r in rows]
+    out = np.empty((6, len(rows)))
+    out[0] = datetimes_to_ms((r[0] for r in rows), len(rows))
+    for i in range(1, 6):
+        out[i] = np.fromiter((r[i] for r in rows), dtype=np.float64, count=len(rows))
+    return out
+
+def archive_rows(asset_id: int, timeframe: str, rows: List[Dict], now: Optional[datetime] = None) -> int:
+    """Append the candles of a backfill that are already past the hot window."""
+    if not ohlcv_archive.enabled:
+        return 0
+    cutoff = hot_cutoff(now)
+    return ohlcv_archive.append(asset_id, timeframe, rows_to_candles(r for r in rows if r["ts"] < cutoff))
+
+def archive_cold(db: Session, now: Optional[datetime] = None, batch_size: int = 50_000) -> Dict[str, int]:
+    """Move every candle older than the hot window from the database into the archive.
+
+    Rows are appended before they are deleted, so an interrupted run leaves a candle in
+    both tiers at worst, which `load_history` reads once.
+    """
+    if not ohlcv_archive.enabled:
+        return {}
+    cutoff = hot_cutoff(now)
+    t = PriceOHLCV.__table__
+    series = db.execute(select(t.c.asset_id, t.c.timeframe).where(t.c.ts < cutoff)
+                        .group_by(t.c.asset_id, t.c.timeframe)).all()
+    moved = {}
+    for asset_id, timeframe in series:
+        cold = (t.c.asset_id == asset_id, t.c.timeframe == timeframe, t.c.ts < cutoff)
+        stmt = select(*[t.c[c] for c in OHLCV_COLUMNS]).where(*cold).order_by(t.c.ts)
+        n = 0
+        for rows in db.execute(stmt.execution_options(yield_per=batch_size)).partitions():
+            n += ohlcv_archive.append(asset_id, timeframe, rows_to_candles(rows))
+        db.execute(delete(PriceOHLCV).where(*cold))
+        db.commit()
+        moved[f"{asset_id}/{timeframe}"] = n
+    return moved
+
+def candles_frame(candles: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"ts": pd.to_datetime(candles[0].astype(np.int64), unit="ms"),
+                         **{c: candles[i] for i, c in enumerate(OHLCV_COLUMNS[1:], 1)}})
+
+# Readers below stitch the two tiers. A candle may sit in both (archived but not yet
+# pruned, or written back by a gap fill after it was archived); the database copy wins.
+
+def _stitch(cold: pd.DataFrame, hot: pd.DataFrame, key=("ts",)) -> pd.DataFrame:
+    merged = pd.concat([cold, hot], ignore_index=True).sort_values(list(key), kind="stable")
+    return merged.drop_duplicates(list(key), keep="last").reset_index(drop=True)
+
+def _cold_window(asset_id: int, timeframe: str, lo: Optional[int], hi: Optional[int],
+                 limit: Optional[int]) -> np.ndarray:
+    # the newest `limit` of a range are among the archive's newest `limit` up to its end
+    if limit is None:
+        return ohlcv_archive.read(asset_id, timeframe, lo, None if hi is None else hi + 1)
+    block = ohlcv_archive.tail(asset_id, timeframe, limit, hi)
+    return block[:, block[0] >= lo] if lo is not None else block
+
+def _with_cold(cold: np.ndarray, df: pd.DataFrame, limit: Optional[int]) -> pd.DataFrame:
+    if not cold.shape[1]:
+        return df
+    out = _stitch(candles_frame(cold), df) if len(df) else candles_frame(cold)
+    return out.tail(limit).reset_index(drop=True) if limit is not None else out
+
+def load_ohlcv(db: Session, asset_id: int, timeframe: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None, limit: Optional[int] = None) -> pd.DataFrame:
+    """ohlcv_repo.load_ohlcv over both tiers: candles in [start, end], the newest `limit` of them."""
+    df = ohlcv_repo.load_ohlcv(db, asset_id, timeframe, start, end, limit)
+    if not ohlcv_archive.enabled:
+        return df
+    cold = _cold_window(asset_id, timeframe, datetime_to_ms(start), datetime_to_ms(end), limit)
+    return _with_cold(cold, df, limit)
+
+def load_ohlcv_many(db: Session, asset_ids: Sequence[int], timeframe: str, limit: int) -> Dict[int, pd.DataFrame]:
+    """ohlcv_repo.load_ohlcv_many over both tiers: each asset's tail is topped up from the archive."""
+    frames = ohlcv_repo.load_ohlcv_many(db, asset_ids, timeframe, limit)
+    if not ohlcv_archive.enabled:
+        return frames
+    for asset_id in asset_ids:
+        cold = ohlcv_archive.tail(asset_id, timeframe, limit)
+        if cold.shape[1]:
+            frames[asset_id] = _with_cold(cold, frames.get(asset_id, pd.DataFrame()), limit)
+    return frames
+
+def load_history(db: Session, asset_id: int, timeframe: str) -> pd.DataFrame:
+    """The full series, archived and database candles merged by ts."""
+    return load_ohlcv(db, asset_id, timeframe)
+
+def cold_rows(candles: np.ndarray, source: str = "archive") -> Iterator[tuple]:
+    """(ts, open, high, low, close, volume, source) tuples of an archive block, converted lazily."""
+    for k in range(0, candles.shape[1], _ROW_CHUNK):
+        part = candles[:, k:k + _ROW_CHUNK]
+        ts = pd.to_datetime(part[0].astype(np.int64), unit="ms").to_pydatetime()
+        yield from ((t, *map(float, v), source) for t, v in zip(ts, part[1:].T))
+
+def _merge(cold: Iterable[tuple], rows: List[tuple]) -> Iterator[tuple]:
+    hot = {r[0] for r in rows}
+    return heapq.merge((r for r in cold if r[0] not in hot), rows, key=lambda r: r[0])
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+def stitch_tail(asset_id: int, timeframe: str, rows: List[tuple], limit: int) -> List[tuple]:
+    """The newest `limit` of database row tuples (ts first, ascending) and archived candles."""
+    cold = ohlcv_archive.tail(asset_id, timeframe, limit)
+    if not cold.shape[1]:
+        return rows
+    return list(_merge(cold_rows(cold), rows))[-limit:]
+
+class ColdMerger:
+    """Interleaves archived candles into an ascending stream of database row batches.
+
+    `merge` yields, `size` rows at a time, a batch together with the archived candles
+    up to its last ts that the database does not hold; `rest` yields the archived
+    candles after the last batch. Rows are converted as they are yielded, so a long
+    archived stretch is never held in memory as tuples.
+    """
+
+    def __init__(self, candles: np.ndarray):
+        self.candles = candles
+        self.pos = 0
+
+    def merge(self, rows: List[tuple], size: int) -> Iterator[List[tuple]]:
+        end = self.pos
+        if rows:
+            end = int(np.searchsorted(self.candles[0], datetime_to_ms(rows[-1][0]), side="right"))
+        block, self.pos = self.candles[:, self.pos:end], max(self.pos, end)
+        yield from _chunks(_merge(cold_rows(block), rows), size)
+
+    def rest(self, size: int) -> Iterator[List[tuple]]:
+        block, self.pos = self.candles[:, self.pos:], self.candles.shape[1]
+        yield from _chunks(cold_rows(block), size)
+
+def load_close_matrix(db: Session, asset_ids: Sequence[int], timeframe: str, limit: Optional[int] = None,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """ohlcv_repo.load_close_matrix over both tiers: archived closes fill in what the database lacks.
+
+    Without the archive (or archived candles in range) this is the single-query database read.
+    """
+    ts, matrix = ohlcv_repo.load_close_matrix(db, asset_ids, timeframe, limit, start, end)
+    if not ohlcv_archive.enabled:
+        return ts, matrix
+    lo, hi = datetime_to_ms(start), datetime_to_ms(end)
+    cold = []
+    for asset_id in asset_ids:
+        block = _cold_window(asset_id, timeframe, lo, hi, limit)
+        if block.shape[1]:
+            cold.append(pd.DataFrame({"asset_id": asset_id, "ts": block[0].astype(np.int64), "close": block[4]}))
+    if not cold:
+        return ts, matrix
+    rows, cols = np.nonzero(~np.isnan(matrix))
+    hot = pd.DataFrame({"asset_id": np.asarray(asset_ids, dtype=np.int64)[cols], "ts": ts[rows],
+                        "close": matrix[rows, cols]})
+    merged = _stitch(pd.concat(cold, ignore_index=True), hot, key=("asset_id", "ts"))
+    if limit is not None:
+        merged = merged.groupby("asset_id", sort=False).tail(limit)
+    return ohlcv_repo.align_closes(asset_ids, merged["asset_id"].to_numpy(), merged["ts"].to_numpy(),
+                                   merged["close"].to_numpy())
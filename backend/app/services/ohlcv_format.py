@@ -0,0 +1,105 @@
+import hashlib
+import json
+import struct
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+from app.utils.timeframes import datetimes_to_ms
+
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# response format -> media type
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columns": "application/vnd.cryptomind.ohlcv+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "binary": "application/vnd.cryptomind.ohlcv",
+}
+_BY_MEDIA = {m: f for f, m in MEDIA_TYPES.items()}
+# binary layout: "OHLC", u32 version, u32 row count, then ts int64[n] and five float64[n] columns, all little-endian
+BINARY_MAGIC = b"OHLC"
+BINARY_VERSION = 1
+
+def negotiate(fmt: Optional[str], accept: Optional[str]) -> str:
+    """Response format from an explicit `format` parameter, else the best supported Accept entry."""
+    if fmt:
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unknown format {fmt!r}; use one of {sorted(MEDIA_TYPES)}")
+        return fmt
+    best, best_q = "json", 0.0
+    for part in (accept or "").split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        # earlier entries win ties, as listed by the client
+        if media in _BY_MEDIA and q > best_q:
+            best, best_q = _BY_MEDIA[media], q
+    return best
+
+def rows_to_columns(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    """(ts, open, high, low, close, volume, ...) rows -> epoch-ms int64 and float64 column arrays."""
+    n = len(rows)
+    return {"ts": datetimes_to_ms((r[0] for r in rows), n),
+            **{c: np.fromiter((r[i] for r in rows), dtype=np.float64, count=n)
+               for i, c in enumerate(VALUE_COLUMNS, start=1)}}
+
+def frame_to_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {"ts": df["ts"].to_numpy(dtype="datetime64[ms]").view(np.int64),
+            **{c: df[c].to_numpy(dtype=np.float64) for c in VALUE_COLUMNS}}
+
+def columns_digest(cols: Dict[str, np.ndarray]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for c in ("ts", *VALUE_COLUMNS):
+        h.update(cols[c].tobytes())
+    return h.hexdigest()
+
+def encode_columns(cols: Dict[str, np.ndarray], fmt: str, symbol: str, timeframe: str) -> bytes:
+    """Body of a columnar response; the arrays are written as-is, never as per-row objects."""
+    if fmt == "columns":
+        return json.dumps({"symbol": symbol, "timeframe": timeframe,
+                           **{c: cols[c].tolist() for c in ("ts", *VALUE_COLUMNS)}},
+                          separators=(",", ":")).encode()
+    if fmt == "binary":
+        header = BINARY_MAGIC + struct.pack("<II", BINARY_VERSION, len(cols["ts"]))
+        return header + b"".join(np.asarray(cols[c], dtype="<i8" if c == "ts" else "<f8").tobytes()
+                                 for c in ("ts", *VALUE_COLUMNS))
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("arrow format needs the optional pyarrow package")
+        table = pa.table({"ts": pa.array(cols["ts"], type=pa.int64()).cast(pa.timestamp("ms")),
+                          **{c: pa.array(cols[c]) for c in VALUE_COLUMNS}},
+                         metadata={"symbol": symbol, "timeframe": timeframe})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Not a columnar format: {fmt}")
+
+def decode_binary(body: bytes) -> Dict[str, np.ndarray]:
+    """Inverse of the binary encoding, for clients and tests."""
+    if body[:4] != BINARY_MAGIC:
+        raise ValueError("Not an OHLCV binary body")
+    version, n = struct.unpack_from("<II", body, 4)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported OHLCV binary version {version}")
+    out, offset = {}, 12
+    for c in ("ts", *VALUE_COLUMNS):
+        out[c] = np.frombuffer(body, dtype="<i8" if c == "ts" else "<f8", count=n, offset=offset)
+        offset += 8 * n
+    return out
+
+def etag(*parts) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates or f"W/{tag}" in candidates
@@ -0,0 +1,101 @@
+"""Partition DDL for price_ohlcv.
+
+With OHLCV_PARTITIONING set on PostgreSQL the table is declaratively partitioned
+(see models.PriceOHLCV) and `ensure_partitions` creates the partitions rows land in
+before each upsert batch. Kept free of service imports so ingest can use it;
+maintenance and retention live in ohlcv_storage.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.utils.timeframes import timeframe_ms
+
+LAYOUTS = ("none", "time", "timeframe")
+TABLE = PriceOHLCV.__tablename__
+
+# Partitions known to exist, so a steady stream of upserts issues no DDL or catalog reads
+_known = set()
+
+def forget_partitions(*names: str):
+    """Drop the named partitions (all when none are given) from the known set."""
+    if names:
+        _known.difference_update(names)
+    else:
+        _known.clear()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_partitions(session):
+    # a rolled-back transaction may have created (and so un-created) some of them
+    forget_partitions()
+
+def resolve_layout(layout: Optional[str]) -> str:
+    layout = layout or settings.OHLCV_PARTITIONING
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown OHLCV_PARTITIONING: {layout}; expected one of {', '.join(LAYOUTS)}")
+    return layout
+
+def is_partitioned(db: Session, layout: str) -> bool:
+    return layout != "none" and db.get_bind().dialect.name == "postgresql"
+
+def _yearly(layout: str, timeframe: Optional[str]) -> bool:
+    return layout == "timeframe" and timeframe_ms(timeframe) >= 86_400_000
+
+def _period_start(ts: datetime, yearly: bool) -> datetime:
+    return datetime(ts.year, 1 if yearly else ts.month, 1)
+
+def next_period(start: datetime, yearly: bool) -> datetime:
+    if yearly or start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
+
+def _range_parent(layout: str, timeframe: Optional[str]) -> str:
+    return f"{TABLE}_{timeframe}" if layout == "timeframe" else TABLE
+
+def partition_ddl(layout: str, timeframe: Optional[str], first: datetime, last: datetime) -> List[Tuple[str, str]]:
+    """(name, CREATE TABLE) for every partition rows of `timeframe` between first and last land in.
+
+    "time" uses monthly ranges of the whole table, named price_ohlcv_p2024_01.
+    "timeframe" first needs the timeframe's list partition (price_ohlcv_1m), itself
+    ranged monthly below 1d (price_ohlcv_1m_p2024_01) and yearly above (price_ohlcv_1d_p2024).
+    """
+    out = []
+    if layout == "timeframe":
+        timeframe_ms(timeframe)  # validates the name before it becomes part of identifiers
+        out.append((_range_parent(layout, timeframe),
+                    f"CREATE TABLE IF NOT EXISTS {TABLE}_{timeframe} PARTITION OF {TABLE} "
+                    f"FOR VALUES IN ('{timeframe}') PARTITION BY RANGE (ts)"))
+    parent, yearly = _range_parent(layout, timeframe), _yearly(layout, timeframe)
+    start = _period_start(first, yearly)
+    while start <= last:
+        end = next_period(start, yearly)
+        name = f"{parent}_p{start:%Y}" if yearly else f"{parent}_p{start:%Y_%m}"
+        out.append((name, f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+                          f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"))
+        start = end
+    return out
+
+def ensure_partitions(db: Session, timeframe: Optional[str], first: datetime, last: datetime,
+                      layout: Optional[str] = None) -> List[str]:
+    """Create any partition rows between first and last need; returns the names created.
+
+    A no-op unless the table is partitioned. Known partitions are remembered per
+    process, and unknown ones are checked with one catalog query before any DDL.
+    """
+    layout = resolve_layout(layout)
+    if not is_partitioned(db, layout):
+        return []
+    pending = [(name, ddl) for name, ddl in partition_ddl(layout, timeframe, first, last) if name not in _known]
+    if not pending:
+        return []
+    missing = set(db.execute(text("SELECT n FROM unnest(CAST(:names AS text[])) AS n WHERE to_regclass(n) IS NULL"),
+                             {"names": [name for name, _ in pending]}).scalars())
+    created = []
+    for name, ddl in pending:
+        if name in missing:
+            db.execute(text(ddl))
+            created.append(name)
+    _known.update(name for name, _ in pending)
+    return created
@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models import PriceOHLCV
+from app.utils.timeframes import datetimes_to_ms
+
+OHLCV_COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+
+_table = PriceOHLCV.__table__
+
+def ohlcv_select(asset_id: int, timeframe: str, columns: Sequence[str] = OHLCV_COLUMNS,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 limit: Optional[int] = None):
+    """Core SELECT of the given columns, ascending by ts unless `limit` is set.
+
+    With a limit the newest `limit` rows are selected in descending order; callers
+    reverse them. Columns are selected directly, so no ORM entities are built.
+    """
+    stmt = select(*[_table.c[c] for c in columns]).where(
+        _table.c.asset_id == asset_id, _table.c.timeframe == timeframe)
+    if start is not None:
+        stmt = stmt.where(_table.c.ts >= start)
+    if end is not None:
+        stmt = stmt.where(_table.c.ts <= end)
+    if limit is not None:
+        return stmt.order_by(_table.c.ts.desc()).limit(limit)
+    return stmt.order_by(_table.c.ts)
+
+def ohlcv_fingerprint_select(asset_id: int, timeframe: str, limit: int):
+    """count, first/last ts, the sum of every value column and the source range of the
+    newest `limit` candles.
+
+    Every field a response returns feeds it, so it changes whenever a candle in that
+    window is added, filled in or revised, and can version a response without
+    fetching the rows themselves.
+    """
+    window = ohlcv_select(asset_id, timeframe, OHLCV_COLUMNS + ("source",), limit=limit).subquery()
+    return select(func.count(), func.min(window.c.ts), func.max(window.c.ts),
+                  *[func.sum(window.c[c]) for c in OHLCV_COLUMNS[1:]],
+                  func.min(window.c.source), func.max(window.c.source))
+
+def load_ohlcv(db: Session, asset_id: int, timeframe: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None, limit: Optional[int] = None,
+               columns: Sequence[str] = OHLCV_COLUMNS) -> pd.DataFrame:
+    """Candles for one asset/timeframe as a DataFrame ordered by ts (oldest first)."""
+    rows = db.execute(ohlcv_select(asset_id, timeframe, columns, start, end, limit)).all()
+    if limit is not None:
+        rows.reverse()
+    return _frame(rows, columns)
+
+def _frame(rows, columns: Sequence[str]) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=list(columns))
+    for c in df.columns:
+        if c in ("open", "high", "low", "close", "volume"):
+            df[c] = df[c].astype(np.float64)
+        elif c == "ts":
+            df[c] = pd.to_datetime(df[c])
+    return df
+
+def load_ohlcv_many(db: Session, asset_ids: Sequence[int], timeframe: str, limit: int,
+                    columns: Sequence[str] = OHLCV_COLUMNS) -> Dict[int, pd.DataFrame]:
+    """Newest `limit` candles of each asset in one query, as {asset_id: frame ordered by ts}.
+
+    ROW_NUMBER() partitioned by asset picks each tail independently, so one asset's
+    gaps or longer history never crowd out another's. Assets without candles are absent.
+    """
+    if not asset_ids:
+        return {}
+    rn = func.row_number().over(partition_by=_table.c.asset_id, order_by=_table.c.ts.desc()).label("rn")
+    ranked = select(_table.c.asset_id, *[_table.c[c] for c in columns], rn).where(
+        _table.c.asset_id.in_(list(asset_ids)), _table.c.timeframe == timeframe).subquery()
+    stmt = (select(ranked.c.asset_id, *[ranked.c[c] for c in columns])
+            .where(ranked.c.rn <= limit).order_by(ranked.c.asset_id, ranked.c.ts))
+    df = _frame(db.execute(stmt).all(), ("asset_id", *columns))
+    return {int(aid): g.drop(columns="asset_id").reset_index(drop=True) for aid, g in df.groupby("asset_id", sort=False)}
+
+def load_close_matrix(db: Session, asset_ids: Sequence[int], timeframe: str, limit: Optional[int] = None,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Closes of many assets in one query, aligned on the union of their timestamps.
+
+    `limit` keeps each asset's newest `limit` candles within [start, end]. Returns
+    (ts, closes): epoch-ms int64 of length T and a float64 T x len(asset_ids) matrix
+    whose columns follow `asset_ids`, NaN where an asset has no candle.
+    """
+    if not asset_ids:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0))
+    stmt = select(_table.c.asset_id, _table.c.ts, _table.c.close).where(
+        _table.c.asset_id.in_(list(asset_ids)), _table.c.timeframe == timeframe)
+    if start is not None:
+        stmt = stmt.where(_table.c.ts >= start)
+    if end is not None:
+        stmt = stmt.where(_table.c.ts <= end)
+    if limit is not None:
+        rn = func.row_number().over(partition_by=_table.c.asset_id, order_by=_table.c.ts.desc()).label("rn")
+        ranked = stmt.add_columns(rn).subquery()
+        stmt = select(ranked.c.asset_id, ranked.c.ts, ranked.c.close).where(ranked.c.rn <= limit)
+    rows = db.execute(stmt).all()
+    n = len(rows)
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    ts = datetimes_to_ms((r[1] for r in rows), n)
+    closes = np.fromiter((r[2] for r in rows), dtype=np.float64, count=n)
+    return align_closes(asset_ids, ids, ts, closes)
+
+def align_closes(asset_ids: Sequence[int], ids: np.ndarray, ts: np.ndarray,
+                 closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(ts, closes) matrix of long-form (asset id, epoch-ms ts, close) rows, as load_close_matrix returns."""
+    if not len(asset_ids):
+        return np.empty(0, dtype=np.int64), np.empty((0, 0))
+    index, row = np.unique(ts, return_inverse=True)
+    order = np.argsort(asset_ids)
+    col = order[np.searchsorted(np.asarray(asset_ids)[order], ids)]
+    matrix = np.full((len(index), len(asset_ids)), np.nan)
+    matrix[row, col] = closes
+    return index, matrix
+
+def load_closes(db: Session, asset_id: int, timeframe: str, limit: Optional[int] = None,
+                start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+    """Close prices ordered by ts as a float64 array."""
+    rows = db.execute(ohlcv_select(asset_id, timeframe, ("close",), start, end, limit)).scalars().all()
+    closes = np.fromiter(rows, dtype=np.float64, count=len(rows))
+    return closes[::-1].copy() if limit is not None else closes
+
+def latest_close(db: Session, asset_id: int, timeframe: Optional[str] = None) -> Optional[float]:
+    """Close of the newest candle, across all timeframes when `timeframe` is None."""
+    stmt = select(_table.c.close).where(_table.c.asset_id == asset_id)
+    if timeframe is not None:
+        stmt = stmt.where(_table.c.timeframe == timeframe)
+    return db.execute(stmt.order_by(_table.c.ts.desc()).limit(1)).scalar()
+
+def latest_close_subquery(asset_ids, timeframe: Optional[str] = None):
+    """Subquery of (asset_id, close, ts) for each asset's newest candle, via ROW_NUMBER().
+
+    `asset_ids` may be a list or a select of ids; across all timeframes when `timeframe` is None.
+    """
+    rn = func.row_number().over(partition_by=_table.c.asset_id, order_by=_table.c.ts.desc()).label("rn")
+    stmt = select(_table.c.asset_id, _table.c.close, _table.c.ts, rn).where(_table.c.asset_id.in_(asset_ids))
+    if timeframe is not None:
+        stmt = stmt.where(_table.c.timeframe == timeframe)
+    ranked = stmt.subquery()
+    return select(ranked.c.asset_id, ranked.c.close, ranked.c.ts).where(ranked.c.rn == 1).subquery()
@@ -0,0 +1,123 @@
+"""Partition management and retention for price_ohlcv.
+
+With OHLCV_PARTITIONING set on PostgreSQL the table is declaratively partitioned
+(see models.PriceOHLCV) and partitions are created on demand before each upsert
+batch (ohlcv_partitions), plus a few months ahead by `maintain_ohlcv`. Retention drops whole
+partitions where the layout allows it and deletes the remaining expired rows;
+on SQLite or unpartitioned tables it is a plain DELETE.
+
+Run the maintenance job from cron with:  python -m app.services.ohlcv_storage
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.asset_registry import asset_registry
+from app.services.ohlcv_partitions import (TABLE, ensure_partitions, forget_partitions, is_partitioned,
+                                           next_period, resolve_layout)
+from app.services.ohlcv_archive import archive_cold, ohlcv_archive
+from app.services.portfolio import portfolio_cache
+from app.services.result_cache import result_cache
+from app.services.series_cache import series_cache
+from app.services.stream_state import stream_registry
+from app.utils.timeframes import timeframe_ms
+
+def retention_days(spec: Optional[str] = None) -> Dict[str, int]:
+    """Parse OHLCV_RETENTION ("1m:30,5m:180,*:3650") into {timeframe: days}."""
+    spec = settings.OHLCV_RETENTION if spec is None else spec
+    policy = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        tf, _, days = part.partition(":")
+        if tf != "*":
+            timeframe_ms(tf)
+        if not days.strip().isdigit() or int(days) <= 0:
+            raise ValueError(f"Invalid OHLCV_RETENTION entry: {part}")
+        policy[tf] = int(days)
+    return policy
+
+def retention_cutoff(timeframe: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Oldest candle time kept for `timeframe`, or None when it is kept forever."""
+    policy = retention_days()
+    days = policy.get(timeframe, policy.get("*"))
+    return (now or datetime.utcnow()) - timedelta(days=days) if days else None
+
+_PERIOD = re.compile(r"_p(\d{4})(?:_(\d{2}))?$")
+
+def _children(db: Session, parent: str) -> List[str]:
+    return list(db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :parent ORDER BY c.relname"),
+        {"parent": parent}).scalars())
+
+def _drop_expired(db: Session, parent: str, cutoff: datetime) -> List[str]:
+    """Drop the range partitions of `parent` that end at or before cutoff (ours only, by name)."""
+    dropped = []
+    for name in _children(db, parent):
+        m = _PERIOD.search(name)
+        if not m or name[:m.start()] != parent:
+            continue
+        yearly = m.group(2) is None
+        start = datetime(int(m.group(1)), 1 if yearly else int(m.group(2)), 1)
+        if next_period(start, yearly) <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            forget_partitions(name)
+            dropped.append(name)
+    return dropped
+
+def maintain_ohlcv(db: Session, now: Optional[datetime] = None, layout: Optional[str] = None) -> Dict:
+    """Move cold candles to the archive, create upcoming partitions and apply OHLCV_RETENTION.
+
+    Expired partitions are dropped whole. In the "time" layout a partition holds every
+    timeframe, so it is only dropped once past the longest retention and only if "*"
+    bounds the unlisted timeframes. Rows older than their cutoff that remain in
+    partially expired partitions (or in an unpartitioned table) are deleted, and so
+    are archived months past retention. Returns what changed.
+    """
+    now = now or datetime.utcnow()
+    layout = resolve_layout(layout)
+    policy = retention_days()
+    report = {"layout": layout, "created": [], "dropped": [], "deleted": {}, "archived": archive_cold(db, now)}
+    if is_partitioned(db, layout):
+        ahead = now + timedelta(days=31 * settings.OHLCV_PARTITIONS_AHEAD)
+        if layout == "time":
+            report["created"] += ensure_partitions(db, None, now, ahead, layout)
+            if "*" in policy:
+                report["dropped"] += _drop_expired(db, TABLE, now - timedelta(days=max(policy.values())))
+        else:
+            for child in _children(db, TABLE):
+                tf = child[len(TABLE) + 1:]
+                report["created"] += ensure_partitions(db, tf, now, ahead, layout)
+                cutoff = retention_cutoff(tf, now)
+                if cutoff is not None:
+                    report["dropped"] += _drop_expired(db, child, cutoff)
+    listed = [tf for tf in policy if tf != "*"]
+    for tf in listed:
+        stmt = delete(PriceOHLCV).where(PriceOHLCV.timeframe == tf, PriceOHLCV.ts < now - timedelta(days=policy[tf]))
+        report["deleted"][tf] = db.execute(stmt).rowcount
+    if "*" in policy:
+        stmt = delete(PriceOHLCV).where(PriceOHLCV.timeframe.notin_(listed),
+                                        PriceOHLCV.ts < now - timedelta(days=policy["*"]))
+        report["deleted"]["*"] = db.execute(stmt).rowcount
+    db.commit()
+    cutoffs = {tf: retention_cutoff(tf, now) for tf in ohlcv_archive.timeframes()}
+    report["archive_months_dropped"] = sum(ohlcv_archive.drop_before(tf, c) for tf, c in cutoffs.items() if c)
+    if report["dropped"] or any(report["deleted"].values()) or report["archive_months_dropped"]:
+        _invalidate_caches(db)
+    return report
+
+def _invalidate_caches(db: Session):
+    series_cache.clear()
+    result_cache.clear()
+    for asset in asset_registry.all(db).values():
+        stream_registry.invalidate(asset.id)
+    portfolio_cache.invalidate()
+
+if __name__ == "__main__":
+    from app.db import SessionLocal
+    from app.services.signal_store import maintain_signal_runs
+    with SessionLocal() as session:
+        print(maintain_ohlcv(session))
+        print(maintain_signal_runs(session))
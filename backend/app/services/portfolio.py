@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Asset, PortfolioHolding
+from app.services.backtest import YEAR_MS
+from app.services.compare import forward_fill
+from app.services.ohlcv_archive import load_close_matrix
+from app.services.ohlcv_repo import latest_close_subquery
+from app.utils.timeframes import timeframe_ms
+
+_EPOCH = datetime(1970, 1, 1)
+
+class PortfolioCache:
+    """Computed portfolio results keyed by request, dropped on any holding or price change.
+
+    `invalidate` bumps a generation so a result computed concurrently with a change is
+    not stored. Entries also expire after `ttl` seconds, which bounds staleness from
+    writes made by other processes.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Dict]) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            gen = self._generation
+        value = compute()
+        with self._lock:
+            if gen == self._generation:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+portfolio_cache = PortfolioCache(settings.PORTFOLIO_CACHE_TTL)
+
+def valuation(db: Session, timeframe: Optional[str] = None) -> Dict:
+    """Every holding valued at its asset's newest close, in one statement.
+
+    Holdings, assets and latest prices are joined set-based (ROW_NUMBER per asset), so
+    the cost does not grow with one query per holding. Unknown or unpriced holdings
+    are valued at 0.
+    """
+    held = select(Asset.id).join(PortfolioHolding, PortfolioHolding.symbol == Asset.symbol)
+    latest = latest_close_subquery(held, timeframe)
+    rows = db.execute(
+        select(PortfolioHolding.id, PortfolioHolding.symbol, PortfolioHolding.amount, latest.c.close, latest.c.ts)
+        .outerjoin(Asset, Asset.symbol == PortfolioHolding.symbol)
+        .outerjoin(latest, latest.c.asset_id == Asset.id)
+        .order_by(PortfolioHolding.id)).all()
+    holdings = []
+    for hid, symbol, amount, close, ts in rows:
+        price = close if close is not None else 0.0
+        holdings.append({"id": hid, "symbol": symbol, "amount": amount, "price": price, "value": amount * price,
+                         "ts": ts.isoformat() if ts is not None else None})
+    total = sum(h["value"] for h in holdings)
+    for h in holdings:
+        h["weight"] = h["value"] / total if total else 0.0
+    return {"total_value": total, "holdings": holdings}
+
+def equity_metrics(equity: np.ndarray, periods_per_year: float) -> Dict:
+    """Return, annualized volatility and Sharpe, and max drawdown of an equity curve."""
+    if len(equity) < 2:
+        return {"return": 0.0, "volatility": 0.0, "sharpe": 0.0, "max_drawdown": 0.0}
+    rets = equity[1:] / equity[:-1] - 1.0
+    std = rets.std(ddof=1) if len(rets) > 1 else 0.0
+    peak = np.maximum.accumulate(equity)
+    return {
+        "return": float(equity[-1] / equity[0] - 1.0),
+        "volatility": float(std * math.sqrt(periods_per_year)),
+        "sharpe": float(rets.mean() / std * math.sqrt(periods_per_year)) if std > 0 else 0.0,
+        "max_drawdown": float(np.max(1.0 - equity / peak)),
+    }
+
+def history(db: Session, timeframe: str = "1d", start: Optional[datetime] = None,
+            end: Optional[datetime] = None) -> Dict:
+    """Value of the current holdings over time, with risk metrics.
+
+    Closes of all held assets come from one aligned bulk load and are forward-filled
+    over gaps. The curve starts once every priced asset has a close, so it never
+    jumps when an asset's history begins. Holdings are today's amounts; past trades
+    are not recorded.
+    """
+    holdings = db.execute(select(PortfolioHolding.symbol, PortfolioHolding.amount, Asset.id)
+                          .outerjoin(Asset, Asset.symbol == PortfolioHolding.symbol)
+                          .where(PortfolioHolding.amount != 0).order_by(PortfolioHolding.id)).all()
+    rows = [r for r in holdings if r[2] is not None]
+    ts, prices = load_close_matrix(db, [r[2] for r in rows], timeframe, start=start, end=end)
+    priced = np.flatnonzero(~np.isnan(prices).all(axis=0)) if len(ts) else np.empty(0, dtype=int)
+    symbols = [rows[i][0] for i in priced]
+    out = {"timeframe": timeframe, "symbols": symbols, "missing": [r[0] for r in holdings if r[0] not in symbols]}
+    if not len(priced):
+        return {**out, "ts": [], "equity": [], "metrics": equity_metrics(np.empty(0), 1.0)}
+    filled = forward_fill(prices[:, priced])
+    first = int(np.argmax(~np.isnan(filled).any(axis=1)))
+    ts, filled = ts[first:], filled[first:]
+    amounts = np.array([rows[i][1] for i in priced], dtype=np.float64)
+    equity = filled @ amounts
+    out.update({
+        "ts": [(_EPOCH + timedelta(milliseconds=t)).isoformat() for t in ts.tolist()],
+        "equity": equity.tolist(),
+        "metrics": {"start_value": float(equity[0]), "end_value": float(equity[-1]),
+                    **equity_metrics(equity, YEAR_MS / timeframe_ms(timeframe))},
+    })
+    return out
@@ -0,0 +1,130 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import PriceOHLCV
+from app.services.asset_registry import asset_registry
+
+Topic = Tuple[str, str]  # (symbol, timeframe)
+
+class Subscriber:
+    """One socket's outbox: at most one pending message per topic.
+
+    A newer price for a topic replaces the unsent one, so a slow client gets the
+    latest state when it catches up. Memory stays bounded by its subscriptions
+    and fast clients are never held back.
+    """
+
+    def __init__(self):
+        self.topics: Set[Topic] = set()
+        self._pending: Dict[Topic, Dict] = {}
+        self._ready = asyncio.Event()
+        self.conflated = 0
+
+    def offer(self, topic: Topic, msg: Dict):
+        if topic in self._pending:
+            self.conflated += 1
+        self._pending[topic] = msg
+        self._ready.set()
+
+    async def next_batch(self) -> List[Dict]:
+        await self._ready.wait()
+        self._ready.clear()
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+class PriceHub:
+    """Last price per (symbol, timeframe), shared by every WebSocket subscriber.
+
+    A single poller reads the latest close of all subscribed topics once per interval,
+    one query per timeframe however many sockets are open, and ingestion can
+    `publish` directly. Subscribers only receive a topic when its price or candle
+    changes.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.prices: Dict[Topic, Dict] = {}
+        self._subs: Dict[Topic, Set[Subscriber]] = defaultdict(set)
+        self._poller: Optional[asyncio.Task] = None
+        self.polls = 0
+
+    def publish(self, symbol: str, timeframe: str, price: float, ts: datetime):
+        topic = (symbol, timeframe)
+        current = self.prices.get(topic)
+        if current is not None and (ts < current["ts"] or (ts == current["ts"] and price == current["price"])):
+            return
+        self.prices[topic] = {"price": price, "ts": ts}
+        msg = self._message(topic)
+        for sub in self._subs.get(topic, ()):
+            sub.offer(topic, msg)
+
+    def _message(self, topic: Topic) -> Dict:
+        state = self.prices.get(topic)
+        return {"symbol": topic[0], "timeframe": topic[1], "price": state["price"] if state else 0.0,
+                "ts": state["ts"].isoformat() if state else None}
+
+    async def subscribe(self, sub: Subscriber, topics: Iterable[Topic]):
+        new = [t for t in topics if t not in sub.topics]
+        unseen = [t for t in new if t not in self.prices]
+        if unseen:
+            await self.poll_once(unseen)
+        for t in new:
+            sub.topics.add(t)
+            self._subs[t].add(sub)
+            sub.offer(t, self._message(t))
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._run())
+
+    def unsubscribe(self, sub: Subscriber, topics: Optional[Iterable[Topic]] = None):
+        for t in list(sub.topics if topics is None else topics):
+            sub.topics.discard(t)
+            subs = self._subs.get(t)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[t]
+
+    async def poll_once(self, topics: Optional[Iterable[Topic]] = None):
+        by_tf: Dict[str, List[str]] = defaultdict(list)
+        for symbol, tf in (self._subs if topics is None else topics):
+            by_tf[tf].append(symbol)
+        if not by_tf:
+            return
+        p, q = PriceOHLCV, aliased(PriceOHLCV)
+        async with self.session_factory() as db:
+            index = await asset_registry.aall(db)
+            for tf, symbols in by_tf.items():
+                ids = {index[s].id: s for s in symbols if s in index}
+                if not ids:
+                    continue
+                # correlated max(ts) resolves through the price_ohlcv primary key, one index probe per asset
+                newest = (select(func.max(q.ts)).where(q.asset_id == p.asset_id, q.timeframe == tf)
+                          .correlate(p).scalar_subquery())
+                rows = await db.execute(select(p.asset_id, p.close, p.ts)
+                                        .where(p.asset_id.in_(ids), p.timeframe == tf, p.ts == newest))
+                for asset_id, close, ts in rows:
+                    self.publish(ids[asset_id], tf, close, ts)
+        self.polls += 1
+
+    async def _run(self):
+        while self._subs:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll_once()
+            except Exception:
+                # a failed poll (e.g. a DB restart) must not end the feed for everyone
+                pass
+
+    def stats(self) -> Dict:
+        subs = {s for group in self._subs.values() for s in group}
+        return {"topics": len(self._subs), "subscribers": len(subs), "polls": self.polls,
+                "conflated": sum(s.conflated for s in subs)}
+
+price_hub = PriceHub(AsyncSessionLocal, settings.WS_POLL_INTERVAL)
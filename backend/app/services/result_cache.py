@@ -0,0 +1,253 @@
+"""Cache of signal and decision results per candle and configuration.
+
+A result depends only on the series up to its last candle and on the request's
+configuration, so it is cached under (asset_id, timeframe, last candle ts, kind,
+config hash). A new candle changes the key by itself; backfills also call
+`invalidate`, because they can rewrite the last candle in place or older history,
+and entries expire after RESULT_CACHE_TTL seconds regardless.
+
+Two backends share that interface. "memory" is a per-process LRU, enough for one
+node and for tests. "redis" (RESULT_CACHE_REDIS_URL) is shared by every worker:
+each (asset, timeframe) series is one hash whose fields are the cached results, so
+invalidating a series is one DEL (and a generation INCR) seen by all processes. Values are pickled,
+so point it at a Redis instance only this service writes to.
+"""
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+
+Series = Tuple[int, str]
+
+def config_hash(*parts: Any) -> str:
+    """Stable digest of JSON-like request parts (signal configs, weights, ...).
+
+    Keys are sorted, so two requests that differ only in dict ordering hash the same.
+    """
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def _field(last_ts: datetime, kind: str, digest: str) -> str:
+    return f"{last_ts.isoformat()}|{kind}|{digest}"
+
+class MemoryBackend:
+    """LRU of results in this process. Invalidations bump generation counters (one for
+    everything, one per asset and one per series), so a result computed concurrently
+    with an invalidation is not stored."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Series, str], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def _bump(self, scope: Hashable):
+        self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def _generation(self, series: Series) -> Tuple[int, ...]:
+        return tuple(self._generations.get(scope, 0) for scope in (None, series[0], series))
+
+    def generation(self, series: Series) -> Tuple[int, ...]:
+        with self._lock:
+            return self._generation(series)
+
+    def get(self, series: Series, field: str, ttl: float) -> Tuple[bool, Any]:
+        key = (series, field)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if time.monotonic() - entry[0] >= ttl:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, series: Series, field: str, value: Any, ttl: float, generation: Tuple[int, ...]):
+        with self._lock:
+            if self._generation(series) != generation:
+                return
+            self._entries[(series, field)] = (time.monotonic(), value)
+            self._entries.move_to_end((series, field))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, asset_id: int, timeframe: Optional[str] = None):
+        with self._lock:
+            self._bump(asset_id if timeframe is None else (asset_id, timeframe))
+            for key in [k for k in self._entries if k[0][0] == asset_id and timeframe in (None, k[0][1])]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._bump(None)
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+class RedisBackend:
+    """Results in Redis, one hash per series: <prefix><asset_id>:<timeframe> -> {field: pickle}.
+
+    Every stored value carries its write time, so the TTL is exact per entry; the hash
+    itself expires TTL seconds after its last write, which reclaims abandoned series.
+    Invalidations also INCR a generation counter (<prefix>gen:..., one for everything,
+    one per asset and one per series), and `set` writes under WATCH of those counters
+    only if they still match what `generation` read before computing, so a result
+    computed across an invalidation in any process is dropped, as with MemoryBackend.
+    """
+
+    name = "redis"
+
+    def __init__(self, client=None, url: str = "", prefix: str = "cm:results:"):
+        if client is None:
+            import redis  # optional: only needed when RESULT_CACHE_BACKEND=redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, series: Series) -> str:
+        return f"{self.prefix}{series[0]}:{series[1]}"
+
+    def _gen_keys(self, series: Series) -> List[str]:
+        gen = f"{self.prefix}gen:"
+        return [f"{gen}all", f"{gen}{series[0]}", f"{gen}{series[0]}:{series[1]}"]
+
+    def generation(self, series: Series) -> Tuple[int, ...]:
+        return tuple(int(v or 0) for v in self.client.mget(self._gen_keys(series)))
+
+    def get(self, series: Series, field: str, ttl: float) -> Tuple[bool, Any]:
+        raw = self.client.hget(self._key(series), field)
+        if raw is None:
+            return False, None
+        stored, value = pickle.loads(raw)
+        if time.time() - stored >= ttl:
+            return False, None
+        return True, value
+
+    def set(self, series: Series, field: str, value: Any, ttl: float, generation: Tuple[int, ...]):
+        from redis.exceptions import WatchError
+        key, gens = self._key(series), self._gen_keys(series)
+        blob = pickle.dumps((time.time(), value), protocol=pickle.HIGHEST_PROTOCOL)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(*gens)
+                if tuple(int(v or 0) for v in pipe.mget(gens)) != generation:
+                    return
+                pipe.multi()
+                pipe.hset(key, field, blob)
+                pipe.expire(key, max(1, int(ttl)))
+                pipe.execute()
+            except WatchError:
+                pass  # invalidated between the check and the write
+
+    def invalidate(self, asset_id: int, timeframe: Optional[str] = None):
+        if timeframe is not None:
+            keys, gen = [self._key((asset_id, timeframe))], self._gen_keys((asset_id, timeframe))[2]
+        else:
+            keys, gen = list(self.client.scan_iter(match=f"{self.prefix}{asset_id}:*")), self._gen_keys((asset_id, ""))[1]
+        pipe = self.client.pipeline()
+        pipe.incr(gen)
+        if keys:
+            pipe.delete(*keys)
+        pipe.execute()
+
+    def clear(self):
+        self.client.incr(self._gen_keys((0, ""))[0])
+        keys = [k for k in self.client.scan_iter(match=f"{self.prefix}*")
+                if not (k.decode() if isinstance(k, bytes) else k).startswith(f"{self.prefix}gen:")]
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+class ResultCache:
+    """Front for a backend: builds keys, computes misses and counts hits per kind.
+
+    Backend errors (Redis unreachable) are counted and treated as misses, so the cache
+    can only make a request slower, never fail it.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.invalidations = 0
+        self.errors = 0
+
+    def _count(self, kind: str, outcome: str):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def get(self, kind: str, asset_id: int, timeframe: str, last_ts: datetime, digest: Hashable,
+            compute: Callable[[], Any]) -> Any:
+        if self.ttl <= 0:
+            return compute()
+        series, field = (asset_id, timeframe), _field(last_ts, kind, str(digest))
+        try:
+            gen = self.backend.generation(series)
+            hit, value = self.backend.get(series, field, self.ttl)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            gen, hit = None, False
+        if hit:
+            self._count(kind, "hits")
+            return value
+        self._count(kind, "misses")
+        value = compute()
+        if gen is not None:
+            try:
+                self.backend.set(series, field, value, self.ttl, gen)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+        return value
+
+    def invalidate(self, asset_id: int, timeframe: Optional[str] = None):
+        with self._lock:
+            self.invalidations += 1
+        try:
+            self.backend.invalidate(asset_id, timeframe)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+
+    def clear(self):
+        try:
+            self.backend.clear()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            kinds = {}
+            for kind, c in self._counts.items():
+                lookups = c["hits"] + c["misses"]
+                kinds[kind] = {**c, "hit_rate": c["hits"] / lookups if lookups else 0.0}
+            hits = sum(c["hits"] for c in self._counts.values())
+            lookups = hits + sum(c["misses"] for c in self._counts.values())
+            return {"backend": self.backend.name, "entries": self.backend.size(), "hits": hits,
+                    "misses": lookups - hits, "hit_rate": hits / lookups if lookups else 0.0,
+                    "kinds": kinds, "invalidations": self.invalidations, "errors": self.errors}
+
+def make_backend(name: str):
+    if name == "memory":
+        return MemoryBackend(settings.RESULT_CACHE_MAX_ENTRIES)
+    if name == "redis":
+        return RedisBackend(url=settings.RESULT_CACHE_REDIS_URL)
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND: {name}; expected memory or redis")
+
+result_cache = ResultCache(make_backend(settings.RESULT_CACHE_BACKEND), settings.RESULT_CACHE_TTL)
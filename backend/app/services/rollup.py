@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_archive import load_ohlcv, ohlcv_archive
+from app.utils.timeframes import timeframe_ms
+
+WEEK_MS = 604_800_000
+# Exchange weeks open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * 86_400_000
+
+def bucket_start(ts_ms, step_ms: int):
+    """Open time of the `step_ms` candle containing each timestamp (ms)."""
+    offset = WEEK_OFFSET_MS if step_ms % WEEK_MS == 0 else 0
+    return (ts_ms - offset) // step_ms * step_ms + offset
+
+def bucket_open(ts: datetime, timeframe: str) -> datetime:
+    """Open time of the `timeframe` candle containing ts."""
+    ms = int(bucket_start(int(pd.Timestamp(ts).value // 1_000_000), timeframe_ms(timeframe)))
+    return pd.Timestamp(ms, unit="ms").to_pydatetime()
+
+def _to_ms(ts: pd.Series) -> np.ndarray:
+    return ts.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Aggregate an ordered OHLCV frame into `timeframe` candles in one vectorized pass.
+
+    First open, max high, min low, last close and summed volume per bucket. Bucket
+    boundaries come from `reduceat` over the run starts of the bucket ids. `count`
+    is the number of base candles in each bucket.
+    """
+    if df.empty:
+        return pd.DataFrame({c: pd.Series(dtype=df[c].dtype) for c in df.columns}).assign(count=pd.Series(dtype=np.int64))
+    buckets = bucket_start(_to_ms(df["ts"]), timeframe_ms(timeframe))
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return pd.DataFrame({
+        "ts": pd.to_datetime(buckets[starts], unit="ms"),
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+        "volume": np.add.reduceat(df["volume"].to_numpy(), starts),
+        "count": ends - starts + 1,
+    })
+
+def rollup_targets(base: str) -> List[str]:
+    """Timeframes materialized from `base` candles, per ROLLUP_BASE_TIMEFRAME / ROLLUP_TIMEFRAMES."""
+    if base != settings.ROLLUP_BASE_TIMEFRAME:
+        return []
+    base_ms = timeframe_ms(base)
+    targets = [t.strip() for t in settings.ROLLUP_TIMEFRAMES.split(",") if t.strip()]
+    return [t for t in targets if timeframe_ms(t) > base_ms and timeframe_ms(t) % base_ms == 0]
+
+def update_rollups(db: Session, asset_id: int, base: str, start: datetime, end: datetime) -> List[str]:
+    """Recompute the materialized rollup candles touched by base candles in [start, end].
+
+    Only buckets that overlap the new base candles are re-read and upserted. A bucket
+    is written when it is complete, or when it is the trailing (still forming) bucket
+    and has no missing base candles so far. A partial bucket at the start of the base
+    history is skipped, so it can never overwrite a complete candle fetched directly.
+    """
+    base_ms = timeframe_ms(base)
+    updated = []
+    for target in rollup_targets(base):
+        step = timeframe_ms(target)
+        lo = int(bucket_start(int(pd.Timestamp(start).value // 1_000_000), step))
+        hi = int(bucket_start(int(pd.Timestamp(end).value // 1_000_000), step)) + step - base_ms
+        df = load_ohlcv(db, asset_id, base, start=pd.Timestamp(lo, unit="ms").to_pydatetime(),
+                        end=pd.Timestamp(hi, unit="ms").to_pydatetime())
+        out = resample_ohlcv(df, target)
+        if out.empty:
+            continue
+        expected = step // base_ms
+        last_base = _to_ms(df["ts"])[-1]
+        bucket_ms = _to_ms(out["ts"])
+        trailing = np.zeros(len(out), dtype=bool)
+        trailing[-1] = out["count"].iloc[-1] == (last_base - bucket_ms[-1]) // base_ms + 1
+        out = out[(out["count"].to_numpy() == expected) | trailing]
+        if out.empty:
+            continue
+        upsert_ohlcv(db, asset_id, target, out.drop(columns="count").to_dict("records"), "rollup")
+        updated.append(target)
+    return updated
+
+def stored_timeframes(db: Session, asset_id: int) -> List[str]:
+    """Timeframes of the asset in the database or the archive."""
+    table = PriceOHLCV.__table__
+    stored = db.scalars(select(table.c.timeframe).where(table.c.asset_id == asset_id).distinct())
+    return sorted(set(stored) | set(ohlcv_archive.timeframes(asset_id)))
+
+def rollup_base(db: Session, asset_id: int, timeframe: str) -> Optional[str]:
+    """Coarsest stored timeframe that `timeframe` can be aggregated from (fewest rows to read)."""
+    target = timeframe_ms(timeframe)
+    bases = [tf for tf in stored_timeframes(db, asset_id)
+             if tf != timeframe and target % timeframe_ms(tf) == 0 and timeframe_ms(tf) < target
+             # weekly buckets don't align with multi-day bases other than days
+             and not (target % WEEK_MS == 0 and timeframe_ms(tf) % 86_400_000 == 0 and timeframe_ms(tf) > 86_400_000)]
+    return max(bases, key=timeframe_ms) if bases else None
+
+def load_rollup(db: Session, asset_id: int, timeframe: str, limit: int) -> pd.DataFrame:
+    """Newest `limit` candles of any timeframe, aggregated on demand from stored base candles."""
+    base = rollup_base(db, asset_id, timeframe)
+    if base is None:
+        raise ValueError(f"No stored timeframe can be rolled up into {timeframe}")
+    ratio = timeframe_ms(timeframe) // timeframe_ms(base)
+    # one extra bucket of base rows so the oldest returned candle is not cut short
+    df = load_ohlcv(db, asset_id, base, limit=(limit + 1) * ratio)
+    return resample_ohlcv(df, timeframe).tail(limit).reset_index(drop=True)
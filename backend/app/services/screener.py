@@ -0,0 +1,60 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import Watchlist
+from app.services.asset_registry import AssetRef, asset_registry
+from app.services.ohlcv_archive import load_ohlcv_many
+from app.services.signal_engine import evaluate_signals
+
+def resolve_assets(db: Session, symbols: Optional[List[str]] = None, watchlist: bool = False,
+                   category: Optional[str] = None) -> List[AssetRef]:
+    """Assets selected by explicit symbols, the watchlist or a category; all active assets by default.
+
+    Resolved against the shared asset registry, so only the watchlist costs a query.
+    """
+    index = asset_registry.all(db)
+    if symbols:
+        wanted = [asset_registry.get(db, s) for s in dict.fromkeys(s.upper() for s in symbols)]
+        index = {a.symbol: a for a in wanted if a is not None}
+    assets = asset_registry.active(index)
+    if watchlist:
+        listed = set(db.scalars(select(Watchlist.symbol)))
+        assets = [a for a in assets if a.symbol in listed]
+    if category:
+        assets = [a for a in assets if a.category == category]
+    return assets
+
+def _latest(df: pd.DataFrame, configs: List[Dict]):
+    values, triggers = [], []
+    for _, value, trigger in evaluate_signals(df, configs):
+        v = float(value[-1])
+        values.append(None if math.isnan(v) else v)
+        triggers.append(int(trigger[-1]))
+    return values, triggers
+
+def screen(db: Session, assets: List[AssetRef], timeframe: str, configs: List[Dict], lookback: int = 500) -> Dict:
+    """Latest value/trigger of every config for every asset, as a symbol x signal matrix.
+
+    All series come from one bulk query over the newest `lookback` candles per asset,
+    topped up from the archive where the database holds fewer, and are evaluated
+    concurrently. Recursive indicators (EMA, MACD, ADX) are warmed up
+    on that window only, so `lookback` should be a few times their longest period.
+    Nothing is written; this is a read-only screen.
+    """
+    frames = load_ohlcv_many(db, [a.id for a in assets], timeframe, lookback)
+    ready = [a for a in assets if a.id in frames]
+    with ThreadPoolExecutor(max_workers=settings.SCREENER_WORKERS) as pool:
+        rows = list(pool.map(lambda a: _latest(frames[a.id], configs), ready))
+    return {
+        "timeframe": timeframe,
+        "signals": [{"name": c["name"], "params": c.get("params") or {}} for c in configs],
+        "symbols": [a.symbol for a in ready],
+        "ts": [frames[a.id]["ts"].iloc[-1].isoformat() for a in ready],
+        "value": [r[0] for r in rows],
+        "trigger": [r[1] for r in rows],
+        "missing": [a.symbol for a in assets if a.id not in frames],
+    }
@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.ohlcv_archive import load_history
+from app.services.ohlcv_repo import load_ohlcv
+
+Key = Tuple[int, str]
+
+class SeriesCache:
+    """LRU of OHLCV frames keyed by (asset_id, timeframe), bounded by total bytes.
+
+    A miss loads the whole series, archived history included. A hit only queries rows
+    at or after the cached tail: the last candle is re-read
+    because it may still be forming, anything newer is appended. Writes that can touch
+    older candles (backfills) must call `invalidate`. Returned frames are shared and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Key, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._generations: Dict[Key, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.appended = 0
+        self.evictions = 0
+
+    def get(self, db: Session, asset_id: int, timeframe: str) -> pd.DataFrame:
+        key = (asset_id, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            gen = self._generations.get(key, 0)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            df = load_history(db, asset_id, timeframe)
+        else:
+            df = self._refresh_tail(db, key, entry[0])
+            if df is entry[0]:
+                return df
+        self._store(key, df, gen)
+        return df
+
+    def _refresh_tail(self, db: Session, key: Key, cached: pd.DataFrame) -> pd.DataFrame:
+        if cached.empty:
+            return load_history(db, *key)
+        last_ts = cached["ts"].iloc[-1]
+        tail = load_ohlcv(db, *key, start=last_ts.to_pydatetime())
+        if len(tail) == 1 and tail.iloc[0].equals(cached.iloc[-1]):
+            return cached
+        with self._lock:
+            self.appended += max(0, len(tail) - 1)
+        head = cached.iloc[:-1] if len(tail) and tail["ts"].iloc[0] == last_ts else cached
+        return pd.concat([head, tail], ignore_index=True)
+
+    def _store(self, key: Key, df: pd.DataFrame, gen: int):
+        size = int(df.memory_usage(index=True).sum())
+        with self._lock:
+            # a backfill invalidated this key while we were reading; don't resurrect stale data
+            if self._generations.get(key, 0) != gen:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def invalidate(self, asset_id: int, timeframe: Optional[str] = None):
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == asset_id and (timeframe is None or k[1] == timeframe)]
+            if timeframe is not None:
+                keys.append((asset_id, timeframe))
+            for key in set(keys):
+                self._generations[key] = self._generations.get(key, 0) + 1
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "appended_rows": self.appended, "evictions": self.evictions,
+            }
+
+series_cache = SeriesCache(settings.OHLCV_CACHE_MAX_BYTES)
+
+def cached_ohlcv(db: Session, asset_id: int, timeframe: str,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+    """Full cached series for asset/timeframe, optionally sliced to [start, end]."""
+    df = series_cache.get(db, asset_id, timeframe)
+    if start is None and end is None:
+        return df
+    ts = df["ts"]
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    return df[mask].reset_index(drop=True)
@@ -1,8 +1,15 @@
 import importlib
+from datetime import datetime
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
-from app.models import Asset, PriceOHLCV, SignalRun
-from typing import List, Dict
+from app.plugins.signals.graph import SeriesGraph
+from app.services.asset_registry import asset_registry
+from app.services.result_cache import config_hash, result_cache
+from app.services.series_cache import cached_ohlcv
+from app.services.signal_store import signal_writer
+from app.services.stream_state import stream_registry
+from typing import List, Dict, Optional
 
 SIGNAL_IMPLS = {
     "ema": "app.plugins.signals.ema:EMA",
@@ -20,39 +27,57 @@ def _load_class(dotted: str):
     m = importlib.import_module(mod)
     return getattr(m, cls)()
 
-def _to_df(rows):
-    data = [{
-        "ts": r.ts, "open": r.open, "high": r.high, "low": r.low,
-        "close": r.close, "volume": r.volume
-    } for r in rows]
-    df = pd.DataFrame(data).sort_values("ts").reset_index(drop=True)
-    return df
+def evaluate_signals(df: pd.DataFrame, configs: List[Dict], graph: Optional[SeriesGraph] = None):
+    """Evaluate every config against one shared SeriesGraph.
 
-def run_signals(db: Session, symbol: str, timeframe: str, configs: List[Dict]):
-    asset = db.query(Asset).filter(Asset.symbol==symbol).first()
-    if not asset:
-        raise ValueError(f"Unknown asset: {symbol}")
-    rows = db.query(PriceOHLCV).filter(
-        PriceOHLCV.asset_id==asset.id,
-        PriceOHLCV.timeframe==timeframe
-    ).order_by(PriceOHLCV.ts).all()
-    if not rows:
-        raise ValueError("No data for asset/timeframe; run backfill first.")
-    df = _to_df(rows)
-    results = {}
+    Returns [(name, value, trigger)] in config order, with float64/int arrays
+    aligned with df rows.
+    """
+    if graph is None:
+        graph = SeriesGraph(df)
+    out = []
+    for cfg in configs:
+        impl = _load_class(SIGNAL_IMPLS[cfg["name"]])
+        cols = impl.evaluate(graph, **(cfg.get("params") or {}))
+        value = np.asarray(cols["value"], dtype=np.float64)
+        trigger = np.asarray(cols.get("trigger", 0), dtype=np.int64)
+        out.append((cfg["name"], value, np.broadcast_to(trigger, value.shape)))
+    return out
+
+def latest_signals(asset_id: int, timeframe: str, df: pd.DataFrame, configs: List[Dict]):
+    """[(name, value, trigger)] for the newest candle, advancing incremental state when the
+    plugin supports streaming and falling back to a batch evaluation otherwise."""
+    out = []
     for cfg in configs:
         impl = _load_class(SIGNAL_IMPLS[cfg["name"]])
-        out = impl.compute(df.copy(), **(cfg.get("params") or {}))
-        results[cfg["name"]] = out[["ts","value","trigger"]].tail(1).to_dict(orient="records")[0]
-        last = out.tail(1).iloc[0]
-        db.add(SignalRun(
-            asset_id=asset.id, timeframe=timeframe, name=cfg["name"],
-            ts=last["ts"], value=float(last["value"]), trigger=int(last.get("trigger", 0))
-        ))
-    db.commit()
-    return results
-
-def get_dataframe(db: Session, symbol: str, timeframe: str):
-    asset = db.query(Asset).filter(Asset.symbol==symbol).first()
-    rows = db.query(PriceOHLCV).filter(PriceOHLCV.asset_id==asset.id, PriceOHLCV.timeframe==timeframe).order_by(PriceOHLCV.ts).all()
-    return _to_df(rows)
+        try:
+            value, trigger = stream_registry.latest(impl, asset_id, timeframe, cfg, df)
+        except NotImplementedError:
+            _, values, triggers = evaluate_signals(df, [cfg])[0]
+            value, trigger = values[-1], triggers[-1]
+        out.append((cfg["name"], float(value), int(trigger)))
+    return out
+
+def last_candle(db: Session, symbol: str, timeframe: str):
+    """(asset, cached series, ts of its newest candle); raises when there is no data."""
+    asset = asset_registry.require(db, symbol)
+    df = cached_ohlcv(db, asset.id, timeframe)
+    if df.empty:
+        raise ValueError("No data for asset/timeframe; run backfill first.")
+    return asset, df, df["ts"].iloc[-1]
+
+def run_signals(db: Session, symbol: str, timeframe: str, configs: List[Dict]):
+    asset, df, last_ts = last_candle(db, symbol, timeframe)
+
+    def compute():
+        latest = latest_signals(asset.id, timeframe, df, configs)
+        # persisted in the background; a rerun on the same candle replaces the row
+        signal_writer.submit(asset.id, timeframe, last_ts.to_pydatetime(), latest)
+        return {name: {"ts": last_ts, "value": value, "trigger": trigger} for name, value, trigger in latest}
+
+    return result_cache.get("signals", asset.id, timeframe, last_ts, config_hash(configs), compute)
+
+def get_dataframe(db: Session, symbol: str, timeframe: str,
+                  start: Optional[datetime] = None, end: Optional[datetime] = None):
+    asset = asset_registry.require(db, symbol)
+    return cached_ohlcv(db, asset.id, timeframe, start=start, end=end)
@@ -0,0 +1,189 @@
+"""Batched persistence of signal results and the latest-signal table.
+
+`run_signals` hands its results to `signal_writer` instead of inserting and
+committing on the request path. The writer keeps them in memory keyed by
+(asset_id, timeframe, name, ts), so a signal rerun on the same candle replaces
+the pending row rather than adding one, and a background thread writes the
+buffer every SIGNAL_FLUSH_INTERVAL seconds (sooner once SIGNAL_FLUSH_MAX_ROWS are
+pending) as two upserts: the history rows into signal_run and the newest row of
+each signal into signal_latest, so the current state of every asset is one read.
+
+History is kept short by `maintain_signal_runs`: runs past SIGNAL_RUN_RETENTION_DAYS
+are deleted, and runs past SIGNAL_RUN_COMPACT_DAYS are reduced to the ones whose
+trigger differs from the run before it.
+"""
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, or_, select, tuple_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import SignalLatest, SignalRun
+from app.services.ingest import dialect_insert
+
+log = logging.getLogger(__name__)
+
+Key = Tuple[int, str, str, datetime]
+
+def _upserts(db: Session):
+    insert = dialect_insert(db)
+    run = insert(SignalRun.__table__)
+    run = run.on_conflict_do_update(
+        index_elements=["asset_id", "timeframe", "name", "ts"],
+        set_={"value": run.excluded.value, "trigger": run.excluded.trigger},
+        # an identical rerun leaves the stored row untouched
+        where=or_(SignalRun.value.is_distinct_from(run.excluded.value),
+                  SignalRun.trigger.is_distinct_from(run.excluded.trigger)),
+    )
+    latest = insert(SignalLatest.__table__)
+    latest = latest.on_conflict_do_update(
+        index_elements=["asset_id", "timeframe", "name"],
+        set_={"ts": latest.excluded.ts, "value": latest.excluded.value, "trigger": latest.excluded.trigger},
+        # a late flush of an older candle must not roll the latest state back
+        where=SignalLatest.ts <= latest.excluded.ts,
+    )
+    return run, latest
+
+class SignalRunWriter:
+    """Buffers signal results and writes them in batches from a daemon thread.
+
+    `submit` only touches the in-memory buffer, so it never waits on the database.
+    With `autostart` the thread is started by the first submit, otherwise by `start`
+    or never, leaving flushes to the caller. `flush` may also be called directly
+    (reads of signal_latest do, to see results submitted just before). Rows of a
+    failed flush are put back unless a newer result for the same key arrived.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 interval: float = settings.SIGNAL_FLUSH_INTERVAL,
+                 max_rows: int = settings.SIGNAL_FLUSH_MAX_ROWS, autostart: bool = True):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_rows = max_rows
+        self.autostart = autostart
+        self._pending: Dict[Key, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.deduped = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def submit(self, asset_id: int, timeframe: str, ts: datetime,
+               results: Iterable[Tuple[str, float, int]]):
+        """Queue [(name, value, trigger)] computed on the candle at ts."""
+        with self._lock:
+            for name, value, trigger in results:
+                key = (asset_id, timeframe, name, ts)
+                if key in self._pending:
+                    self.deduped += 1
+                self._pending[key] = (float(value), int(trigger))
+                self.submitted += 1
+            full = len(self._pending) >= self.max_rows
+        if self.autostart:
+            self.start()
+        if full:
+            self._wake.set()
+
+    def start(self):
+        """Start the flush thread unless it is running."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="signal-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Signal run flush failed; %d rows kept for the next one", len(self._pending))
+
+    def flush(self) -> int:
+        """Write everything pending; returns the number of rows sent."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            rows = [{"asset_id": a, "timeframe": tf, "name": n, "ts": ts, "value": v, "trigger": t}
+                    for (a, tf, n, ts), (v, t) in batch.items()]
+            newest = {}
+            for row in rows:
+                key = (row["asset_id"], row["timeframe"], row["name"])
+                if key not in newest or row["ts"] > newest[key]["ts"]:
+                    newest[key] = row
+            try:
+                with self.session_factory() as db:
+                    run, latest = _upserts(db)
+                    db.execute(run, rows)
+                    db.execute(latest, list(newest.values()))
+                    db.commit()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                raise
+            with self._lock:
+                self.written += len(rows)
+                self.flushes += 1
+            return len(rows)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"pending": len(self._pending), "submitted": self.submitted, "deduped": self.deduped,
+                    "written": self.written, "flushes": self.flushes, "errors": self.errors}
+
+signal_writer = SignalRunWriter()
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        signal_writer.flush()
+    except Exception:
+        log.exception("Signal runs pending at exit were not written")
+
+def latest_states(db: Session, timeframe: Optional[str] = None,
+                  names: Optional[List[str]] = None) -> List[SignalLatest]:
+    """Current signal rows, optionally of one timeframe and some signal names."""
+    stmt = select(SignalLatest)
+    if timeframe:
+        stmt = stmt.where(SignalLatest.timeframe == timeframe)
+    if names:
+        stmt = stmt.where(SignalLatest.name.in_(names))
+    return list(db.scalars(stmt.order_by(SignalLatest.asset_id, SignalLatest.timeframe, SignalLatest.name)))
+
+def compact_signal_runs(db: Session, cutoff: datetime) -> int:
+    """Delete runs before cutoff whose trigger equals the previous run's of the same signal.
+
+    What survives is every trigger transition, which is what history of a signal is read
+    for; the first run of each signal is always kept.
+    """
+    t = SignalRun.__table__
+    key = (t.c.asset_id, t.c.timeframe, t.c.name, t.c.ts)
+    prev = func.lag(t.c.trigger).over(partition_by=key[:3], order_by=t.c.ts).label("prev")
+    runs = select(*key, t.c.trigger, prev).subquery()
+    repeats = select(runs.c.asset_id, runs.c.timeframe, runs.c.name, runs.c.ts).where(
+        runs.c.ts < cutoff, runs.c.prev == runs.c.trigger)
+    return db.execute(delete(SignalRun).where(tuple_(*key).in_(repeats))).rowcount
+
+def maintain_signal_runs(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Apply SIGNAL_RUN_RETENTION_DAYS and SIGNAL_RUN_COMPACT_DAYS; returns the rows removed."""
+    now = now or datetime.utcnow()
+    report = {"deleted": 0, "compacted": 0}
+    if settings.SIGNAL_RUN_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.SIGNAL_RUN_RETENTION_DAYS)
+        report["deleted"] = db.execute(delete(SignalRun).where(SignalRun.ts < cutoff)).rowcount
+    if settings.SIGNAL_RUN_COMPACT_DAYS:
+        report["compacted"] = compact_signal_runs(db, now - timedelta(days=settings.SIGNAL_RUN_COMPACT_DAYS))
+    db.commit()
+    return report
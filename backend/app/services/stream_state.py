@@ -0,0 +1,84 @@
+import copy
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from app.core.config import settings
+from app.plugins.signals.streaming import SignalStream
+
+Key = Tuple[int, str, str, str]
+
+def _key(asset_id: int, timeframe: str, cfg: Dict) -> Key:
+    return (asset_id, timeframe, cfg["name"], json.dumps(cfg.get("params") or {}, sort_keys=True))
+
+class StreamRegistry:
+    """Incremental indicator state per (asset_id, timeframe, signal, params).
+
+    Each entry holds a stream that has consumed every candle up to, but not including,
+    the newest one, plus the open time of the last candle it consumed. A request only
+    feeds the candles after that point, which costs O(1) per new candle. The newest
+    candle may still be forming, so it is applied to a throwaway copy of the state
+    and never committed. If the committed candle is no longer in the series, the
+    stream is rebuilt with the plugin's `seed` over the history, which replays only
+    a bounded warmup or starts from the batch values instead of every candle.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, Tuple[SignalStream, Optional[pd.Timestamp]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.advanced = 0
+
+    def latest(self, impl, asset_id: int, timeframe: str, cfg: Dict, df: pd.DataFrame) -> Tuple[float, int]:
+        """(value, trigger) of `impl` on the newest candle of `df`."""
+        key = _key(asset_id, timeframe, cfg)
+        with self._lock:
+            # take the entry out so concurrent requests never mutate the same stream
+            entry = self._entries.pop(key, None)
+        ts = df["ts"]
+        n = len(df)
+        start = None
+        if entry is not None:
+            stream, committed = entry
+            if committed is None:
+                start = 0
+            else:
+                pos = int(ts.searchsorted(committed))
+                if pos < n and ts.iloc[pos] == committed:
+                    start = pos + 1
+        if start is None or start > n - 1:
+            stream = impl.seed(df.iloc[:n - 1], **(cfg.get("params") or {}))
+            start = n - 1
+            self.rebuilds += 1
+        cols = [df[c].to_numpy() for c in ("open", "high", "low", "close", "volume")]
+        for o, h, l, c, v in zip(*(col[start:n - 1] for col in cols)):
+            stream.update({"open": o, "high": h, "low": l, "close": c, "volume": v})
+        self.advanced += max(0, n - 1 - start)
+        committed = ts.iloc[n - 2] if n >= 2 else None
+        provisional = copy.deepcopy(stream)
+        last = {k: col[n - 1] for k, col in zip(("open", "high", "low", "close", "volume"), cols)}
+        result = provisional.update(last)
+        with self._lock:
+            self._entries[key] = (stream, committed)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, asset_id: int, timeframe: Optional[str] = None, since: Optional[datetime] = None):
+        """Drop the asset's streams, or only those that committed a candle at or after
+        `since` (candles from there on were rewritten); the rest advance over the new tail."""
+        with self._lock:
+            for key, (_, committed) in list(self._entries.items()):
+                if key[0] != asset_id or (timeframe is not None and key[1] != timeframe):
+                    continue
+                if since is None or committed is None or committed >= since:
+                    del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "rebuilds": self.rebuilds, "advanced_candles": self.advanced}
+
+stream_registry = StreamRegistry(settings.SIGNAL_STATE_MAX_ENTRIES)
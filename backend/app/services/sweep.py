@@ -0,0 +1,193 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.plugins.signals.graph import SeriesGraph
+from app.services.backtest import YEAR_MS, simulate
+from app.services.signal_engine import evaluate_signals
+from app.utils.timeframes import TIMEFRAME_MS
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+METRICS = ("final_equity", "return", "trades", "max_drawdown", "sharpe")
+
+def expand_combinations(signals: List[Dict], mode: str = "grid", samples: int = 100,
+                        seed: Optional[int] = None, limit: Optional[int] = None) -> List[List[Dict]]:
+    """Signal config lists for every grid point, or `samples` distinct random points.
+
+    `signals` is [{"name", "params": {param: [candidate values]}}]. Grid points are
+    numbered in mixed radix, so random mode samples indices without materializing
+    the whole grid.
+    """
+    axes = [(i, p, list(vals)) for i, s in enumerate(signals) for p, vals in (s.get("params") or {}).items()]
+    if any(not vals for _, _, vals in axes):
+        raise ValueError("Every swept param needs at least one value")
+    total = math.prod(len(vals) for _, _, vals in axes)
+    if mode == "grid":
+        indices = range(total)
+    else:
+        indices = sorted(random.Random(seed).sample(range(total), min(samples, total)))
+    limit = limit or settings.SWEEP_MAX_COMBINATIONS
+    if len(indices) > limit:
+        raise ValueError(f"Sweep has {len(indices)} combinations, limit is {limit}")
+    combos = []
+    for idx in indices:
+        configs = [{"name": s["name"], "params": {}} for s in signals]
+        for i, p, vals in reversed(axes):
+            idx, k = divmod(idx, len(vals))
+            configs[i]["params"][p] = vals[k]
+        combos.append(configs)
+    return combos
+
+class SharedSeries:
+    """OHLCV float64 columns copied once into a shared memory block workers map without copying."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.shm = SharedMemory(create=True, size=max(1, 8 * len(COLUMNS) * self.n))
+        arr = np.ndarray((len(COLUMNS), self.n), dtype=np.float64, buffer=self.shm.buf)
+        arr[:] = df[list(COLUMNS)].to_numpy(dtype=np.float64).T
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+# Per-process state set up by the pool initializer
+_worker: Dict = {}
+
+def _attach(shm_name: str, n: int, opts: Dict):
+    shm = SharedMemory(name=shm_name)
+    arr = np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+    df = pd.DataFrame({c: arr[i] for i, c in enumerate(COLUMNS)}, copy=False)
+    _worker.update(shm=shm, df=df, **opts)
+
+def _evaluate_chunk(chunk: List[Tuple[int, List[Dict]]]) -> List[Tuple[int, Dict]]:
+    df = _worker["df"]
+    close = df["close"].to_numpy()
+    # neighbouring grid points share most primitives (e.g. the same slow EMA), so one graph per chunk
+    graph = SeriesGraph(df)
+    out = []
+    for idx, configs in chunk:
+        triggers = [t for _, _, t in evaluate_signals(df, configs, graph)]
+        agg = np.sum(triggers, axis=0) if triggers else np.zeros(len(df), dtype=np.int64)
+        res = simulate(close, agg, _worker["initial_cash"], _worker["fee_bps"], _worker["periods_per_year"])
+        out.append((idx, {k: res[k] for k in METRICS}))
+    return out
+
+@dataclass
+class SweepJob:
+    symbol: str
+    timeframe: str
+    mode: str
+    rank_by: str
+    initial_cash: float
+    fee_bps: float
+    workers: int
+    combos: List[List[Dict]] = field(default_factory=list, repr=False)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"  # pending, running, done, cancelled, error
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    completed: int = 0
+    error: Optional[str] = None
+    results: List[Dict] = field(default_factory=list, repr=False)
+
+    def ranked(self) -> List[Dict]:
+        # drawdown is the only metric where lower is better
+        reverse = self.rank_by != "max_drawdown"
+        rows = sorted(self.results, key=lambda r: r[self.rank_by], reverse=reverse)
+        return [{"rank": i + 1, **r} for i, r in enumerate(rows)]
+
+    def snapshot(self, top: int = 50) -> Dict:
+        return {
+            "id": self.id, "status": self.status, "symbol": self.symbol, "timeframe": self.timeframe,
+            "mode": self.mode, "rank_by": self.rank_by, "workers": self.workers,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "total": len(self.combos), "completed": self.completed, "error": self.error,
+            "results": self.ranked()[:top],
+        }
+
+# Process-local registry so progress can be polled while a sweep runs
+SWEEPS: Dict[str, SweepJob] = {}
+_RUNNING: Dict[str, asyncio.Task] = {}
+
+def create_sweep(symbol: str, timeframe: str, signals: List[Dict], mode: str = "grid", samples: int = 100,
+                 seed: Optional[int] = None, rank_by: str = "sharpe", initial_cash: float = 10000.0,
+                 fee_bps: float = 10.0, workers: Optional[int] = None) -> SweepJob:
+    job = SweepJob(symbol=symbol, timeframe=timeframe, mode=mode, rank_by=rank_by,
+                   initial_cash=initial_cash, fee_bps=fee_bps,
+                   workers=workers or settings.SWEEP_WORKERS or os.cpu_count() or 1,
+                   combos=expand_combinations(signals, mode, samples, seed))
+    SWEEPS[job.id] = job
+    return job
+
+def _chunks(combos: List[List[Dict]], workers: int) -> List[List[Tuple[int, List[Dict]]]]:
+    # several chunks per worker keeps cores busy and bounds how long a cancel waits
+    size = max(1, min(32, math.ceil(len(combos) / (workers * 4))))
+    indexed = list(enumerate(combos))
+    return [indexed[i:i + size] for i in range(0, len(indexed), size)]
+
+async def run_sweep(job: SweepJob, df: pd.DataFrame):
+    """Evaluate every combination of the job over `df` in a process pool.
+
+    The series is placed in shared memory once and each worker maps it at startup,
+    so only parameter dicts and metric rows cross process boundaries. Results are
+    appended as chunks finish. Cancelling the task stops dispatching new chunks.
+    """
+    step_ms = TIMEFRAME_MS.get(job.timeframe)
+    opts = {"initial_cash": job.initial_cash, "fee_bps": job.fee_bps,
+            "periods_per_year": YEAR_MS / step_ms if step_ms else None}
+    loop = asyncio.get_running_loop()
+    series = pool = None
+    job.status = "running"
+    try:
+        series = SharedSeries(df)
+        # spawn: forking a server process that runs threads and an event loop is unsafe
+        pool = ProcessPoolExecutor(max_workers=job.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_attach, initargs=(series.name, series.n, opts))
+        futures = [loop.run_in_executor(pool, _evaluate_chunk, c) for c in _chunks(job.combos, job.workers)]
+        for fut in asyncio.as_completed(futures):
+            for idx, metrics in await fut:
+                job.results.append({"signals": job.combos[idx], **metrics})
+                job.completed += 1
+        job.status = "done"
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+    except Exception as e:
+        job.status = "error"
+        job.error = str(e)
+    finally:
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+        if series is not None:
+            series.close()
+        job.finished_at = datetime.utcnow()
+    return job
+
+def start_sweep(job: SweepJob, df: pd.DataFrame) -> asyncio.Task:
+    """Schedule the sweep on the running event loop and return immediately."""
+    task = asyncio.create_task(run_sweep(job, df))
+    _RUNNING[job.id] = task
+    task.add_done_callback(lambda _: _RUNNING.pop(job.id, None))
+    return task
+
+def cancel_sweep(job_id: str) -> bool:
+    task = _RUNNING.get(job_id)
+    if task is None:
+        return False
+    task.cancel()
+    return True
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db import Base, async_url
+from app.models import Asset
+from app.services.asset_registry import asset_registry
+from app.services.result_cache import result_cache
+from app.services.series_cache import series_cache
+from app.services import signal_engine, signal_store
+from app.routers import data as data_router, signals as signals_router
+
+@pytest.fixture(autouse=True)
+def _fresh_process_caches(monkeypatch):
+    """Every test gets its own database, so process-wide caches keyed by asset id must not carry over.
+
+    The global signal writer is swapped for one that never starts its thread, so results
+    of a test are not flushed (by it or at exit) into the DATABASE_URL database.
+    """
+    asset_registry.invalidate(); result_cache.clear(); series_cache.clear()
+    writer = signal_store.SignalRunWriter(autostart=False)
+    for module in (signal_store, signal_engine, signals_router, data_router):
+        monkeypatch.setattr(module, "signal_writer", writer)
+    yield
+    asset_registry.invalidate(); result_cache.clear(); series_cache.clear()
+
+@pytest.fixture
+def db():
+    """In-memory SQLite session seeded with a single BTC asset (id=1)."""
+    # one shared connection so worker threads (asyncio.to_thread) see the same in-memory db
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Asset(symbol="BTC", name="Bitcoin", binance_symbol="BTCUSDT")); session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Sync session plus an aiosqlite session factory over one SQLite file, seeded like `db`."""
+    url = f"sqlite:///{tmp_path}/test.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Asset(symbol="BTC", name="Bitcoin", binance_symbol="BTCUSDT")); session.commit()
+    async_engine = create_async_engine(async_url(url))
+    yield session, async_sessionmaker(async_engine, expire_on_commit=False)
+    session.close()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+import numpy as np
+import pytest
+from app.models import Alert
+from app.services.alert_rules import RuleError, compile_rule, signal_key
+from app.services.alerts import AlertEngine, WebhookDispatcher
+from app.services.ingest import upsert_ohlcv
+from app.services.series_cache import series_cache
+from app.services.stream_state import stream_registry
+
+def test_compile_rules():
+    rule = compile_rule("rsi<30 and ema_cross_up")
+    assert rule.signals == {signal_key("rsi", {}), signal_key("ema", {})}
+    env = {signal_key("rsi", {}): (25.0, 1), signal_key("ema", {}): (100.0, 1)}
+    assert rule(env)
+    env[signal_key("ema", {})] = (100.0, 0)
+    assert not rule(env)
+
+    rule = compile_rule("not (rsi(period=7) >= 70 or close > ema(period=50).value) and macd.trigger == 1")
+    rsi7, ema50, macd = signal_key("rsi", {"period": 7.0}), signal_key("ema", {"period": 50.0}), signal_key("macd", {})
+    assert rule.signals == {rsi7, ema50, macd}
+    assert rule({rsi7: (50.0, 0), ema50: (110.0, 0), macd: (0.1, 1), "close": 100.0})
+    assert not rule({rsi7: (50.0, 0), ema50: (90.0, 0), macd: (0.1, 1), "close": 100.0})
+    assert not compile_rule("rsi < 30")({signal_key("rsi", {}): (float("nan"), 0)})
+
+    for bad in ["rsi <", "foo > 1", "rsi < 30 and", "rsi(period=x) < 3", "(rsi < 30", "rsi.bogus > 1"]:
+        with pytest.raises(RuleError):
+            compile_rule(bad)
+
+def sink(received, fail_first=False):
+    attempts = {}
+
+    def handler(request: httpx.Request):
+        key = request.headers["Idempotency-Key"]
+        attempts[key] = attempts.get(key, 0) + 1
+        if fail_first and attempts[key] == 1:
+            return httpx.Response(503)
+        received.append(request)
+        return httpx.Response(200)
+    return httpx.MockTransport(handler)
+
+def seed_falling(db, n=200):
+    start = datetime(2024, 1, 1)
+    close = 200 - np.arange(n) * 0.5
+    upsert_ohlcv(db, 1, "1h", [{"ts": start + timedelta(hours=h), "open": c, "high": c + 0.1, "low": c - 0.1,
+                                "close": c, "volume": 1.0} for h, c in enumerate(close)], "binance")
+
+def test_engine_shares_signals_and_fires_once_per_candle(file_db):
+    db, async_session = file_db
+    series_cache.clear(); stream_registry.invalidate(1)
+    seed_falling(db)
+    rules = ["rsi < 30", "rsi(period=7) < 30 and close < 150", "macd > 0", "rsi > 70 or williams_r_sell"]
+    for i in range(2000):
+        db.add(Alert(id=f"a{i}", symbol="BTC", timeframe="1h", rule=rules[i % 4], webhook=f"http://sink/{i % 4}"))
+    db.commit()
+    received = []
+    engine = AlertEngine(lambda: type(db)(bind=db.get_bind()), async_session,
+                         WebhookDispatcher(sink(received, fail_first=True), backoff=0))
+
+    async def go():
+        first = await engine.process("BTC", "1h")
+        assert engine.signal_evaluations == 4  # rsi, rsi(7), macd, williams_r once for all 2000 alerts
+        again = await engine.process("BTC", "1h", force=True)
+        await engine.dispatcher.aclose()
+        return first, again
+
+    first, again = asyncio.run(go())
+    # falling prices: RSI pinned low, MACD negative, Williams %R not overbought
+    assert first == 1000 and again == 0
+    assert len(received) == 1000 and engine.dispatcher.failed == 0
+    assert {r.url.path for r in received} == {"/0", "/1"}
+    db.expire_all()
+    assert db.get(Alert, "a0").last_fired_ts == datetime(2024, 1, 1) + timedelta(hours=199)
+    series_cache.clear(); stream_registry.invalidate(1)
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import event, func, select
+from app.models import Asset
+from app.services.asset_registry import AssetRegistry, asset_registry
+from app.services.data_loader import DEFAULT_ASSETS, ensure_assets
+from app.services.signal_engine import get_dataframe
+
+def count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    return statements
+
+def test_ensure_assets_is_one_statement_and_skips_unchanged(db):
+    db.add(Asset(symbol="ETH", name="Old name")); db.commit()
+    statements = count_statements(db)
+    assert ensure_assets(db) == len(DEFAULT_ASSETS)
+    assert len(statements) == 1
+    assert db.scalar(select(func.count()).select_from(Asset)) == len(DEFAULT_ASSETS)
+    eth = db.scalar(select(Asset).where(Asset.symbol == "ETH"))
+    assert eth.name == "Ethereum" and eth.binance_symbol == "ETHUSDT"
+    # existing ids are kept, so stored candles stay attached
+    assert db.scalar(select(Asset.id).where(Asset.symbol == "BTC")) == 1
+
+    assert ensure_assets(db) == 0
+    db.execute(Asset.__table__.update().where(Asset.symbol == "SOL").values(coingecko_id=None)); db.commit()
+    assert ensure_assets(db) == 1
+
+def test_registry_serves_hits_without_queries(db):
+    registry = AssetRegistry(ttl=60)
+    assert registry.get(db, "btc").binance_symbol == "BTCUSDT"
+    statements = count_statements(db)
+    for _ in range(3):
+        assert registry.get(db, "BTC").id == 1
+    assert statements == []
+    assert registry.stats() == {"assets": 1, "hits": 4, "misses": 0, "loads": 1}
+
+def test_registry_misses_and_invalidation(db):
+    registry = AssetRegistry(ttl=60)
+    before = registry.all(db)
+    db.add(Asset(symbol="ETH", name="Ethereum")); db.commit()
+    # a symbol created elsewhere is found by the miss lookup and kept
+    assert registry.get(db, "ETH").id == 2
+    assert list(before) == ["BTC"] and "ETH" in registry.all(db)  # indexes already handed out don't change
+    assert registry.get(db, "NOPE") is None
+    with pytest.raises(ValueError, match="Unknown asset: NOPE"):
+        registry.require(db, "NOPE")
+    assert registry.stats()["assets"] == 2
+
+    db.execute(Asset.__table__.update().where(Asset.symbol == "ETH").values(is_active=False)); db.commit()
+    assert registry.get(db, "ETH").is_active
+    registry.invalidate()
+    assert not registry.get(db, "ETH").is_active
+    assert [a.symbol for a in registry.active(registry.all(db))] == ["BTC"]
+
+def test_signal_lookups_go_through_registry(db):
+    get_dataframe(db, "BTC", "1h")
+    hits = asset_registry.stats()["hits"]
+    statements = count_statements(db)
+    get_dataframe(db, "BTC", "1h")
+    assert not any("FROM assets" in s for s in statements)
+    assert asset_registry.stats()["hits"] == hits + 1
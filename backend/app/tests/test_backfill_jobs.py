@@ -0,0 +1,92 @@
+import asyncio
+import httpx
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db import Base, async_url
+from app.models import Asset, PriceOHLCV
+from app.schemas import BatchBackfillRequest
+from app.plugins.connectors.binance import BinanceConnector
+from app.services.backfill_jobs import create_job, run_job
+from app.utils.rate_limit import WeightBudget
+from app.utils.timeframes import TIMEFRAME_MS
+
+def kline_server(requests):
+    """Mock /klines: serves consecutive candles for [startTime, endTime], 1000 per page."""
+    def handler(request: httpx.Request):
+        p = request.url.params
+        requests.append(p["symbol"])
+        if p["symbol"] == "BADUSDT":
+            return httpx.Response(400, json={"code": -1121, "msg": "Invalid symbol."})
+        step = TIMEFRAME_MS[p["interval"]]
+        first = -(-int(p["startTime"]) // step) * step
+        opens = range(first, int(p["endTime"]) + 1, step)
+        return httpx.Response(200, json=[
+            [t, "1.0", "2.0", "0.5", "1.5", "10.0", t + step - 1] for t in list(opens)[:int(p["limit"])]
+        ])
+    return httpx.MockTransport(handler)
+
+def test_fetch_range_fetches_pages_concurrently_in_order(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.BINANCE_PAGE_CONCURRENCY", 4)
+    inflight = {"now": 0, "max": 0}
+    serve = kline_server([]).handler
+
+    async def slow_handler(request):
+        inflight["now"] += 1
+        inflight["max"] = max(inflight["max"], inflight["now"])
+        await asyncio.sleep(0.01)
+        inflight["now"] -= 1
+        return serve(request)
+
+    step = TIMEFRAME_MS["1m"]
+    start, end = 7 * step + 123, 7 * step + 123 + 9_500 * step
+    pages = []
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(slow_handler)) as client:
+            return await BinanceConnector().fetch_range("BTCUSDT", "1m", start, end, session=client,
+                                                        on_page=pages.append)
+    rows = asyncio.run(go())
+    assert len(pages) == 10 and inflight["max"] == 4
+    assert len(rows) == 9_500
+    ts = [r["ts"] for r in rows]
+    assert ts == sorted(set(ts))
+
+def test_batch_job_fans_out_and_tracks_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.plugins.connectors.binance._fetch_klines.retry.sleep", lambda _: None)
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    async_engine = create_async_engine(async_url(f"sqlite:///{tmp_path}/jobs.db"))
+    with factory() as db:
+        db.add_all([Asset(symbol="BTC", name="Bitcoin", binance_symbol="BTCUSDT"),
+                    Asset(symbol="ETH", name="Ethereum", binance_symbol="ETHUSDT"),
+                    Asset(symbol="BAD", name="Broken", binance_symbol="BADUSDT")])
+        db.commit()
+
+    requests = []
+    job = create_job(["BTC", "ETH", "BAD"], ["1h", "4h"], days=60, incremental=False, concurrency=2)
+    budget = WeightBudget(10_000)
+
+    async def go():
+        async with httpx.AsyncClient(transport=kline_server(requests)) as client:
+            await run_job(job, async_sessionmaker(async_engine), client=client, budget=budget)
+        await async_engine.dispose()
+    asyncio.run(go())
+
+    snap = job.snapshot()
+    assert snap["status"] == "done"
+    assert snap["counts"] == {"done": 4, "error": 2}
+    btc = job.tasks["BTC:1h"]
+    assert btc.pages == 2 and btc.fetched == btc.inserted == 60 * 24
+    assert budget.spent == 2 * len(requests)
+    with factory() as db:
+        assert db.scalar(select(func.count()).select_from(PriceOHLCV)) == 2 * (60 * 24 + 60 * 6)
+
+def test_batch_request_rejects_non_positive_bounds():
+    for bad in ({"days": 0}, {"concurrency": 0}):
+        with pytest.raises(ValidationError):
+            BatchBackfillRequest(**bad)
+    assert BatchBackfillRequest(concurrency=1).days == 90
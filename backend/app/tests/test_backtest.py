@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.services.backtest import backtest, simulate
+from app.services.ingest import upsert_ohlcv
+from app.services.series_cache import series_cache
+
+def loop_reference(close, agg, initial_cash, fee_bps):
+    """The original row-by-row cash/coin simulation."""
+    pos = (agg > 0).astype(int)
+    trade = pos - np.concatenate(([0], pos[:-1]))
+    cash, coin, fee = initial_cash, 0.0, fee_bps / 10000.0
+    for price, t in zip(close, trade):
+        if t == 1:
+            coin += cash * (1 - fee) / price; cash = 0.0
+        elif t == -1 and coin > 0:
+            cash += coin * price * (1 - fee); coin = 0.0
+    return cash + coin * close[-1], int(np.abs(trade).sum())
+
+def test_simulate_matches_loop():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 5000)))
+    agg = rng.integers(-2, 3, 5000)
+    res = simulate(close, agg, 10000.0, 10.0)
+    final, trades = loop_reference(close, agg, 10000.0, 10.0)
+    assert res["final_equity"] == pytest.approx(final, rel=1e-9)
+    assert res["trades"] == trades
+    assert len(res["equity"]) == 5000
+
+def test_drawdown_and_sharpe():
+    close = np.array([100.0, 110.0, 55.0, 66.0, 132.0])
+    res = simulate(close, np.ones(5), 1000.0, 0.0, periods_per_year=4)
+    assert res["equity"].tolist() == pytest.approx([1000.0, 1100.0, 550.0, 660.0, 1320.0])
+    assert res["max_drawdown"] == pytest.approx(0.5)
+    rets = np.array([0.1, -0.5, 0.2, 1.0])
+    assert res["sharpe"] == pytest.approx(rets.mean() / rets.std(ddof=1) * 2)
+    flat = simulate(close, np.zeros(5), 1000.0, 10.0)
+    assert (flat["final_equity"], flat["trades"], flat["max_drawdown"], flat["sharpe"]) == (1000.0, 0, 0.0, 0.0)
+
+def test_backtest_returns_equity_curve(db):
+    series_cache.clear()
+    start = datetime(2024, 1, 1)
+    upsert_ohlcv(db, 1, "1h", [{"ts": start + timedelta(hours=h), "open": 100.0 + h, "high": 101.0 + h,
+                                "low": 99.0 + h, "close": 100.0 + h, "volume": 1.0} for h in range(60)], "binance")
+    res = backtest(db, "BTC", "1h", [{"name": "ema", "params": {"period": 5}}])
+    assert len(res["equity_curve"]["ts"]) == len(res["equity_curve"]["equity"]) == 60
+    assert res["equity_curve"]["ts"][0] == "2024-01-01T00:00:00"
+    assert res["equity_curve"]["equity"][-1] == res["final_equity"]
+    assert {"max_drawdown", "sharpe", "trades", "return"} <= res.keys()
+    series_cache.clear()
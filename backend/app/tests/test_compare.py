@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from app.models import Asset
+from app.routers.compare import compare
+from app.services.compare import compare_assets, forward_fill
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import load_close_matrix
+
+START = datetime(2024, 1, 1)
+
+def seed(db, n=300):
+    db.add_all([Asset(symbol="ETH", name="Ethereum"), Asset(symbol="SOL", name="Solana"), Asset(symbol="NEW", name="New")])
+    db.commit()
+    rng = np.random.default_rng(3)
+    market = rng.normal(0, 0.01, n)
+    closes = {1: market, 2: 1.5 * market + rng.normal(0, 0.005, n), 3: rng.normal(0, 0.02, n)}
+    for asset_id, rets in closes.items():
+        price = 100 * np.cumprod(1 + rets)
+        hours = [h for h in range(n) if not (asset_id == 3 and 100 <= h < 110)]  # SOL has a gap
+        upsert_ohlcv(db, asset_id, "1h", [{"ts": START + timedelta(hours=h), "open": price[h], "high": price[h],
+                                           "low": price[h], "close": float(price[h]), "volume": 1.0} for h in hours], "binance")
+    upsert_ohlcv(db, 4, "1h", [{"ts": START, "open": 1, "high": 1, "low": 1, "close": 1.0, "volume": 1.0}], "binance")
+    return {a.id: a for a in db.query(Asset)}
+
+def test_close_matrix_aligns_on_union(db):
+    seed(db)
+    ts, m = load_close_matrix(db, [3, 1], "1h", limit=200)
+    # SOL's newest 200 reach 10 hours further back across its gap, so BTC starts 10 rows in
+    assert len(ts) == 210 and np.all(np.diff(ts) == 3_600_000)
+    assert np.isnan(m[:10, 1]).all() and not np.isnan(m[10:, 1]).any()
+    gap = np.flatnonzero(np.isnan(m[:, 0]))
+    assert len(gap) == 10 and ts[gap[0]] == pd.Timestamp(START + timedelta(hours=100)).value // 1_000_000
+    filled = forward_fill(m)
+    assert np.all(filled[gap, 0] == m[gap[0] - 1, 0]) and np.isnan(filled[:10, 1]).all()
+
+def test_statistics_match_pandas(db):
+    assets = seed(db)
+    res = compare_assets(db, [assets[i] for i in (1, 2, 3, 4)], "1h", limit=300, window=48)
+    assert res["symbols"] == ["BTC", "ETH", "SOL"] and res["missing"] == ["NEW"]
+    assert res["benchmark"] == "BTC" and res["candles"] == 300
+
+    ts, m = load_close_matrix(db, [1, 2, 3], "1h", limit=300)
+    prices = pd.DataFrame(m, columns=res["symbols"]).ffill()
+    rets = prices.pct_change().iloc[1:]
+    np.testing.assert_allclose(np.array(res["correlation"], dtype=float), rets.corr().to_numpy(), atol=1e-9)
+    np.testing.assert_allclose(np.array(res["covariance"], dtype=float), rets.cov().to_numpy(), rtol=1e-7)
+    betas = [a["beta"] for a in res["assets"]]
+    np.testing.assert_allclose(betas, (rets.cov()["BTC"] / rets["BTC"].var()).to_numpy(), rtol=1e-7)
+    assert 1.3 < betas[1] < 1.7
+    assert res["assets"][0]["return"] == prices["BTC"].iloc[-1] / prices["BTC"].iloc[0] - 1
+    np.testing.assert_allclose([a["volatility"] for a in res["assets"]], rets.std(ddof=0).to_numpy())
+
+    rolling = res["rolling_correlation"]
+    expected = rets.rolling(48).corr(rets["BTC"])
+    assert rolling["ts"][0] == (START + timedelta(hours=48)).isoformat()
+    np.testing.assert_allclose(np.array(rolling["values"]["ETH"], dtype=float), expected["ETH"].iloc[47:], atol=1e-9)
+
+def test_compare_lists_only_requested_symbols(db):
+    seed(db)
+    rows = compare(symbols=["ETH"], timeframe="1h", limit=300, benchmark="BTC", watchlist=False, category=None, db=db)
+    assert [r["symbol"] for r in rows] == ["ETH"] and 1.3 < rows[0]["beta"] < 1.7
+
+def test_unrequested_benchmark_without_data_falls_back(db):
+    seed(db)
+    rows = compare(symbols=["ETH", "SOL"], timeframe="1h", limit=300, benchmark="NEW", watchlist=False,
+                   category=None, db=db)
+    assert [r["symbol"] for r in rows] == ["ETH", "SOL"] and rows[0]["beta"] == pytest.approx(1.0)
+    with pytest.raises(HTTPException, match="Not enough data for NEW"):
+        compare(symbols=["ETH", "NEW"], timeframe="1h", limit=300, benchmark=None, watchlist=False,
+                category=None, db=db)
@@ -0,0 +1,51 @@
+import asyncio
+import numpy as np
+from datetime import datetime, timedelta
+from app.services.coverage import find_gaps, _ms
+from app.services import data_loader
+from app.services.ingest import upsert_ohlcv
+
+H = 3_600_000
+
+def test_find_gaps_empty_window():
+    assert find_gaps(np.array([], dtype=np.int64), 0, 10 * H, H) == [(0, 10 * H)]
+
+def test_find_gaps_leading_inner_and_tail():
+    opens = np.array([2, 3, 4, 7, 8], dtype=np.int64) * H
+    gaps = find_gaps(opens, 0, 10 * H, H)
+    assert gaps == [(0, 2 * H), (5 * H, 7 * H), (8 * H, 10 * H)]
+
+def test_find_gaps_full_coverage_only_refreshes_tail():
+    opens = np.arange(0, 10, dtype=np.int64) * H
+    assert find_gaps(opens, 0, 10 * H, H) == [(9 * H, 10 * H)]
+
+class RangeConnector:
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    async def fetch_range(self, symbol, timeframe, start_ms, end_ms):
+        self.calls.append((start_ms, end_ms))
+        first = -(-start_ms // H) * H
+        return [{"ts": datetime.utcfromtimestamp(t / 1000), "open": 1.0, "high": 1.0,
+                 "low": 1.0, "close": 1.0, "volume": 1.0} for t in range(first, end_ms, H)]
+
+def test_incremental_backfill_fetches_only_holes(file_db, monkeypatch):
+    db, async_session = file_db
+    asset = db.query(data_loader.Asset).first()
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    stored = [now - timedelta(hours=h) for h in range(48) if not 10 <= h < 15]
+    upsert_ohlcv(db, asset.id, "1h", [{"ts": t, "open": 1.0, "high": 1.0, "low": 1.0,
+                                       "close": 1.0, "volume": 1.0} for t in stored], "binance")
+    fake = RangeConnector()
+    monkeypatch.setitem(data_loader.CONNECTORS, "binance", fake)
+
+    async def go():
+        async with async_session() as adb:
+            return await data_loader.backfill_prices(adb, "BTC", "1h", 2, incremental=True)
+    res = asyncio.run(go())
+    assert res["gaps"] == 2
+    hole, tail = fake.calls
+    assert hole == (_ms(now - timedelta(hours=14)), _ms(now - timedelta(hours=9)))
+    assert tail[0] == _ms(now)
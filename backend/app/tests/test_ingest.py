@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app.models import PriceOHLCV
+from app.services.ingest import upsert_ohlcv
+
+def candles(n, start=datetime(2024, 1, 1), close=100.0):
+    return [{"ts": start + timedelta(hours=i), "open": close, "high": close + 1,
+             "low": close - 1, "close": close + i, "volume": 10.0} for i in range(n)]
+
+def test_upsert_inserts_in_batches(db):
+    stats = upsert_ohlcv(db, 1, "1h", iter(candles(250)), "binance", batch_size=100)
+    assert stats["rows"] == 250
+    assert stats["rows_per_sec"] > 0
+    assert db.scalar(select(func.count()).select_from(PriceOHLCV)) == 250
+
+def test_upsert_updates_existing_candles(db):
+    upsert_ohlcv(db, 1, "1h", candles(10), "binance")
+    upsert_ohlcv(db, 1, "1h", candles(12, close=200.0), "coingecko")
+    rows = db.execute(select(PriceOHLCV.close, PriceOHLCV.source).order_by(PriceOHLCV.ts)).all()
+    assert len(rows) == 12
+    assert rows[0] == (200.0, "coingecko")
+    assert rows[-1] == (211.0, "coingecko")
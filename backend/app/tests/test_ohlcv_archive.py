@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.coverage import missing_ranges
+from app.services.ingest import upsert_ohlcv
+from app.services.export import export_batches
+from app.services.ohlcv_archive import (archive_cold, load_close_matrix, load_history, ohlcv_archive, rows_to_candles,
+                                        stitch_tail)
+from app.services.ohlcv_repo import load_ohlcv
+from app.services.rollup import load_rollup
+from app.services.screener import resolve_assets, screen
+from app.services.series_cache import cached_ohlcv
+
+START = datetime(2024, 1, 30)
+
+def candles(start, n, step=timedelta(hours=1), base=100.0):
+    return [{"ts": start + i * step, "open": base + i, "high": base + i, "low": base + i,
+             "close": base + i, "volume": 1.0} for i in range(n)]
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_archive, "root", tmp_path / "archive")
+    return ohlcv_archive
+
+def test_append_merges_months_and_reads_views(archive):
+    archive.append(1, "1h", rows_to_candles(candles(START, 72)))
+    assert archive.months(1, "1h") == ["2024-01", "2024-02"]
+    # overlapping append: the new candles win, nothing is duplicated
+    archive.append(1, "1h", rows_to_candles(candles(START + timedelta(hours=70), 4, base=500.0)))
+    out = archive.read(1, "1h")
+    assert out.shape == (6, 74) and np.all(np.diff(out[0]) == 3_600_000)
+    assert out[4, 69] == 169.0 and out[4, 70] == 500.0
+
+    feb = pd.Timestamp("2024-02-01").value // 1_000_000
+    view = archive.read(1, "1h", feb + 3_600_000, feb + 5 * 3_600_000)
+    assert view.shape == (6, 4) and isinstance(view.base, np.memmap)
+    assert archive.read(2, "1h").shape == (6, 0)
+
+def test_history_stitches_archive_and_database(db, archive):
+    archive.append(1, "1h", rows_to_candles(candles(START, 48)))
+    # the database overlaps the archive's last day; its candles win from its first one on
+    upsert_ohlcv(db, 1, "1h", candles(START + timedelta(hours=24), 48, base=1000.0), "binance")
+    df = load_history(db, 1, "1h")
+    assert len(df) == 72 and df["ts"].is_monotonic_increasing and df["ts"].is_unique
+    assert df["close"].iloc[23] == 123.0 and df["close"].iloc[24] == 1000.0
+    assert list(df.dtypes) == list(load_ohlcv(db, 1, "1h").dtypes)
+    assert len(cached_ohlcv(db, 1, "1h", start=START)) == 72
+
+def test_history_merges_interleaved_tiers(db, archive):
+    # a gap fill wrote hours 10-11 back into the database after they were archived
+    archive.append(1, "1h", rows_to_candles(candles(START, 1000)))
+    upsert_ohlcv(db, 1, "1h", candles(START + timedelta(hours=5000), 100), "binance")
+    upsert_ohlcv(db, 1, "1h", candles(START + timedelta(hours=10), 2, base=-1.0), "binance")
+    df = load_history(db, 1, "1h")
+    assert len(df) == 1100 and df["ts"].is_monotonic_increasing and df["ts"].is_unique
+    assert list(df["close"].iloc[9:13]) == [109.0, -1.0, 0.0, 112.0]
+
+def test_readers_stitch_archive_and_database(file_db, tmp_path, monkeypatch):
+    db, factory = file_db
+    monkeypatch.setattr(ohlcv_archive, "root", tmp_path / "archive")
+    ohlcv_archive.append(1, "1h", rows_to_candles(candles(START, 48)))
+    upsert_ohlcv(db, 1, "1h", candles(START + timedelta(hours=40), 20, base=1000.0), "binance")
+    expected = [100.0 + h for h in range(40)] + [1000.0 + h for h in range(20)]
+
+    ts, m = load_close_matrix(db, [1], "1h")
+    assert list(m[:, 0]) == expected and np.all(np.diff(ts) == 3_600_000)
+    assert list(load_close_matrix(db, [1], "1h", limit=25)[1][:, 0]) == expected[-25:]
+    _, m = load_close_matrix(db, [1], "1h", end=START + timedelta(hours=41), limit=3)
+    assert list(m[:, 0]) == [139.0, 1000.0, 1001.0]
+
+    rows = db.execute(select(PriceOHLCV.ts, PriceOHLCV.open, PriceOHLCV.high, PriceOHLCV.low, PriceOHLCV.close,
+                             PriceOHLCV.volume, PriceOHLCV.source).order_by(PriceOHLCV.ts)).all()
+    tail = stitch_tail(1, "1h", [tuple(r) for r in rows], 30)
+    assert [r[4] for r in tail] == expected[-30:] and tail[0][-1] == "archive" and tail[-1][-1] == "binance"
+
+    async def export(**kw):
+        return [r async for b in export_batches(factory, [(1, "BTC")], "1h", batch_size=7, **kw) for r in b]
+    out = asyncio.run(export())
+    assert [r[5] for r in out] == expected and {r[-1] for r in out[:40]} == {"archive"}
+    out = asyncio.run(export(limit=25, end=START + timedelta(hours=50)))
+    assert [r[5] for r in out] == expected[26:51]
+    out = asyncio.run(export(start=START + timedelta(hours=30), end=START + timedelta(hours=44)))
+    assert [r[5] for r in out] == expected[30:45]
+
+def test_concurrent_appends_keep_every_candle(archive):
+    threads = [threading.Thread(target=archive.append, args=(1, "1h", rows_to_candles(candles(START + timedelta(hours=i), 1))))
+               for i in range(0, 200, 2)]
+    threads += [threading.Thread(target=archive.append, args=(1, "1h", rows_to_candles(candles(START + timedelta(hours=i), 1))))
+                for i in range(1, 200, 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert archive.read(1, "1h").shape == (6, 200)
+
+def test_archive_cold_moves_rows_out_of_database(db, archive, monkeypatch):
+    monkeypatch.setattr(settings, "OHLCV_ARCHIVE_HOT_DAYS", 1)
+    now = START + timedelta(days=10)
+    upsert_ohlcv(db, 1, "1h", candles(START, 24 * 10), "binance")
+    before = load_history(db, 1, "1h")
+    assert archive_cold(db, now) == {"1/1h": 24 * 9}
+    assert db.scalar(select(func.count()).select_from(PriceOHLCV)) == 24
+    pd.testing.assert_frame_equal(load_history(db, 1, "1h"), before)
+    assert archive_cold(db, now) == {}
+
+def test_screen_and_rollup_read_across_the_cutoff(db, archive, monkeypatch):
+    monkeypatch.setattr(settings, "OHLCV_ARCHIVE_HOT_DAYS", 90)
+    upsert_ohlcv(db, 1, "1d", candles(START, 200, timedelta(days=1)), "binance")
+    assets, configs = resolve_assets(db, symbols=["BTC"]), [{"name": "rsi", "params": {"period": 14}}]
+    screened, weekly = screen(db, assets, "1d", configs, lookback=150), load_rollup(db, 1, "1w", 20)
+    assert archive_cold(db, START + timedelta(days=200)) == {"1/1d": 110}
+    assert screen(db, assets, "1d", configs, lookback=150) == screened
+    pd.testing.assert_frame_equal(load_rollup(db, 1, "1w", 20), weekly)
+    assert weekly["ts"].iloc[0] < START + timedelta(days=110)  # the oldest weeks are archived
+
+def test_coverage_counts_archived_candles(db, archive):
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    archive.append(1, "1h", rows_to_candles(candles(now - timedelta(hours=47), 24)))
+    upsert_ohlcv(db, 1, "1h", candles(now - timedelta(hours=23), 24), "binance")
+    open_ms, gaps, start_ms, _ = missing_ranges(db, 1, "1h", days=2)
+    assert len(open_ms) == 48 and len(gaps) == 1 and gaps[0][0] == open_ms[-1]
+
+def test_drop_before(archive):
+    archive.append(1, "1m", rows_to_candles(candles(datetime(2024, 1, 31, 23), 120, timedelta(minutes=1))))
+    archive.append(2, "1m", rows_to_candles(candles(datetime(2024, 1, 1), 1, timedelta(minutes=1))))
+    assert archive.drop_before("1m", datetime(2024, 2, 15)) == 2
+    assert archive.months(1, "1m") == ["2024-02"] and archive.months(2, "1m") == []
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.db import get_async_db
+from app.main import app
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_format import decode_binary, negotiate
+
+START = datetime(2024, 1, 1)
+
+@pytest.fixture
+def client(file_db):
+    db, factory = file_db
+    upsert_ohlcv(db, 1, "1h", [{"ts": START + timedelta(hours=i), "open": i, "high": i + 1, "low": i - 1,
+                                "close": i + 0.5, "volume": 10.0} for i in range(100)], "binance")
+
+    async def override():
+        async with factory() as session:
+            yield session
+    app.dependency_overrides[get_async_db] = override
+    yield TestClient(app), db
+    app.dependency_overrides.clear()
+
+def get(client, **params):
+    headers = params.pop("headers", {})
+    return client.get("/data/ohlcv", params={"symbol": "BTC", "timeframe": "1h", "limit": 10, **params}, headers=headers)
+
+def test_negotiate():
+    assert negotiate(None, None) == "json"
+    assert negotiate(None, "application/vnd.apache.arrow.stream") == "arrow"
+    assert negotiate(None, "application/json;q=0.5, application/vnd.cryptomind.ohlcv") == "binary"
+    assert negotiate("columns", "application/vnd.apache.arrow.stream") == "columns"
+    with pytest.raises(ValueError):
+        negotiate("xml", None)
+
+def test_columnar_formats_match_rows(client):
+    c, _ = client
+    rows = get(c).json()
+    cols = get(c, format="columns").json()
+    assert cols["ts"][0] == int((START + timedelta(hours=90)).timestamp() * 1000)
+    assert cols["close"] == [r["close"] for r in rows] and len(cols["ts"]) == 10
+
+    r = get(c, headers={"Accept": "application/vnd.cryptomind.ohlcv"})
+    assert r.headers["content-type"] == "application/vnd.cryptomind.ohlcv"
+    body = decode_binary(r.content)
+    assert body["ts"].tolist() == cols["ts"] and body["volume"].dtype == np.float64
+
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(get(c, format="arrow").content).read_all()
+    assert table.column("open").to_pylist() == cols["open"]
+    assert table.schema.metadata[b"symbol"] == b"BTC"
+
+def test_etag_revalidation(client):
+    c, db = client
+    first = get(c, format="columns")
+    tag = first.headers["etag"]
+    assert get(c, format="binary").headers["etag"] != tag  # one tag per representation
+    assert get(c, format="columns", headers={"If-None-Match": tag}).status_code == 304
+
+    # revising the newest candle in place changes the tag
+    upsert_ohlcv(db, 1, "1h", [{"ts": START + timedelta(hours=99), "open": 1, "high": 2, "low": 0,
+                                "close": 1.5, "volume": 10.0}], "binance")
+    revised = get(c, format="columns", headers={"If-None-Match": tag})
+    assert revised.status_code == 200 and revised.json()["close"][-1] == 1.5
+
+    # so does a revision of a field other than close and volume
+    tag = revised.headers["etag"]
+    upsert_ohlcv(db, 1, "1h", [{"ts": START + timedelta(hours=99), "open": 1, "high": 3, "low": 0,
+                                "close": 1.5, "volume": 10.0}], "binance")
+    revised = get(c, format="columns", headers={"If-None-Match": tag})
+    assert revised.status_code == 200 and revised.json()["high"][-1] == 3.0
+
+def test_rollup_series_get_etag(client):
+    c, _ = client
+    r = get(c, timeframe="2h", limit=5, format="columns")
+    assert r.json()["high"][-1] == 100.0
+    assert get(c, timeframe="2h", limit=5, format="columns",
+               headers={"If-None-Match": r.headers["etag"]}).status_code == 304
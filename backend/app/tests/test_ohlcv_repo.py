@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import load_ohlcv, load_closes, latest_close
+
+def seed(db, n=50):
+    start = datetime(2024, 1, 1)
+    upsert_ohlcv(db, 1, "1h", [{"ts": start + timedelta(hours=i), "open": i, "high": i + 1, "low": i - 1,
+                                "close": float(i), "volume": 1.0} for i in range(n)], "binance")
+    return start
+
+def test_load_ohlcv_columns_and_order(db):
+    seed(db)
+    df = load_ohlcv(db, 1, "1h")
+    assert list(df.columns) == ["ts", "open", "high", "low", "close", "volume"]
+    assert len(df) == 50 and df["ts"].is_monotonic_increasing
+    assert str(df["ts"].dtype).startswith("datetime64") and df["close"].dtype == "float64"
+
+def test_load_ohlcv_bounds_and_limit(db):
+    start = seed(db)
+    df = load_ohlcv(db, 1, "1h", start=start + timedelta(hours=10), end=start + timedelta(hours=19))
+    assert df["close"].tolist() == [float(i) for i in range(10, 20)]
+    tail = load_ohlcv(db, 1, "1h", limit=5)
+    assert tail["close"].tolist() == [45.0, 46.0, 47.0, 48.0, 49.0]
+    assert load_closes(db, 1, "1h", limit=3).tolist() == [47.0, 48.0, 49.0]
+    assert latest_close(db, 1, "1h") == 49.0
+    assert load_ohlcv(db, 1, "4h").empty
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, inspect, select
+from app.core.config import settings
+from app.models import PriceOHLCV
+from app.services.coverage import missing_ranges
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_partitions import ensure_partitions, partition_ddl
+from app.services.ohlcv_storage import maintain_ohlcv, retention_days
+from app.services.series_cache import cached_ohlcv
+
+NOW = datetime(2024, 3, 15)
+
+def candles(start, n, step):
+    return [{"ts": start + i * step, "open": 1, "high": 1, "low": 1, "close": 1.0, "volume": 1.0} for i in range(n)]
+
+def test_primary_key_is_the_only_index(db):
+    insp = inspect(db.get_bind())
+    assert insp.get_pk_constraint("price_ohlcv")["constrained_columns"] == ["asset_id", "timeframe", "ts"]
+    assert insp.get_indexes("price_ohlcv") == [] and insp.get_unique_constraints("price_ohlcv") == []
+
+def test_partition_ddl():
+    names = [n for n, _ in partition_ddl("time", None, datetime(2023, 11, 20), datetime(2024, 1, 1))]
+    assert names == ["price_ohlcv_p2023_11", "price_ohlcv_p2023_12", "price_ohlcv_p2024_01"]
+    ddl = dict(partition_ddl("timeframe", "1m", datetime(2023, 12, 31), datetime(2023, 12, 31)))
+    assert ddl["price_ohlcv_1m"].endswith("FOR VALUES IN ('1m') PARTITION BY RANGE (ts)")
+    assert ddl["price_ohlcv_1m_p2023_12"].endswith("PARTITION OF price_ohlcv_1m FOR VALUES FROM ('2023-12-01') TO ('2024-01-01')")
+    assert [n for n, _ in partition_ddl("timeframe", "1d", datetime(2022, 6, 1), datetime(2023, 2, 1))] == \
+        ["price_ohlcv_1d", "price_ohlcv_1d_p2022", "price_ohlcv_1d_p2023"]
+    with pytest.raises(ValueError):
+        partition_ddl("timeframe", "1m; DROP TABLE assets", NOW, NOW)
+
+def test_partitions_are_postgres_only(db):
+    assert ensure_partitions(db, "1m", NOW, NOW, layout="time") == []
+
+def test_retention_policy():
+    assert retention_days("") == {}
+    assert retention_days("1m:30, 5m:180,*:3650") == {"1m": 30, "5m": 180, "*": 3650}
+    for bad in ("1m:0", "1m", "2x:5"):
+        with pytest.raises(ValueError):
+            retention_days(bad)
+
+def test_maintenance_applies_retention(db, monkeypatch):
+    monkeypatch.setattr(settings, "OHLCV_RETENTION", "1m:1,*:30")
+    upsert_ohlcv(db, 1, "1m", candles(NOW - timedelta(days=2), 2 * 1440, timedelta(minutes=1)), "binance")
+    upsert_ohlcv(db, 1, "1h", candles(NOW - timedelta(days=40), 40 * 24, timedelta(hours=1)), "binance")
+    upsert_ohlcv(db, 1, "1d", candles(NOW - timedelta(days=40), 40, timedelta(days=1)), "binance")
+    assert len(cached_ohlcv(db, 1, "1m")) == 2 * 1440
+
+    report = maintain_ohlcv(db, now=NOW)
+    assert report["deleted"] == {"1m": 1440, "*": 10 * 24 + 10}
+    count = lambda tf: db.scalar(select(func.count()).select_from(PriceOHLCV).where(PriceOHLCV.timeframe == tf))
+    assert (count("1m"), count("1h"), count("1d")) == (1440, 30 * 24, 30)
+    assert len(cached_ohlcv(db, 1, "1m")) == 1440
+    assert maintain_ohlcv(db, now=NOW)["deleted"] == {"1m": 0, "*": 0}
+
+def test_coverage_ignores_expired_range(db, monkeypatch):
+    monkeypatch.setattr(settings, "OHLCV_RETENTION", "1h:2")
+    _, gaps, start_ms, end_ms = missing_ranges(db, 1, "1h", days=30)
+    assert (end_ms - start_ms) == 2 * 86_400_000 and gaps == [(start_ms, end_ms)]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from sqlalchemy import event
+from app.models import Asset, PortfolioHolding
+from app.services.ingest import upsert_ohlcv
+from app.services.portfolio import PortfolioCache, history, valuation
+
+START = datetime(2024, 1, 1)
+
+def seed(db):
+    db.add(Asset(symbol="ETH", name="Ethereum")); db.commit()
+    upsert_ohlcv(db, 1, "1d", [{"ts": START + timedelta(days=d), "open": 1, "high": 1, "low": 1,
+                                "close": 100.0 + d, "volume": 1.0} for d in range(10)], "binance")
+    # ETH starts two days later and has a hole on day 5; its 1h candle is the newest price
+    upsert_ohlcv(db, 2, "1d", [{"ts": START + timedelta(days=d), "open": 1, "high": 1, "low": 1,
+                                "close": 10.0 * (1 + (d % 3)), "volume": 1.0} for d in range(2, 10) if d != 5], "binance")
+    upsert_ohlcv(db, 2, "1h", [{"ts": START + timedelta(days=9, hours=5), "open": 1, "high": 1, "low": 1,
+                                "close": 12.0, "volume": 1.0}], "binance")
+    db.add_all([PortfolioHolding(symbol="BTC", amount=2.0), PortfolioHolding(symbol="ETH", amount=10.0),
+                PortfolioHolding(symbol="DOGE", amount=5.0)])
+    db.commit()
+
+def test_valuation_is_one_statement(db):
+    seed(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    res = valuation(db)
+    assert len(statements) == 1
+    by_symbol = {h["symbol"]: h for h in res["holdings"]}
+    assert by_symbol["BTC"]["price"] == 109.0 and by_symbol["ETH"]["price"] == 12.0
+    assert by_symbol["DOGE"]["value"] == 0.0 and by_symbol["DOGE"]["ts"] is None
+    assert res["total_value"] == 2 * 109.0 + 10 * 12.0
+    assert valuation(db, "1d")["holdings"][1]["price"] == 10.0 * (1 + 9 % 3)
+
+def test_history_aligns_and_measures(db):
+    seed(db)
+    res = history(db, "1d")
+    assert res["symbols"] == ["BTC", "ETH"] and res["missing"] == ["DOGE"]
+    assert res["ts"][0] == (START + timedelta(days=2)).isoformat() and len(res["ts"]) == 8
+    eth = [10.0 * (1 + (d % 3)) for d in range(2, 10)]
+    eth[3] = eth[2]  # day 5 is forward-filled from day 4
+    expected = np.array([2 * (100.0 + d) for d in range(2, 10)]) + 10 * np.array(eth)
+    np.testing.assert_allclose(res["equity"], expected)
+    m = res["metrics"]
+    assert m["start_value"] == expected[0] and m["return"] == pytest.approx(expected[-1] / expected[0] - 1)
+    assert m["max_drawdown"] == pytest.approx(np.max(1 - expected / np.maximum.accumulate(expected)))
+    assert history(db, "1d", start=START + timedelta(days=7))["equity"] == list(expected[-3:])
+
+def test_cache_invalidation_and_ttl():
+    cache = PortfolioCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or {"n": len(calls)}
+    assert cache.get("k", compute) == {"n": 1}
+    assert cache.get("k", compute) == {"n": 1}
+    cache.invalidate()
+    assert cache.get("k", compute) == {"n": 2}
+    assert PortfolioCache(ttl=0).get("k", compute) == {"n": 3}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
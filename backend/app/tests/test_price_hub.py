@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.models import Asset
+from app.services.ingest import upsert_ohlcv
+from app.services.price_hub import PriceHub, Subscriber
+
+START = datetime(2024, 1, 1)
+
+def candle(h, close):
+    return {"ts": START + timedelta(hours=h), "open": close, "high": close, "low": close, "close": close, "volume": 1.0}
+
+def test_one_query_per_poll_for_many_sockets(file_db):
+    db, async_session = file_db
+    db.add(Asset(symbol="ETH", name="Ethereum")); db.commit()
+    upsert_ohlcv(db, 1, "1h", [candle(h, 100.0 + h) for h in range(5)], "binance")
+    upsert_ohlcv(db, 2, "1h", [candle(h, 10.0 + h) for h in range(3)], "binance")
+    statements = []
+    event.listen(async_session.kw["bind"].sync_engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    async def go():
+        hub = PriceHub(async_session, interval=60)
+        subs = [Subscriber() for _ in range(50)]
+        for sub in subs:
+            await hub.subscribe(sub, [("BTC", "1h"), ("ETH", "1h")])
+        first = await subs[0].next_batch()
+        await subs[-1].next_batch()
+        statements.clear()
+        upsert_ohlcv(db, 1, "1h", [candle(5, 200.0)], "binance")
+        await hub.poll_once()
+        update = await subs[-1].next_batch()
+        hub.unsubscribe(subs[0])
+        return first, update, hub.stats()
+
+    first, update, stats = asyncio.run(go())
+    assert {(m["symbol"], m["price"]) for m in first} == {("BTC", 104.0), ("ETH", 12.0)}
+    assert len(statements) == 1
+    # only the topic that changed is pushed
+    assert update == [{"symbol": "BTC", "timeframe": "1h", "price": 200.0, "ts": "2024-01-01T05:00:00"}]
+    assert stats["subscribers"] == 49 and stats["topics"] == 2
+
+def test_slow_subscriber_gets_latest_price_only():
+    async def go():
+        hub = PriceHub(None, interval=60)
+        sub = Subscriber()
+        hub._subs[("BTC", "1h")].add(sub)
+        for h in range(100):
+            hub.publish("BTC", "1h", 100.0 + h, START + timedelta(hours=h))
+        hub.publish("BTC", "1h", 1.0, START)  # older candle is ignored
+        return await sub.next_batch(), sub.conflated
+
+    batch, conflated = asyncio.run(go())
+    assert [m["price"] for m in batch] == [199.0]
+    assert conflated == 99
+
+def test_socket_answers_malformed_messages_with_an_error():
+    with TestClient(app).websocket_connect("/ws/last_price") as ws:
+        for msg in ([], "x", {"symbols": "BTC"}, {"symbols": [1]}):
+            ws.send_json(msg)
+            assert "error" in ws.receive_json()
+        ws.send_json({"action": "unsubscribe", "symbols": ["BTC"]})
+        ws.send_json(None)
+        assert "error" in ws.receive_json()  # still connected after a valid message
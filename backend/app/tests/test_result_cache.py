@@ -0,0 +1,156 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from redis.exceptions import WatchError
+from app.services import decision_engine, signal_engine
+from app.services import result_cache as result_cache_module
+from app.services.ingest import upsert_ohlcv
+from app.services.result_cache import MemoryBackend, RedisBackend, ResultCache, config_hash
+
+T0 = datetime(2024, 3, 1)
+CONFIGS = [{"name": "ema", "params": {"period": 10}}, {"name": "rsi", "params": {}}]
+
+class FakeRedis:
+    """Just the hash, counter and pipeline commands RedisBackend uses, over a dict."""
+
+    def __init__(self):
+        self.values = {}
+
+    def hget(self, key, field):
+        return self.values.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.values.setdefault(key, {})[field] = value
+
+    def expire(self, key, seconds):
+        pass
+
+    def mget(self, keys):
+        return [self.values.get(k) for k in keys]
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def scan_iter(self, match):
+        return [k for k in self.values if k.startswith(match.rstrip("*"))]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    """Queues commands until execute, which fails like redis-py if a watched key changed."""
+
+    def __init__(self, client):
+        self.client, self.queued, self.watched = client, [], {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def watch(self, *keys):
+        self.watched = dict(zip(keys, self.client.mget(keys)))
+
+    def mget(self, keys):
+        return self.client.mget(keys)
+
+    def multi(self):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args: self.queued.append((name, args))
+
+    def execute(self):
+        if any(self.client.values.get(k) != v for k, v in self.watched.items()):
+            raise WatchError("watched key changed")
+        for name, args in self.queued:
+            getattr(self.client, name)(*args)
+
+def candles(n, start=T0):
+    return [{"ts": start + timedelta(hours=i), "open": 100.0 + i % 7, "high": 101.0 + i % 7,
+             "low": 99.0 + i % 7, "close": 100.0 + i % 7, "volume": 1.0} for i in range(n)]
+
+def test_config_hash_is_canonical():
+    assert config_hash([{"name": "ema", "params": {"a": 1, "b": 2}}]) == \
+        config_hash([{"params": {"b": 2, "a": 1}, "name": "ema"}])
+    assert config_hash(CONFIGS) != config_hash(CONFIGS, {"technical": 1.0})
+    assert config_hash(CONFIGS, None) != config_hash(list(reversed(CONFIGS)), None)
+
+@pytest.mark.parametrize("backend", [lambda: MemoryBackend(16), lambda: RedisBackend(FakeRedis())])
+def test_backends_expire_and_invalidate(backend, monkeypatch):
+    cache = ResultCache(backend(), ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or {"n": len(calls)}
+    assert cache.get("signals", 1, "1h", T0, "h", compute) == {"n": 1}
+    assert cache.get("signals", 1, "1h", T0, "h", compute) == {"n": 1}
+    assert cache.get("signals", 1, "1h", T0 + timedelta(hours=1), "h", compute) == {"n": 2}
+    cache.get("signals", 1, "4h", T0, "h", compute)
+    cache.invalidate(1, "1h")
+    assert cache.get("signals", 1, "1h", T0, "h", compute) == {"n": 4}
+    assert cache.get("signals", 1, "4h", T0, "h", compute) == {"n": 3}
+    cache.invalidate(1)
+    assert cache.get("signals", 1, "4h", T0, "h", compute) == {"n": 5}
+
+    later = SimpleNamespace(time=lambda: time.time() + 61, monotonic=lambda: time.monotonic() + 61)
+    monkeypatch.setattr(result_cache_module, "time", later)
+    assert cache.get("signals", 1, "4h", T0, "h", compute) == {"n": 6}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 6, 2)
+    assert stats["kinds"]["signals"]["hit_rate"] == 0.25
+
+@pytest.mark.parametrize("backend", [lambda: MemoryBackend(16), lambda: RedisBackend(FakeRedis())])
+@pytest.mark.parametrize("scope", ["1h", None])
+def test_backends_skip_results_invalidated_while_computing(backend, scope):
+    cache = ResultCache(backend(), ttl=60)
+    def compute():
+        cache.invalidate(1, scope)  # a backfill landed while this result was being computed
+        return "stale"
+    cache.get("decision", 1, "1h", T0, "h", compute)
+    assert cache.get("decision", 1, "1h", T0, "h", lambda: "fresh") == "fresh"
+
+def test_redis_generation_is_shared_between_processes():
+    client = FakeRedis()
+    worker, other = ResultCache(RedisBackend(client), ttl=60), ResultCache(RedisBackend(client), ttl=60)
+    def compute():
+        other.clear()
+        return "stale"
+    worker.get("signals", 1, "1h", T0, "h", compute)
+    assert worker.get("signals", 1, "1h", T0, "h", lambda: "fresh") == "fresh"
+    assert worker.get("signals", 1, "1h", T0, "h", lambda: "again") == "fresh"
+
+def test_backend_errors_fall_back_to_compute():
+    class Down(FakeRedis):
+        def hget(self, key, field):
+            raise ConnectionError("redis down")
+    cache = ResultCache(RedisBackend(Down()), ttl=60)
+    assert cache.get("signals", 1, "1h", T0, "h", lambda: 42) == 42
+    assert cache.stats()["errors"] == 1
+
+def test_decide_reuses_results_until_the_candle_changes(db, monkeypatch):
+    cache = ResultCache(MemoryBackend(64), ttl=60)
+    monkeypatch.setattr(signal_engine, "result_cache", cache)
+    monkeypatch.setattr(decision_engine, "result_cache", cache)
+    upsert_ohlcv(db, 1, "1h", candles(60), "binance")
+    calls = []
+    evaluate = signal_engine.latest_signals
+    monkeypatch.setattr(signal_engine, "latest_signals", lambda *a: calls.append(1) or evaluate(*a))
+    first = decision_engine.decide(db, "BTC", "1h", CONFIGS)
+    assert decision_engine.decide(db, "BTC", "1h", CONFIGS) == first
+    assert signal_engine.run_signals(db, "BTC", "1h", CONFIGS) == first["details"]
+    assert len(calls) == 1
+    # other weights are another decision over the same cached signals
+    decision_engine.decide(db, "BTC", "1h", CONFIGS, {"technical": 1.0, "onchain": 0, "sentiment": 0})
+    assert len(calls) == 1
+
+    upsert_ohlcv(db, 1, "1h", candles(1, T0 + timedelta(hours=60)), "binance")
+    second = decision_engine.decide(db, "BTC", "1h", CONFIGS)
+    assert len(calls) == 2 and second["details"]["ema"]["ts"] == T0 + timedelta(hours=60)
+    kinds = cache.stats()["kinds"]
+    assert kinds["decision"] == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+    assert kinds["signals"]["hits"] == 2
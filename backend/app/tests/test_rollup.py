@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import load_ohlcv
+from app.services.rollup import load_rollup, resample_ohlcv, rollup_base, update_rollups
+
+def minutes(start, n, offset=0):
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n + offset)))[offset:]
+    return [{"ts": start + timedelta(minutes=offset + i), "open": c * 0.999, "high": c * 1.002,
+             "low": c * 0.997, "close": float(c), "volume": float(i + 1)} for i, c in enumerate(close)]
+
+def reference(df, rule):
+    return df.set_index("ts").resample(rule).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna().reset_index()
+
+def test_resample_matches_pandas():
+    df = pd.DataFrame(minutes(datetime(2024, 1, 1), 600))
+    for tf, rule in (("5m", "5min"), ("15m", "15min"), ("1h", "1h"), ("4h", "4h")):
+        out = resample_ohlcv(df, tf)
+        pd.testing.assert_frame_equal(out.drop(columns="count"), reference(df, rule), check_dtype=False)
+    assert resample_ohlcv(df, "1h")["count"].tolist() == [60] * 10
+
+def test_weekly_buckets_open_on_monday():
+    days = pd.DataFrame({"ts": pd.date_range("2024-01-03", periods=14, freq="D"), "open": 1.0, "high": 2.0,
+                         "low": 0.5, "close": 1.5, "volume": 1.0})
+    out = resample_ohlcv(days, "1w")
+    assert [t.day_name() for t in out["ts"]] == ["Monday"] * 3
+    assert out["count"].tolist() == [5, 7, 2]
+
+def test_update_rollups_skips_partial_buckets(db):
+    # history starts at 00:07 and stops at 02:29: the 00:00 hour is partial, 02:00 is forming
+    rows = minutes(datetime(2024, 1, 1), 143, offset=7)
+    upsert_ohlcv(db, 1, "1m", rows, "binance")
+    assert update_rollups(db, 1, "1m", rows[0]["ts"], rows[-1]["ts"]) == ["5m", "15m", "1h"]
+    hourly = load_ohlcv(db, 1, "1h")
+    assert hourly["ts"].dt.hour.tolist() == [1, 2]
+    assert hourly["volume"].iloc[0] == sum(r["volume"] for r in rows[53:113])
+    assert hourly["close"].iloc[-1] == rows[-1]["close"]
+    assert load_ohlcv(db, 1, "5m")["ts"].iloc[0] == datetime(2024, 1, 1, 0, 10)
+    assert load_ohlcv(db, 1, "4h").empty
+
+def test_incremental_update_recomputes_forming_bucket(db):
+    start = datetime(2024, 1, 1)
+    rows = minutes(start, 240)
+    upsert_ohlcv(db, 1, "1m", rows[:90], "binance")
+    update_rollups(db, 1, "1m", rows[0]["ts"], rows[89]["ts"])
+    assert load_ohlcv(db, 1, "1h")["volume"].tolist() == [sum(range(1, 61)), sum(range(61, 91))]
+
+    upsert_ohlcv(db, 1, "1m", rows[90:], "binance")
+    update_rollups(db, 1, "1m", rows[90]["ts"], rows[-1]["ts"])
+    expected = reference(pd.DataFrame(rows), "1h")
+    hourly = load_ohlcv(db, 1, "1h")
+    pd.testing.assert_frame_equal(hourly, expected, check_dtype=False)
+    assert len(load_ohlcv(db, 1, "4h")) == 1
+
+def test_load_rollup_on_demand(db):
+    rows = minutes(datetime(2024, 1, 1), 600)
+    upsert_ohlcv(db, 1, "1m", rows, "binance")
+    update_rollups(db, 1, "1m", rows[0]["ts"], rows[-1]["ts"])
+    assert rollup_base(db, 1, "2h") == "1h"
+    assert rollup_base(db, 1, "7m") == "1m"
+    out = load_rollup(db, 1, "2h", limit=3)
+    expected = reference(pd.DataFrame(rows), "2h").tail(3).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out.drop(columns="count"), expected, check_dtype=False)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.models import Asset, Watchlist
+from app.schemas import ScreenerRequest
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import load_ohlcv, load_ohlcv_many
+from app.services.screener import resolve_assets, screen
+from app.services.signal_engine import evaluate_signals
+
+CONFIGS = [{"name": "rsi", "params": {"period": 14}}, {"name": "bollinger", "params": {"period": 20}}]
+
+def seed(db):
+    db.add_all([Asset(symbol="ETH", name="Ethereum", category="L1"),
+                Asset(symbol="DOGE", name="Dogecoin", category="meme"),
+                Watchlist(symbol="ETH")])
+    db.commit()
+    start = datetime(2024, 1, 1)
+    rng = np.random.default_rng(0)
+    for asset_id, n in ((1, 300), (2, 120)):
+        close = 100 + np.cumsum(rng.normal(0, 1, n))
+        upsert_ohlcv(db, asset_id, "1h", [{"ts": start + timedelta(hours=h), "open": c, "high": c + 1,
+                                           "low": c - 1, "close": c, "volume": 1.0} for h, c in enumerate(close)],
+                     "binance")
+
+def test_load_many_takes_tail_per_asset(db):
+    seed(db)
+    frames = load_ohlcv_many(db, [1, 2, 3], "1h", 100)
+    assert sorted(frames) == [1, 2]
+    assert len(frames[1]) == len(frames[2]) == 100
+    assert frames[1].equals(load_ohlcv(db, 1, "1h", limit=100))
+
+def test_resolve_assets(db):
+    seed(db)
+    assert [a.symbol for a in resolve_assets(db)] == ["BTC", "DOGE", "ETH"]
+    assert [a.symbol for a in resolve_assets(db, watchlist=True)] == ["ETH"]
+    assert [a.symbol for a in resolve_assets(db, category="meme")] == ["DOGE"]
+    assert [a.symbol for a in resolve_assets(db, symbols=["btc", "eth"])] == ["BTC", "ETH"]
+
+def test_screen_matrix_matches_per_asset_evaluation(db):
+    seed(db)
+    res = screen(db, resolve_assets(db), "1h", CONFIGS, lookback=200)
+    assert res["symbols"] == ["BTC", "ETH"] and res["missing"] == ["DOGE"]
+    for row, asset_id in enumerate((1, 2)):
+        df = load_ohlcv(db, asset_id, "1h", limit=200)
+        for col, (_, value, trigger) in enumerate(evaluate_signals(df, CONFIGS)):
+            assert res["value"][row][col] == pytest.approx(value[-1])
+            assert res["trigger"][row][col] == trigger[-1]
+    assert res["ts"][1] == "2024-01-05T23:00:00"
+
+def test_screener_request_bounds_lookback():
+    for bad in (0, 1, 20001):
+        with pytest.raises(ValidationError):
+            ScreenerRequest(signals=[], lookback=bad)
+    assert ScreenerRequest(signals=[]).lookback == 500
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from app.services.ingest import upsert_ohlcv
+from app.services.series_cache import SeriesCache
+
+START = datetime(2024, 1, 1)
+
+def write(db, hours, close=1.0):
+    upsert_ohlcv(db, 1, "1h", [{"ts": START + timedelta(hours=h), "open": close, "high": close,
+                                "low": close, "close": close + h, "volume": 1.0} for h in hours], "binance")
+
+def test_hit_appends_only_new_tail(db):
+    cache = SeriesCache(10 * 1024 * 1024)
+    write(db, range(100))
+    first = cache.get(db, 1, "1h")
+    assert cache.get(db, 1, "1h") is first
+    write(db, [99, 100, 101], close=5.0)
+    df = cache.get(db, 1, "1h")
+    assert len(df) == 102
+    assert df["close"].tolist()[-3:] == [104.0, 105.0, 106.0]
+    assert df["ts"].is_monotonic_increasing
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["appended_rows"]) == (2, 1, 2)
+
+def test_invalidate_drops_entry(db):
+    cache = SeriesCache(10 * 1024 * 1024)
+    write(db, [0, 1, 5])
+    assert len(cache.get(db, 1, "1h")) == 3
+    write(db, [2, 3, 4])  # fills a hole the tail refresh cannot see
+    cache.invalidate(1, "1h")
+    assert len(cache.get(db, 1, "1h")) == 6
+    assert cache.stats()["misses"] == 2
+
+def test_lru_eviction_respects_byte_budget(db):
+    write(db, range(100))
+    upsert_ohlcv(db, 1, "4h", [{"ts": START + timedelta(hours=4 * h), "open": 1.0, "high": 1.0, "low": 1.0,
+                                "close": 1.0, "volume": 1.0} for h in range(100)], "binance")
+    probe = SeriesCache(10 ** 9)
+    one = probe.get(db, 1, "1h")
+    cache = SeriesCache(int(one.memory_usage(index=True).sum() * 1.5))
+    cache.get(db, 1, "1h")
+    cache.get(db, 1, "4h")
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["evictions"] == 1
+    assert stats["bytes"] <= cache.max_bytes
@@ -0,0 +1,85 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import SignalLatest, SignalRun
+from app.services import signal_engine
+from app.services.ingest import upsert_ohlcv
+from app.services.signal_store import SignalRunWriter, latest_states, maintain_signal_runs
+
+T0 = datetime(2024, 3, 1)
+
+@pytest.fixture
+def writer(db):
+    # never started: nothing is flushed unless the test calls flush()
+    return SignalRunWriter(session_factory=lambda: Session(bind=db.get_bind()), autostart=False)
+
+def runs(db):
+    return db.execute(select(SignalRun.name, SignalRun.ts, SignalRun.value, SignalRun.trigger)
+                      .order_by(SignalRun.name, SignalRun.ts)).all()
+
+def test_flush_dedupes_and_tracks_latest(db, writer):
+    writer.submit(1, "1h", T0, [("ema", 1.0, 0), ("rsi", 50.0, 0)])
+    writer.submit(1, "1h", T0, [("ema", 2.0, 1)])  # rerun on the same candle replaces the pending row
+    assert writer.flush() == 2 and writer.flush() == 0
+    assert runs(db) == [("ema", T0, 2.0, 1), ("rsi", T0, 50.0, 0)]
+
+    writer.submit(1, "1h", T0 + timedelta(hours=1), [("ema", 3.0, -1)])
+    writer.flush()
+    writer.submit(1, "1h", T0, [("ema", 2.5, 1)])  # late result for an older candle
+    writer.flush()
+    latest = {r.name: (r.ts, r.value, r.trigger) for r in latest_states(db, "1h")}
+    assert latest == {"ema": (T0 + timedelta(hours=1), 3.0, -1), "rsi": (T0, 50.0, 0)}
+    assert [r.name for r in latest_states(db, names=["rsi"])] == ["rsi"] and latest_states(db, "4h") == []
+    assert len(runs(db)) == 3
+    assert writer.stats() == {"pending": 0, "submitted": 5, "deduped": 1, "written": 4, "flushes": 3, "errors": 0}
+
+def test_failed_flush_keeps_rows(db, writer):
+    broken = writer.session_factory
+    writer.session_factory = lambda: (_ for _ in ()).throw(RuntimeError("db down"))
+    writer.submit(1, "1h", T0, [("ema", 1.0, 0)])
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    writer.session_factory = broken
+    assert writer.stats()["pending"] == 1 and writer.flush() == 1
+    assert runs(db) == [("ema", T0, 1.0, 0)]
+
+def test_background_thread_flushes(db):
+    w = SignalRunWriter(session_factory=lambda: Session(bind=db.get_bind()), interval=3600, max_rows=2,
+                        autostart=False)
+    w.submit(1, "1h", T0, [("ema", 1.0, 0)])
+    assert w.stats()["pending"] == 1
+    w.start()
+    w.submit(1, "1h", T0, [("rsi", 2.0, 0)])  # reaching max_rows wakes the thread
+    for _ in range(200):
+        if w.stats()["written"]:
+            break
+        time.sleep(0.01)
+    assert w.stats()["written"] == 2
+
+def test_run_signals_submits_to_writer(db, writer, monkeypatch):
+    monkeypatch.setattr(signal_engine, "signal_writer", writer)
+    rows = [{"ts": T0 + timedelta(hours=i), "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+             "close": 100.0 + i, "volume": 1.0} for i in range(60)]
+    upsert_ohlcv(db, 1, "1h", rows, "binance")
+    res = signal_engine.run_signals(db, "BTC", "1h", [{"name": "ema", "params": {}}])
+    assert db.scalar(select(func.count()).select_from(SignalRun)) == 0
+    assert writer.stats()["pending"] == 1
+    writer.flush()
+    assert runs(db) == [("ema", rows[-1]["ts"], res["ema"]["value"], res["ema"]["trigger"])]
+
+def test_maintenance_prunes_and_compacts(db, writer, monkeypatch):
+    monkeypatch.setattr(settings, "SIGNAL_RUN_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "SIGNAL_RUN_COMPACT_DAYS", 7)
+    now = T0 + timedelta(days=40)
+    triggers = [0, 0, 1, 1, 1, 0, -1, -1]
+    for i, (day, trigger) in enumerate(zip([5, 8, 11, 13, 15, 17, 19, 38], triggers)):
+        writer.submit(1, "1h", T0 + timedelta(days=day), [("ema", float(i), trigger)])
+    writer.flush()
+    # Mar 6 and 9 expire; the repeats on Mar 14 and 16 go, the Apr 8 repeat is still recent
+    assert maintain_signal_runs(db, now) == {"deleted": 2, "compacted": 2}
+    assert [(r.ts.month, r.ts.day, r.trigger) for r in runs(db)] == [(3, 12, 1), (3, 18, 0), (3, 20, -1), (4, 8, -1)]
+    assert maintain_signal_runs(db, now) == {"deleted": 0, "compacted": 0}
+    assert db.scalar(select(SignalLatest.ts)) == T0 + timedelta(days=38)
@@ -1,20 +1,59 @@
+import numpy as np
 import pandas as pd
 from app.plugins.signals.ema import EMA
 from app.plugins.signals.rsi import RSI
 from app.plugins.signals.macd import MACD
 from app.plugins.signals.bollinger import Bollinger
 from app.plugins.signals.volume_surge import VolumeSurge
+from app.plugins.signals.stochastic import Stochastic
+from app.plugins.signals.williams_r import WilliamsR
+from app.plugins.signals.adx import ADX
+
+ALL_SIGNALS = [EMA, RSI, MACD, Bollinger, VolumeSurge, Stochastic, WilliamsR, ADX]
 
 def sample_df(n=100):
-    import numpy as np
-    ts = pd.date_range("2024-01-01", periods=n, freq="H")
+    ts = pd.date_range("2024-01-01", periods=n, freq="h")
     price = pd.Series(range(n)) + np.random.randn(n) * 0.5 + 100
-    vol = pd.Series(1000 + (np.random.randn(n)*50).abs())
+    vol = pd.Series(1000 + np.abs(np.random.randn(n) * 50))
     return pd.DataFrame({"ts": ts, "open": price, "high": price+1, "low": price-1, "close": price, "volume": vol})
 
 def test_signals():
     df = sample_df()
-    for Sig in [EMA, RSI, MACD, Bollinger, VolumeSurge]:
+    for Sig in ALL_SIGNALS:
         out = Sig().compute(df.copy())
         assert "value" in out.columns
         assert "trigger" in out.columns
+        assert set(out["trigger"].unique()) <= {-1, 0, 1}
+
+def test_oscillator_triggers_match_thresholds():
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(size=500))
+    df = pd.DataFrame({"ts": pd.date_range("2024-01-01", periods=500, freq="h"), "open": close,
+                       "high": close + rng.random(500), "low": close - rng.random(500), "close": close,
+                       "volume": 1.0})
+    st = Stochastic().compute(df)
+    k, d = st["stoch_k"], st["stoch_d"]
+    expected = np.where((k < 20) & (d < 20), 1, np.where((k > 80) & (d > 80), -1, 0))
+    assert (st["trigger"].to_numpy() == expected).all()
+    wr = WilliamsR().compute(df)
+    assert (wr.loc[wr["value"] < -80, "trigger"] == 1).all()
+    assert (wr.loc[wr["value"].isna(), "trigger"] == 0).all()
+    adx = ADX().compute(df)
+    strong = adx["value"] > 25
+    assert (adx.loc[strong & (adx["plus_di"] > adx["minus_di"]), "trigger"] == 1).all()
+    assert (adx.loc[~strong, "trigger"] == 0).all()
+
+def test_graph_shares_intermediates_across_signals():
+    from app.plugins.signals.graph import SeriesGraph
+    from app.services.signal_engine import evaluate_signals
+    df = sample_df(300)
+    graph = SeriesGraph(df)
+    configs = [{"name": "ema", "params": {"period": 12}}, {"name": "macd"},
+               {"name": "stochastic"}, {"name": "williams_r"}]
+    results = evaluate_signals(df, configs, graph=graph)
+    # EMA(12) and the 14-period rolling min/max are each computed once and reused
+    assert graph.reused >= 3
+    for (name, value, trigger), cfg in zip(results, configs):
+        alone = evaluate_signals(df, [cfg])[0]
+        np.testing.assert_allclose(value, alone[1], equal_nan=True)
+        assert (trigger == alone[2]).all()
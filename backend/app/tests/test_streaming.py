@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.signal_engine import SIGNAL_IMPLS, _load_class
+from app.services.stream_state import StreamRegistry
+
+CONFIGS = [
+    {"name": "ema", "params": {"period": 20}},
+    {"name": "rsi", "params": {"period": 14}},
+    {"name": "macd", "params": {"fast": 12, "slow": 26, "signal": 9}},
+    {"name": "bollinger", "params": {"period": 20, "mult": 2.0}},
+    {"name": "volume_surge", "params": {"lookback": 20, "mult": 1.05}},
+    {"name": "stochastic"},
+    {"name": "williams_r", "params": {"period": 10}},
+    {"name": "adx", "params": {"period": 14, "adx_threshold": 20}},
+]
+
+def ohlcv(n=1500, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = rng.random(n)
+    return pd.DataFrame({"ts": pd.date_range("2024-01-01", periods=n, freq="h"), "open": close,
+                         "high": close + spread, "low": close - spread, "close": close,
+                         "volume": 1000 + rng.random(n) * 100})
+
+@pytest.mark.parametrize("cfg", CONFIGS, ids=lambda c: c["name"])
+def test_stream_matches_batch_compute(cfg):
+    df = ohlcv()
+    impl = _load_class(SIGNAL_IMPLS[cfg["name"]])
+    batch = impl.compute(df, **(cfg.get("params") or {}))
+    stream = impl.stream(**(cfg.get("params") or {}))
+    values, triggers = zip(*(stream.update(c) for c in df.to_dict("records")))
+    np.testing.assert_allclose(values, batch["value"].to_numpy(dtype=float), rtol=1e-7, atol=1e-6, equal_nan=True)
+    assert (np.array(triggers) == batch["trigger"].to_numpy()).all()
+
+@pytest.mark.parametrize("cfg", CONFIGS, ids=lambda c: c["name"])
+def test_seeded_stream_continues_like_a_replayed_one(cfg):
+    df = ohlcv(400)
+    impl = _load_class(SIGNAL_IMPLS[cfg["name"]])
+    params = cfg.get("params") or {}
+    stream = impl.seed(df.iloc[:300], **params)
+    values, triggers = zip(*(stream.update(c) for c in df.iloc[300:].to_dict("records")))
+    batch = impl.compute(df, **params).iloc[300:]
+    np.testing.assert_allclose(values, batch["value"].to_numpy(dtype=float), rtol=1e-7, atol=1e-6, equal_nan=True)
+    assert (np.array(triggers) == batch["trigger"].to_numpy()).all()
+
+def test_registry_advances_incrementally_and_ignores_forming_candle():
+    df = ohlcv(600)
+    registry = StreamRegistry(100)
+    impls = {c["name"]: _load_class(SIGNAL_IMPLS[c["name"]]) for c in CONFIGS}
+
+    def check(frame):
+        for cfg in CONFIGS:
+            value, trigger = registry.latest(impls[cfg["name"]], 1, "1h", cfg, frame)
+            batch = impls[cfg["name"]].compute(frame, **(cfg.get("params") or {})).iloc[-1]
+            assert value == pytest.approx(batch["value"], rel=1e-7, abs=1e-6, nan_ok=True)
+            assert trigger == batch["trigger"]
+
+    check(df.iloc[:500])
+    # the forming candle changes in place, then new candles arrive
+    revised = df.iloc[:500].copy()
+    revised.loc[499, ["close", "high"]] += 3.0
+    check(revised)
+    check(df.iloc[:510])
+    check(df)
+    assert registry.stats()["rebuilds"] == len(CONFIGS)
+    # the first 499 candles seeded the streams; only the later ones were fed one by one
+    assert registry.stats()["advanced_candles"] == len(CONFIGS) * 100
+
+    # a backfill that rewrote candles from ts 598 on drops the streams committed at 598
+    registry.invalidate(1, "1h", since=df["ts"].iloc[599])
+    assert registry.stats()["entries"] == len(CONFIGS)
+    registry.invalidate(1, "1h", since=df["ts"].iloc[598])
+    assert registry.stats()["entries"] == 0
@@ -0,0 +1,64 @@
+import asyncio
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.schemas import SweepRequest
+from app.services.backtest import simulate
+from app.services.signal_engine import evaluate_signals
+from app.services.sweep import SweepJob, create_sweep, expand_combinations, run_sweep
+from benchmarks.bench_indicators import synthetic_ohlcv
+
+SIGNALS = [{"name": "rsi", "params": {"period": [7, 14, 21]}},
+           {"name": "macd", "params": {"fast": [8, 12], "slow": [26], "signal": [9]}}]
+
+def test_expand_grid_and_random():
+    grid = expand_combinations(SIGNALS)
+    assert len(grid) == 6
+    assert grid[0] == [{"name": "rsi", "params": {"period": 7}},
+                       {"name": "macd", "params": {"fast": 8, "slow": 26, "signal": 9}}]
+    assert len({str(c) for c in grid}) == 6
+    sampled = expand_combinations(SIGNALS, "random", samples=4, seed=1)
+    assert len(sampled) == 4 and all(c in grid for c in sampled)
+    assert sampled == expand_combinations(SIGNALS, "random", samples=4, seed=1)
+    with pytest.raises(ValueError):
+        expand_combinations(SIGNALS, limit=5)
+
+def test_sweep_ranks_all_combinations_in_worker_processes():
+    df = synthetic_ohlcv(3000)
+    job = create_sweep("BTC", "1h", SIGNALS, workers=2)
+    asyncio.run(run_sweep(job, df))
+    assert job.status == "done" and job.completed == 6
+    ranked = job.ranked()
+    sharpes = [r["sharpe"] for r in ranked]
+    assert sharpes == sorted(sharpes, reverse=True)
+    best = ranked[0]
+    agg = np.sum([t for _, _, t in evaluate_signals(df, best["signals"])], axis=0)
+    expected = simulate(df["close"].to_numpy(), agg, periods_per_year=24 * 365)
+    assert best["final_equity"] == pytest.approx(expected["final_equity"])
+    assert best["sharpe"] == pytest.approx(expected["sharpe"])
+
+def test_cancel_stops_sweep():
+    df = synthetic_ohlcv(2000)
+    job = SweepJob("BTC", "1h", "grid", "return", 10000.0, 10.0, workers=1,
+                   combos=expand_combinations([{"name": "ema", "params": {"period": list(range(2, 402))}}]))
+
+    async def go():
+        task = asyncio.create_task(run_sweep(job, df))
+        while job.completed == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    asyncio.run(go())
+    assert job.status == "cancelled"
+    assert 0 < job.completed < len(job.combos)
+
+def test_failed_pool_start_marks_job_error():
+    job = create_sweep("BTC", "1h", SIGNALS, workers=-1)
+    asyncio.run(run_sweep(job, synthetic_ohlcv(100)))
+    assert job.status == "error" and "max_workers" in job.error and job.finished_at is not None
+
+def test_sweep_request_bounds_workers_and_samples():
+    for bad in ({"workers": 0}, {"workers": 10 ** 6}, {"samples": 0}):
+        with pytest.raises(ValidationError):
+            SweepRequest(symbol="BTC", timeframe="1h", signals=[], **bad)
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+class WeightBudget:
+    """Token bucket of request weight, refilled continuously over `window` seconds.
+
+    Mirrors exchange limits such as Binance's REQUEST_WEIGHT (e.g. 6000 per minute):
+    every call spends its weight and waits when the bucket runs dry.
+    """
+
+    def __init__(self, capacity: int, window: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / window
+        self.tokens = self.capacity
+        self.spent = 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, weight: int = 1):
+        if weight > self.capacity:
+            raise ValueError(f"Request weight {weight} exceeds budget capacity {self.capacity:g}")
+        async with self._lock:
+            self._refill()
+            while self.tokens < weight:
+                await asyncio.sleep((weight - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= weight
+            self.spent += weight
@@ -0,0 +1,33 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import SessionLocal
+
+T = TypeVar("T")
+
+# Dedicated pool for signal/backtest work. Keeping it apart from the default executor
+# (used by asyncio.to_thread and sync endpoints) means a burst of backtests queues
+# here instead of starving short I/O handlers. Threads rather than processes keep
+# the per-process OHLCV cache and indicator state shared; the heavy parts are NumPy.
+cpu_pool = ThreadPoolExecutor(max_workers=settings.CPU_WORKERS or os.cpu_count() or 1,
+                              thread_name_prefix="cpu")
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn` on the CPU pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool, functools.partial(fn, *args, **kwargs))
+
+def _in_session(fn: Callable[..., T], *args, **kwargs) -> T:
+    db: Session = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+async def run_cpu_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run `fn(db, *args)` on the CPU pool with a sync session owned by the worker thread."""
+    return await run_cpu(_in_session, fn, *args, **kwargs)
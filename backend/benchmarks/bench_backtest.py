@@ -0,0 +1,33 @@
+"""Backtest throughput on synthetic candles: signal evaluation plus simulation.
+
+Run from backend/:  python -m benchmarks.bench_backtest [--sizes 100000 1000000]
+"""
+import argparse
+import time
+import numpy as np
+from app.services.backtest import simulate
+from app.services.signal_engine import evaluate_signals
+from benchmarks.bench_indicators import synthetic_ohlcv
+
+CONFIGS = [{"name": "ema", "params": {"period": 20}}, {"name": "rsi", "params": {"period": 14}}]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    print(f"{'candles':>10}{'signals s':>12}{'simulate s':>12}{'trades':>10}")
+    for n in args.sizes:
+        df = synthetic_ohlcv(n)
+        best_sig = best_sim = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            agg = np.sum([t for _, _, t in evaluate_signals(df, CONFIGS)], axis=0)
+            t1 = time.perf_counter()
+            res = simulate(df["close"].to_numpy(), agg, periods_per_year=525_600)
+            t2 = time.perf_counter()
+            best_sig, best_sim = min(best_sig, t1 - t0), min(best_sim, t2 - t1)
+        print(f"{n:>10}{best_sig:>12.4f}{best_sim:>12.4f}{res['trades']:>10}")
+
+if __name__ == "__main__":
+    main()
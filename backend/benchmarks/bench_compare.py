@@ -0,0 +1,56 @@
+"""Compare/correlation engine over the asset universe: one bulk load plus NumPy statistics.
+
+Run from backend/:  python -m benchmarks.bench_compare [--assets 100 --candles 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db import Base
+from app.models import Asset
+from app.services.compare import compare_assets, pairwise_cov_corr, rolling_correlation
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import load_close_matrix
+from benchmarks.bench_indicators import synthetic_ohlcv
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--assets", type=int, default=100)
+    ap.add_argument("--candles", type=int, default=10_000)
+    ap.add_argument("--window", type=int, default=100)
+    args = ap.parse_args()
+    engine = create_engine(settings.DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        assets = [Asset(symbol=f"A{i:03d}", name=f"Asset {i}") for i in range(args.assets)]
+        db.add_all(assets); db.commit()
+        for i, a in enumerate(assets):
+            df = synthetic_ohlcv(args.candles, seed=i)
+            df[["open", "high", "low", "close"]] += 1000  # keep the walk positive
+            upsert_ohlcv(db, a.id, "1m", df.to_dict("records"), "binance")
+
+        t0 = time.perf_counter()
+        ts, prices = load_close_matrix(db, [a.id for a in assets], "1m", args.candles)
+        t1 = time.perf_counter()
+        returns = prices[1:] / prices[:-1] - 1.0
+        pairwise_cov_corr(returns)
+        t2 = time.perf_counter()
+        rolling_correlation(returns, returns[:, 0], args.window)
+        t3 = time.perf_counter()
+        compare_assets(db, assets, "1m", args.candles, window=args.window)
+        t4 = time.perf_counter()
+    print(f"{args.assets} assets x {args.candles} candles")
+    print(f"  bulk load + align   {t1 - t0:8.3f} s")
+    print(f"  cov/corr matrix     {t2 - t1:8.3f} s")
+    print(f"  rolling corr (w={args.window}) {t3 - t2:6.3f} s")
+    print(f"  compare_assets      {t4 - t3:8.3f} s  (incl. JSON-ready conversion)")
+
+if __name__ == "__main__":
+    main()
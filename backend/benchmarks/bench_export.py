@@ -0,0 +1,87 @@
+"""Peak Python memory of an OHLCV export: streaming encoder vs. building the body in memory.
+
+Run from backend/:  python -m benchmarks.bench_export [--sizes 100000 500000]
+
+"buffered" fetches every row and writes one CSV string, as /reports/ohlcv.csv used
+to; the streaming rows read batches off a server-side cursor and discard each
+encoded chunk, as the response body does. Peaks come from tracemalloc.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db import Base, async_url
+from app.models import Asset, PriceOHLCV
+from app.services.export import ROW_COLUMNS, check_export, encode_export, export_batches
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import ohlcv_select
+from benchmarks.bench_indicators import synthetic_ohlcv
+
+async def buffered(factory) -> int:
+    async with factory() as db:
+        rows = (await db.execute(ohlcv_select(1, "1m", ROW_COLUMNS))).all()
+    sio = io.StringIO()
+    w = csv.writer(sio)
+    w.writerow(ROW_COLUMNS)
+    for ts, *rest in rows:
+        w.writerow([ts.isoformat(), *rest])
+    return len(sio.getvalue().encode())
+
+async def streaming(factory, fmt: str, compression: str) -> int:
+    size = 0
+    async for chunk in encode_export(export_batches(factory, [(1, "BTC")], "1m"), ("symbol", *ROW_COLUMNS),
+                                     fmt, compression):
+        size += len(chunk)
+    return size
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    size = asyncio.run(fn(*args))
+    secs = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, secs, peak
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 500_000])
+    ap.add_argument("--formats", nargs="+", default=["csv", "csv+gzip", "ndjson", "parquet", "arrow+zstd"])
+    args = ap.parse_args()
+    engine = create_engine(settings.DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    factory = async_sessionmaker(create_async_engine(async_url(settings.DATABASE_URL)), expire_on_commit=False)
+    print(f"{'rows':>9}  {'export':<14}{'MB out':>9}{'seconds':>9}{'peak MB':>10}")
+    for n in args.sizes:
+        with sessionmaker(bind=engine)() as db:
+            if not db.get(Asset, 1):
+                db.add(Asset(symbol="BTC", name="Bitcoin")); db.commit()
+            db.execute(delete(PriceOHLCV)); db.commit()
+            upsert_ohlcv(db, 1, "1m", synthetic_ohlcv(n).to_dict("records"), "binance")
+        runs = [("buffered csv", buffered, (factory,))]
+        for spec in args.formats:
+            fmt, _, compression = spec.partition("+")
+            try:
+                check_export(fmt, compression or "none")
+            except ValueError as e:
+                print(f"{n:>9}  {spec:<14}skipped: {e}")
+                continue
+            runs.append((spec, streaming, (factory, fmt, compression or "none")))
+        for name, fn, fn_args in runs:
+            size, secs, peak = measure(fn, *fn_args)
+            print(f"{n:>9}  {name:<14}{size / 1e6:>9.1f}{secs:>9.2f}{peak / 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
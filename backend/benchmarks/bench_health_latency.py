@@ -0,0 +1,107 @@
+"""/health latency while a backfill runs on the same event loop.
+
+Run from backend/:  python -m benchmarks.bench_health_latency [--days 30 --timeframe 1m]
+
+Klines come from an in-process mock exchange, so the backfill is dominated by row
+parsing and database writes. "async" is backfill_prices on the async session;
+"blocking" writes with a sync Session directly on the loop, as the endpoint used to.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+import httpx
+import numpy as np
+from sqlalchemy import create_engine, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db import Base, async_url
+from app.main import app
+from app.models import Asset, PriceOHLCV
+from app.plugins.connectors.binance import BinanceConnector
+from app.services.data_loader import backfill_prices
+from app.services.ingest import upsert_ohlcv
+from app.utils.timeframes import TIMEFRAME_MS
+
+def mock_exchange() -> httpx.MockTransport:
+    # pages are encoded once and replayed, so serving them costs the loop almost nothing
+    pages = {}
+
+    def handler(request: httpx.Request):
+        body = pages.get(str(request.url))
+        if body is None:
+            p = request.url.params
+            step = TIMEFRAME_MS[p["interval"]]
+            first = -(-int(p["startTime"]) // step) * step
+            opens = range(first, int(p["endTime"]) + 1, step)
+            body = pages[str(request.url)] = json.dumps(
+                [[t, "1.0", "2.0", "0.5", "1.5", "10.0", t + step - 1] for t in list(opens)[:int(p["limit"])]])
+        return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+    return httpx.MockTransport(handler)
+
+async def probe(client: httpx.AsyncClient, done: asyncio.Event, interval: float):
+    # latency is measured from each probe's scheduled time, so a stalled loop shows up
+    # as every probe it delayed rather than as one slow sample (coordinated omission)
+    latencies = []
+    due = time.perf_counter()
+    while not done.is_set():
+        wait = due - time.perf_counter()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await client.get("/health")
+        latencies.append(time.perf_counter() - due)
+        due += interval
+    return np.array(latencies) * 1000
+
+async def run(mode: str, days: int, timeframe: str, interval: float):
+    sync_engine = create_engine(settings.DATABASE_URL)
+    with sessionmaker(bind=sync_engine)() as db:
+        db.execute(delete(PriceOHLCV)); db.commit()
+    async_engine = create_async_engine(async_url(settings.DATABASE_URL))
+    done = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client, \
+            httpx.AsyncClient(transport=mock_exchange()) as exchange:
+        await BinanceConnector().backfill("BTCUSDT", timeframe, days, session=exchange)  # warm the mock
+        prober = asyncio.create_task(probe(client, done, interval))
+        await asyncio.sleep(0.2)  # baseline samples before the backfill starts
+        t0 = time.perf_counter()
+        if mode == "async":
+            async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+                res = await backfill_prices(db, "BTC", timeframe, days, session=exchange)
+            rows = res["inserted"]
+        else:
+            rows = await BinanceConnector().backfill("BTCUSDT", timeframe, days, session=exchange)
+            with sessionmaker(bind=sync_engine)() as db:
+                rows = upsert_ohlcv(db, 1, timeframe, rows, "binance")["rows"]
+        secs = time.perf_counter() - t0
+        done.set()
+        lat = await prober
+    await async_engine.dispose()
+    print(f"{mode:<9}{rows:>9}{secs:>9.2f}{len(lat):>9}"
+          + "".join(f"{np.percentile(lat, q):>10.1f}" for q in (50, 95, 99)) + f"{lat.max():>10.1f}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--timeframe", default="1m")
+    ap.add_argument("--interval", type=float, default=0.005, help="seconds between /health probes")
+    ap.add_argument("--modes", nargs="+", default=["blocking", "async"])
+    args = ap.parse_args()
+    engine = create_engine(settings.DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        if not db.query(Asset).filter(Asset.symbol == "BTC").first():
+            db.add(Asset(symbol="BTC", name="Bitcoin", binance_symbol="BTCUSDT")); db.commit()
+    print(f"{'mode':<9}{'rows':>9}{'seconds':>9}{'probes':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode in args.modes:
+        asyncio.run(run(mode, args.days, args.timeframe, args.interval))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Per-indicator throughput on synthetic candles.
+
+Run from backend/:  python -m benchmarks.bench_indicators [--sizes 10000 100000 1000000]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from app.services.signal_engine import SIGNAL_IMPLS, _load_class
+
+def synthetic_ohlcv(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = rng.random(n)
+    return pd.DataFrame({
+        "ts": pd.date_range("2020-01-01", periods=n, freq="min"),
+        "open": close, "high": close + spread, "low": close - spread, "close": close,
+        "volume": 1000 + rng.random(n) * 100,
+    })
+
+def bench(name: str, df: pd.DataFrame, repeat: int) -> float:
+    impl = _load_class(SIGNAL_IMPLS[name])
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        impl.compute(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--signals", nargs="+", default=list(SIGNAL_IMPLS))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    print(f"{'signal':<14}{'candles':>10}{'seconds':>10}{'candles/s':>14}")
+    for n in args.sizes:
+        df = synthetic_ohlcv(n)
+        for name in args.signals:
+            secs = bench(name, df, args.repeat)
+            print(f"{name:<14}{n:>10}{secs:>10.4f}{n / secs:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Insert and range-scan throughput of price_ohlcv layouts: the old indexed table vs. the trimmed and partitioned ones.
+
+Run from backend/:  python -m benchmarks.bench_ohlcv_storage [--assets 10 --days 30]
+
+"legacy" is the table as it was: a surrogate id, single-column indexes on asset_id,
+ts and timeframe, the uix_asset_ts_tf constraint and idx_price_lookup. "none" is the
+current model, whose composite primary key is its only index. With a PostgreSQL
+DATABASE_URL the "time" and "timeframe" partitioned layouts are measured too; use a
+scratch database, as price_ohlcv is dropped and recreated for every layout. By default
+each layout gets its own SQLite file, where partitioning does not apply.
+
+"upsert" rewrites the newest day of every asset (the incremental backfill path) and
+"scan" reads random one-day windows of 1m candles.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/bench.db")
+
+from sqlalchemy import (Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table,
+                        UniqueConstraint, create_engine, text)
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db import Base
+from app.models import Asset, PriceOHLCV
+from app.services.ohlcv_partitions import forget_partitions
+from app.services.ingest import upsert_ohlcv
+from app.services.ohlcv_repo import ohlcv_select
+from benchmarks.bench_indicators import synthetic_ohlcv
+
+_PARTITION_BY = {"time": "RANGE (ts)", "timeframe": "LIST (timeframe)"}
+
+def legacy_table(metadata: MetaData) -> Table:
+    return Table(
+        "price_ohlcv", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("asset_id", Integer, ForeignKey("assets.id", ondelete="CASCADE"), index=True),
+        Column("ts", DateTime, index=True),
+        Column("timeframe", String(8), index=True),
+        *(Column(c, Float) for c in ("open", "high", "low", "close", "volume")),
+        Column("source", String(32)),
+        UniqueConstraint("asset_id", "ts", "timeframe", name="uix_asset_ts_tf"),
+        Index("idx_price_lookup", "asset_id", "timeframe", "ts"),
+    )
+
+def layout_table(layout: str) -> Table:
+    metadata = MetaData()
+    Base.metadata.tables["assets"].to_metadata(metadata)
+    if layout == "legacy":
+        return legacy_table(metadata)
+    table = PriceOHLCV.__table__.to_metadata(metadata)
+    table.dialect_options["postgresql"]["partition_by"] = _PARTITION_BY.get(layout)
+    return table
+
+def prepare(layout: str, assets: int):
+    postgres = settings.DATABASE_URL.startswith("postgresql")
+    engine = create_engine(settings.DATABASE_URL if postgres else f"sqlite:///{_tmp}/{layout}.db")
+    table = layout_table(layout)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS price_ohlcv CASCADE" if postgres else "DROP TABLE IF EXISTS price_ohlcv"))
+        table.metadata.create_all(conn)
+    # the ingest path reads the layout from settings to decide whether to create partitions
+    settings.OHLCV_PARTITIONING = layout if layout in _PARTITION_BY else "none"
+    forget_partitions()
+    db = sessionmaker(bind=engine)()
+    for i in range(1, assets + 1):
+        if not db.get(Asset, i):
+            db.add(Asset(id=i, symbol=f"A{i}", name=f"Asset {i}"))
+    db.commit()
+    return engine, db
+
+def size_mb(engine, layout: str) -> float:
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            return conn.scalar(text("SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree('price_ohlcv')")) / 1e6
+    return os.path.getsize(f"{_tmp}/{layout}.db") / 1e6
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--assets", type=int, default=10)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--scans", type=int, default=500)
+    args = ap.parse_args()
+    layouts = ["legacy", "none"]
+    if settings.DATABASE_URL.startswith("postgresql"):
+        layouts += ["time", "timeframe"]
+    n = args.days * 1440
+    frames = {i: synthetic_ohlcv(n, seed=i).to_dict("records") for i in range(1, args.assets + 1)}
+    first = frames[1][0]["ts"]
+    print(f"{args.assets} assets x {n} 1m candles")
+    print(f"{'layout':<11}{'insert rows/s':>15}{'upsert rows/s':>15}{'scans/s':>10}{'size MB':>10}")
+    for layout in layouts:
+        engine, db = prepare(layout, args.assets)
+        t0 = time.perf_counter()
+        for asset_id, rows in frames.items():
+            upsert_ohlcv(db, asset_id, "1m", rows, "binance")
+        insert = args.assets * n / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for asset_id, rows in frames.items():
+            upsert_ohlcv(db, asset_id, "1m", rows[-1440:], "binance")
+        upsert = args.assets * 1440 / (time.perf_counter() - t0)
+
+        rng = random.Random(0)
+        t0 = time.perf_counter()
+        for _ in range(args.scans):
+            start = first + timedelta(minutes=rng.randrange(n - 1440))
+            db.execute(ohlcv_select(rng.randint(1, args.assets), "1m", ("ts", "close"), start,
+                                    start + timedelta(days=1))).all()
+        scans = args.scans / (time.perf_counter() - t0)
+        db.close()
+        print(f"{layout:<11}{insert:>15,.0f}{upsert:>15,.0f}{scans:>10,.0f}{size_mb(engine, layout):>10.1f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
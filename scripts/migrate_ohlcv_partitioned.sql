@@ -0,0 +1,83 @@
+-- Rebuild price_ohlcv as a declaratively partitioned table, matching OHLCV_PARTITIONING:
+--
+--   psql "$DATABASE_URL" -v layout=time -f scripts/migrate_ohlcv_partitioned.sql
+--
+-- layout=time       monthly ts ranges (price_ohlcv_p2024_01)
+-- layout=timeframe  a list partition per timeframe (price_ohlcv_1m), ranged monthly
+--                   below 1d (price_ohlcv_1m_p2024_01) and yearly above (price_ohlcv_1d_p2024)
+--
+-- Stop backfills first: rows are copied in one transaction. Partitions cover the stored
+-- history plus two months ahead; the app creates later ones as candles arrive. Set
+-- OHLCV_PARTITIONING to the same layout before restarting. The old table is kept as
+-- price_ohlcv_unpartitioned; drop it once the new one checks out.
+\set ON_ERROR_STOP on
+\if :{?layout}
+\else
+  \set layout time
+\endif
+SELECT set_config('cryptomind.ohlcv_layout', :'layout', false);
+
+BEGIN;
+ALTER TABLE price_ohlcv RENAME TO price_ohlcv_unpartitioned;
+ALTER INDEX price_ohlcv_pkey RENAME TO price_ohlcv_unpartitioned_pkey;
+
+DO $$
+DECLARE
+    layout text := current_setting('cryptomind.ohlcv_layout');
+    tf text;
+    parent text;
+    yearly boolean;
+    step interval;
+    p date;
+    last date;
+BEGIN
+    IF layout NOT IN ('time', 'timeframe') THEN
+        RAISE EXCEPTION 'layout must be time or timeframe, got %', layout;
+    END IF;
+    EXECUTE format($ddl$
+        CREATE TABLE price_ohlcv (
+            asset_id integer NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+            timeframe varchar(8) NOT NULL,
+            ts timestamp without time zone NOT NULL,
+            open double precision NOT NULL,
+            high double precision NOT NULL,
+            low double precision NOT NULL,
+            close double precision NOT NULL,
+            volume double precision NOT NULL,
+            source varchar(32) NOT NULL,
+            PRIMARY KEY (asset_id, timeframe, ts)
+        ) PARTITION BY %s
+    $ddl$, CASE layout WHEN 'time' THEN 'RANGE (ts)' ELSE 'LIST (timeframe)' END);
+
+    FOR tf, p, last IN
+        SELECT CASE WHEN layout = 'timeframe' THEN timeframe END, min(ts)::date,
+               greatest(max(ts), (now() AT TIME ZONE 'utc') + interval '2 months')::date
+        FROM price_ohlcv_unpartitioned GROUP BY 1
+    LOOP
+        IF tf IS NULL THEN
+            parent := 'price_ohlcv';
+            yearly := false;
+        ELSE
+            parent := 'price_ohlcv_' || tf;
+            yearly := tf ~ '^[0-9]+[dw]$';
+            EXECUTE format('CREATE TABLE %I PARTITION OF price_ohlcv FOR VALUES IN (%L) PARTITION BY RANGE (ts)',
+                           parent, tf);
+        END IF;
+        step := CASE WHEN yearly THEN interval '1 year' ELSE interval '1 month' END;
+        p := date_trunc(CASE WHEN yearly THEN 'year' ELSE 'month' END, p)::date;
+        WHILE p <= last LOOP
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           parent || '_p' || to_char(p, CASE WHEN yearly THEN 'YYYY' ELSE 'YYYY_MM' END),
+                           parent, p, (p + step)::date);
+            p := (p + step)::date;
+        END LOOP;
+    END LOOP;
+END
+$$;
+
+INSERT INTO price_ohlcv (asset_id, timeframe, ts, open, high, low, close, volume, source)
+SELECT asset_id, timeframe, ts, open, high, low, close, volume, source FROM price_ohlcv_unpartitioned;
+COMMIT;
+
+ANALYZE price_ohlcv;
+-- DROP TABLE price_ohlcv_unpartitioned;
@@ -0,0 +1,21 @@
+-- Bring a price_ohlcv table created before the composite primary key in line with
+-- models.PriceOHLCV without partitioning it: (asset_id, timeframe, ts) becomes the
+-- primary key and the surrogate id, the per-column indexes, uix_asset_ts_tf and
+-- idx_price_lookup go away. Run once, outside a transaction (CONCURRENTLY):
+--
+--   psql "$DATABASE_URL" -f scripts/migrate_ohlcv_trim_indexes.sql
+--
+-- Writers may keep running while the key index builds; the swap takes a brief lock.
+\set ON_ERROR_STOP on
+
+CREATE UNIQUE INDEX CONCURRENTLY price_ohlcv_key ON price_ohlcv (asset_id, timeframe, ts);
+
+BEGIN;
+ALTER TABLE price_ohlcv DROP CONSTRAINT price_ohlcv_pkey;
+ALTER TABLE price_ohlcv ADD CONSTRAINT price_ohlcv_pkey PRIMARY KEY USING INDEX price_ohlcv_key;
+ALTER TABLE price_ohlcv DROP CONSTRAINT IF EXISTS uix_asset_ts_tf;
+DROP INDEX IF EXISTS idx_price_lookup, ix_price_ohlcv_asset_id, ix_price_ohlcv_ts, ix_price_ohlcv_timeframe;
+ALTER TABLE price_ohlcv DROP COLUMN id;
+COMMIT;
+
+ANALYZE price_ohlcv;
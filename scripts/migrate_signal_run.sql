@@ -0,0 +1,42 @@
+-- Bring a signal_run table created before the batched writer in line with
+-- models.SignalRun and create signal_latest: duplicate runs of a signal on the same
+-- candle are collapsed to the newest one, (asset_id, timeframe, name, ts) becomes the
+-- primary key, and the surrogate id and the old indexes go away. Run once:
+--
+--   psql "$DATABASE_URL" -f scripts/migrate_signal_run.sql
+--
+-- Stop the API first: signal_run is locked for the whole transaction.
+\set ON_ERROR_STOP on
+
+BEGIN;
+LOCK TABLE signal_run IN EXCLUSIVE MODE;
+
+DELETE FROM signal_run s
+USING signal_run newer
+WHERE newer.asset_id = s.asset_id AND newer.timeframe = s.timeframe
+  AND newer.name = s.name AND newer.ts = s.ts AND newer.id > s.id;
+
+ALTER TABLE signal_run DROP CONSTRAINT signal_run_pkey;
+ALTER TABLE signal_run ADD CONSTRAINT signal_run_pkey PRIMARY KEY (asset_id, timeframe, name, ts);
+DROP INDEX IF EXISTS idx_signal_lookup, ix_signal_run_asset_id, ix_signal_run_timeframe,
+    ix_signal_run_name, ix_signal_run_ts;
+ALTER TABLE signal_run DROP COLUMN id;
+
+CREATE TABLE IF NOT EXISTS signal_latest (
+    asset_id INTEGER NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+    timeframe VARCHAR(8) NOT NULL,
+    name VARCHAR(64) NOT NULL,
+    ts TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    value DOUBLE PRECISION NOT NULL,
+    trigger INTEGER NOT NULL,
+    PRIMARY KEY (asset_id, timeframe, name)
+);
+INSERT INTO signal_latest (asset_id, timeframe, name, ts, value, trigger)
+SELECT DISTINCT ON (asset_id, timeframe, name) asset_id, timeframe, name, ts, value, trigger
+FROM signal_run
+ORDER BY asset_id, timeframe, name, ts DESC
+ON CONFLICT (asset_id, timeframe, name) DO NOTHING;
+COMMIT;
+
+ANALYZE signal_run;
+ANALYZE signal_latest;